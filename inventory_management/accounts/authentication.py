@@ -0,0 +1,131 @@
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import router
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+# Loaded eagerly from the cache; any other field is fetched on first access.
+CACHED_USER_FIELDS = ("id", "username", "is_staff", "is_active", "is_superuser")
+
+
+class TTLCache:
+    """
+    Thread-safe LRU mapping whose entries expire `ttl` seconds after being set.
+    """
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+_config = getattr(settings, "AUTH_USER_CACHE", {})
+user_cache = TTLCache(_config.get("MAX_SIZE", 10_000), _config.get("TTL", 60))
+
+
+def invalidate_user(user_id):
+    user_cache.delete(str(user_id))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that resolves the token's user from a per-process TTL
+    cache instead of a query per request. Only CACHED_USER_FIELDS are cached;
+    the returned User loads anything else lazily. Entries are dropped when
+    the user is saved or deleted (accounts.signals) and expire after
+    AUTH_USER_CACHE["TTL"] seconds, which bounds staleness across processes.
+    """
+
+    def get_user(self, validated_token):
+        if api_settings.CHECK_REVOKE_TOKEN:
+            # Needs the password hash, which is deliberately not cached.
+            return super().get_user(validated_token)
+        user_id = self._user_id(validated_token)
+        values = user_cache.get(str(user_id))
+        if values is None:
+            values = self._user_values(user_id).first()
+            if values is None:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found")
+            user_cache.set(str(user_id), values)
+        return self._cached_user(values)
+
+    async def aauthenticate(self, request):
+        """
+        authenticate() for async views: the token is checked in-process and
+        only a user cache miss reaches the database (via the async ORM).
+        """
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
+
+    async def aget_user(self, validated_token):
+        if api_settings.CHECK_REVOKE_TOKEN:
+            return await sync_to_async(super().get_user)(validated_token)
+        user_id = self._user_id(validated_token)
+        values = user_cache.get(str(user_id))
+        if values is None:
+            values = await self._user_values(user_id).afirst()
+            if values is None:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found")
+            user_cache.set(str(user_id), values)
+        return self._cached_user(values)
+
+    def _user_id(self, validated_token):
+        try:
+            return validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+    def _cached_fields(self):
+        # from_db() expects the values in model field order.
+        return [f.attname for f in self.user_model._meta.concrete_fields if f.attname in CACHED_USER_FIELDS]
+
+    def _user_values(self, user_id):
+        return self.user_model.objects.filter(**{api_settings.USER_ID_FIELD: user_id}).values_list(
+            *self._cached_fields()
+        )
+
+    def _cached_user(self, values):
+        user = self.user_model.from_db(router.db_for_write(self.user_model), self._cached_fields(), values)
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        return user
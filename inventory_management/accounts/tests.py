@@ -1,3 +1,74 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.test import RequestFactory, TestCase
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .authentication import CachedJWTAuthentication, TTLCache, user_cache
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        user_cache.clear()
+        self.addCleanup(user_cache.clear)
+        self.user = User.objects.create_user("owner", email="owner@example.com")
+        self.auth = CachedJWTAuthentication()
+
+    def _authenticate(self, token=None):
+        token = token or AccessToken.for_user(self.user)
+        request = RequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {token}")
+        return self.auth.authenticate(request)[0]
+
+    def test_user_is_loaded_once(self):
+        with self.assertNumQueries(1):
+            self._authenticate()
+        with self.assertNumQueries(0):
+            user = self._authenticate()
+        self.assertEqual((user.pk, user.username, user.is_staff), (self.user.pk, "owner", False))
+        # Fields outside CACHED_USER_FIELDS are loaded on first access.
+        with self.assertNumQueries(1):
+            self.assertEqual(user.email, "owner@example.com")
+
+    def test_async_lookups_share_the_cache(self):
+        request = RequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}")
+        self._authenticate()
+        with self.assertNumQueries(0):
+            user, _token = async_to_sync(self.auth.aauthenticate)(request)
+        self.assertEqual(user.pk, self.user.pk)
+
+    def test_saving_or_deleting_the_user_invalidates(self):
+        self._authenticate()
+        self.user.is_staff = True
+        self.user.save()
+        self.assertTrue(self._authenticate().is_staff)
+
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaisesMessage(AuthenticationFailed, "User is inactive"):
+            self._authenticate()
+
+        token = AccessToken.for_user(User.objects.create_user("gone"))
+        self._authenticate(token)
+        User.objects.get(username="gone").delete()
+        with self.assertRaisesMessage(AuthenticationFailed, "User not found"):
+            self._authenticate(token)
+
+    def test_entries_expire(self):
+        self._authenticate()
+        # An update the signals don't see, e.g. from another process.
+        User.objects.filter(pk=self.user.pk).update(username="renamed")
+        self.assertEqual(self._authenticate().username, "owner")
+        with mock.patch("accounts.authentication.time.monotonic", return_value=10**9):
+            self.assertEqual(self._authenticate().username, "renamed")
+
+
+class TTLCacheTests(TestCase):
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = TTLCache(max_size=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        self.assertEqual((cache.get("a"), cache.get("b"), cache.get("c")), (1, None, 3))
@@ -0,0 +1,115 @@
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+DURATIONS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_rate(rate):
+    """
+    "20/min" -> (20 tokens, refilled at 20/60 per second); None -> None.
+    """
+    if rate is None:
+        return None
+    num, period = rate.split("/")
+    num = int(num)
+    return num, num / DURATIONS[period[0]]
+
+
+class LocalBuckets:
+    """
+    Token buckets in process memory: a dict lookup and some arithmetic
+    under a lock, so rejecting a request costs next to nothing. The least
+    recently used keys are dropped beyond `max_keys` (they refill to full).
+    """
+
+    def __init__(self, max_keys):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, refill, now):
+        """
+        Take one token; returns 0 if there was one, else the seconds until there is.
+        """
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * refill)
+            wait = 0 if tokens >= 1 else (1 - tokens) / refill
+            self._buckets[key] = (tokens - 1 if not wait else tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return wait
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class CacheBuckets:
+    """
+    Token buckets in the default cache, shared by every process. The read
+    and write aren't atomic, so concurrent requests can overdraw a bucket
+    slightly; the limit still holds over time.
+    """
+
+    def take(self, key, capacity, refill, now):
+        tokens, updated = cache.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated) * refill)
+        wait = 0 if tokens >= 1 else (1 - tokens) / refill
+        # Kept until the bucket would be full again anyway.
+        cache.set(key, (tokens - 1 if not wait else tokens, now), int(capacity / refill) + 1)
+        return wait
+
+    def clear(self):
+        pass
+
+
+_config = getattr(settings, "THROTTLE_BUCKETS", {})
+buckets = CacheBuckets() if _config.get("BACKEND") == "cache" else LocalBuckets(_config.get("MAX_KEYS", 100_000))
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Rate limits per client and endpoint from REST_FRAMEWORK's
+    DEFAULT_THROTTLE_RATES ("N/s|min|hour|day"). The scope is the view's
+    `throttle_scope`, or "<basename>.<action>" for viewset actions (e.g.
+    "item.audit"); scopes without a rate aren't limited. Clients are
+    users, or their IP address when anonymous. A rate allows bursts of N
+    requests, refilling evenly over the period.
+    """
+
+    def allow_request(self, request, view):
+        self.wait_seconds = None
+        scope = self.get_scope(view)
+        rate = parse_rate(api_settings.DEFAULT_THROTTLE_RATES.get(scope)) if scope else None
+        if rate is None:
+            return True
+        ident = request.user.pk if request.user and request.user.is_authenticated else self.get_ident(request)
+        self.wait_seconds = buckets.take(f"throttle:{scope}:{ident}", *rate, time.time())
+        return not self.wait_seconds
+
+    def get_scope(self, view):
+        scope = getattr(view, "throttle_scope", None)
+        if scope is None and getattr(view, "action", None):
+            scope = f"{view.basename}.{view.action}"
+        return scope
+
+    def wait(self):
+        return self.wait_seconds
+
+
+async def acheck_throttles(view, request):
+    """
+    APIView.check_throttles() for async views; only the cache backend does I/O.
+    """
+    if isinstance(buckets, CacheBuckets):
+        return await sync_to_async(view.check_throttles)(request)
+    return view.check_throttles(request)
@@ -1,7 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
-from .views import UserViewSet, RegisterView
+from .views import UserViewSet, RegisterView, TokenObtainPairView, TokenRefreshView
 
 router = DefaultRouter()
 router.register("users", UserViewSet)
@@ -1,5 +1,6 @@
 from django.contrib.auth import get_user_model
 from rest_framework import viewsets, generics, permissions
+from rest_framework_simplejwt import views as jwt_views
 from .serializers import UserSerializer, RegisterSerializer
 
 User = get_user_model()
@@ -36,3 +37,15 @@ class RegisterView(generics.CreateAPIView):
     queryset = User.objects.all()
     serializer_class = RegisterSerializer
     permission_classes = [permissions.AllowAny]
+    throttle_scope = "register"
+
+
+class TokenObtainPairView(jwt_views.TokenObtainPairView):
+    """
+    Login (JWT pair). Throttled per IP before the password is hashed.
+    """
+    throttle_scope = "token"
+
+
+class TokenRefreshView(jwt_views.TokenRefreshView):
+    throttle_scope = "token_refresh"
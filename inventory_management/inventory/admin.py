@@ -1,7 +1,263 @@
+from datetime import date, datetime
+
 from django.contrib import admin
-from .models import Category,InventoryItem, InventoryChangeLog
-# Register your models here.
+from django.core.paginator import Paginator
+from django.db import connections, router, transaction
+from django.db.models import QuerySet
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from . import cache
+from .changelog import creation_entries, record_changes, update_entries
+from .exports import CHANGE_EXPORT_COLUMNS, ITEM_EXPORT_COLUMNS, export_response
+from .models import (
+    Category, InventoryItem, InventoryChangeLog, InventoryChangeRollup, InventoryItemTombstone, InventorySnapshot,
+    Location, StockLevel,
+)
+from .search import matching_item_ids, search_words
+from .summary import item_state, record_stock_changes
+
+
+def estimated_row_count(model):
+    """
+    A cheap estimate of the rows in `model`'s table: PostgreSQL's planner
+    statistics, elsewhere the highest primary key.
+    """
+    connection = connections[router.db_for_read(model) or "default"]
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [model._meta.db_table])
+            row = cursor.fetchone()
+        # -1 until the table is first analyzed.
+        if row and row[0] >= 0:
+            return row[0]
+    return model._default_manager.order_by("-pk").values_list("pk", flat=True).first() or 0
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Changelist paginator for tables too big to COUNT(*) on every page view:
+    an unfiltered list uses estimated_row_count(), a filtered one counts at
+    most `count_limit` rows (narrow the filters to page further).
+    """
+    count_limit = 10_000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimated_row_count(queryset.model)
+            if estimate > self.count_limit:
+                return estimate
+        return queryset.order_by()[:self.count_limit].count()
+
+
+def _periods(first, last, kind):
+    """
+    The starts of every year/month/day from `first` to `last` (dates).
+    """
+    current = first.replace(month=1, day=1) if kind == "year" else first.replace(day=1) if kind == "month" else first
+    while current <= last:
+        yield current
+        if kind == "year":
+            current = current.replace(year=current.year + 1)
+        elif kind == "month":
+            current = current.replace(year=current.year + current.month // 12, month=current.month % 12 + 1)
+        else:
+            current = date.fromordinal(current.toordinal() + 1)
+
+
+class DateRangeQuerySet(QuerySet):
+    """
+    For date_hierarchy: dates()/datetimes() list every period between the
+    indexed MIN and MAX of the field instead of running SELECT DISTINCT
+    over every matching row. Some links may lead to an empty period.
+    """
+
+    def _range(self, field_name):
+        # Two index seeks; SQLite scans for MIN() and MAX() in one query.
+        values = self.exclude(**{f"{field_name}__isnull": True}).values_list(field_name, flat=True)
+        return values.order_by(field_name).first(), values.order_by(f"-{field_name}").first()
+
+    def dates(self, field_name, kind, order="ASC"):
+        first, last = self._range(field_name)
+        if first is None:
+            return []
+        periods = list(_periods(first, last, kind))
+        return periods[::-1] if order == "DESC" else periods
+
+    def datetimes(self, field_name, kind, order="ASC", tzinfo=None):
+        first, last = self._range(field_name)
+        if first is None:
+            return []
+        tzinfo = tzinfo or timezone.get_current_timezone()
+        first, last = timezone.localtime(first, tzinfo).date(), timezone.localtime(last, tzinfo).date()
+        periods = [datetime.combine(day, datetime.min.time(), tzinfo) for day in _periods(first, last, kind)]
+        return periods[::-1] if order == "DESC" else periods
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    # Skips the second, unfiltered COUNT(*) behind "N results (M total)".
+    show_full_result_count = False
+    list_per_page = 50
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        if self.date_hierarchy is None:
+            return queryset
+        return DateRangeQuerySet(queryset.model, queryset.query, queryset.db, queryset._hints)
+
+
+class ReadOnlyAdmin(LargeTableAdmin):
+    """
+    Rows written by the application (logs, rollups, snapshots): staff can
+    browse and export them, not edit them.
+    """
+    actions = None
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(Category)
+class CategoryAdmin(admin.ModelAdmin):
+    list_display = ["name", "description"]
+    search_fields = ["name"]
+
+
+@admin.register(InventoryItem)
+class InventoryItemAdmin(LargeTableAdmin):
+    list_display = ["name", "sku", "user", "category", "quantity", "allocated", "reorder_point", "price", "last_updated"]
+    list_select_related = ["user", "category"]
+    list_filter = ["category"]
+    autocomplete_fields = ["user", "category"]
+    # allocated is the sum of the item's stock levels, kept by transfers.
+    readonly_fields = ["version", "date_added", "last_updated", "allocated"]
+    search_fields = ["name"]
+    search_help_text = "Item or category name words (prefix match)."
+    actions = ["export_csv"]
+
+    def get_actions(self, request):
+        # Its confirmation page loads every change log of every selected item.
+        actions = super().get_actions(request)
+        actions.pop("delete_selected", None)
+        return actions
+
+    def get_deleted_objects(self, objs, request):
+        # Stock levels, logs, rollups and snapshots are read-only to staff but
+        # belong to their item; they mustn't block its deletion.
+        deleted, model_count, perms_needed, protected = super().get_deleted_objects(objs, request)
+        owned = {
+            str(model._meta.verbose_name)
+            for model in (StockLevel, InventoryChangeLog, InventoryChangeRollup, InventorySnapshot)
+        }
+        return deleted, model_count, perms_needed - owned, protected
+
+    def save_model(self, request, obj, form, change):
+        # Logged and summarised like an API write; the changeform view
+        # already runs in a transaction, so the old row stays locked.
+        old = InventoryItem.objects.select_for_update().get(pk=obj.pk) if change else None
+        super().save_model(request, obj, form, change)
+        if old is None:
+            record_changes(creation_entries(obj, request.user))
+            record_stock_changes([(None, item_state(obj))])
+            return
+        record_changes(update_entries(obj, request.user, old.quantity, old.price))
+        record_stock_changes([(item_state(old), item_state(obj))])
+        if old.user_id != obj.user_id:
+            cache.bump_items(old.user_id)
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        record_stock_changes([(item_state(obj), None)])
+
+    def delete_queryset(self, request, queryset):
+        # Unlike the change and delete views, actions don't run in a transaction.
+        with transaction.atomic(using=queryset.db):
+            states = [item_state(item) for item in queryset.select_for_update()]
+            super().delete_queryset(request, queryset)
+            record_stock_changes([(state, None) for state in states])
+
+    def get_search_results(self, request, queryset, search_term):
+        # Answered from the full-text index, like the API's ?search=.
+        words = search_words([search_term])
+        vendor = connections[queryset.db].vendor
+        if not words or vendor not in ("sqlite", "postgresql"):
+            return super().get_search_results(request, queryset, search_term)
+        return queryset.filter(id__in=matching_item_ids(words, vendor)), False
+
+    @admin.action(description="Export selected items as CSV")
+    def export_csv(self, request, queryset):
+        return export_response(queryset.order_by("id"), ITEM_EXPORT_COLUMNS, "csv", "items")
+
+
+@admin.register(Location)
+class LocationAdmin(admin.ModelAdmin):
+    list_display = ["name", "user"]
+    list_select_related = ["user"]
+    autocomplete_fields = ["user"]
+    search_fields = ["name"]
+
+
+@admin.register(StockLevel)
+class StockLevelAdmin(ReadOnlyAdmin):
+    # Written by transfers, which also keep the items' allocated totals.
+    list_display = ["item", "location", "quantity"]
+    list_select_related = ["item", "location"]
+    raw_id_fields = ["item", "location"]
+
+
+@admin.register(InventoryChangeLog)
+class InventoryChangeLogAdmin(ReadOnlyAdmin):
+    list_display = ["timestamp", "item", "user", "field_changed", "change_type", "location", "old_value", "new_value"]
+    list_select_related = ["item", "user", "location"]
+    list_filter = ["field_changed", "change_type"]
+    date_hierarchy = "timestamp"
+    ordering = ["-timestamp"]
+    raw_id_fields = ["item", "user", "location"]
+    search_fields = ["item__name"]
+    search_help_text = "Item name words (prefix match)."
+    actions = ["export_csv"]
+
+    def get_search_results(self, request, queryset, search_term):
+        words = search_words([search_term])
+        vendor = connections[queryset.db].vendor
+        if not words or vendor not in ("sqlite", "postgresql"):
+            return super().get_search_results(request, queryset, search_term)
+        return queryset.filter(item__in=matching_item_ids(words, vendor)), False
+
+    @admin.action(description="Export selected change logs as CSV")
+    def export_csv(self, request, queryset):
+        return export_response(queryset.order_by("-timestamp", "-id"), CHANGE_EXPORT_COLUMNS, "csv", "changes")
+
+
+@admin.register(InventoryChangeRollup)
+class InventoryChangeRollupAdmin(ReadOnlyAdmin):
+    list_display = ["day", "item", "quantity_delta", "quantity_events", "price_events", "close_price"]
+    list_select_related = ["item"]
+    date_hierarchy = "day"
+    ordering = ["-day"]
+    raw_id_fields = ["item"]
+
+
+@admin.register(InventorySnapshot)
+class InventorySnapshotAdmin(ReadOnlyAdmin):
+    list_display = ["taken_at", "item", "quantity", "price"]
+    list_select_related = ["item"]
+    raw_id_fields = ["item"]
+
 
-admin.site.register(Category)
-admin.site.register(InventoryItem)
-admin.site.register(InventoryChangeLog)
\ No newline at end of file
+@admin.register(InventoryItemTombstone)
+class InventoryItemTombstoneAdmin(ReadOnlyAdmin):
+    list_display = ["deleted_at", "item_id", "user"]
+    list_select_related = ["user"]
+    date_hierarchy = "deleted_at"
+    ordering = ["-deleted_at"]
+    raw_id_fields = ["user"]
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class InventoryConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'inventory'
+
+    def ready(self):
+        from django.db.models.signals import post_migrate
+        from . import checks, signals  # noqa: F401 (registers the system checks)
+
+        post_migrate.connect(signals.restore_search_triggers, sender=self)
@@ -0,0 +1,192 @@
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache as default_cache
+from django.core.exceptions import ObjectDoesNotExist, ValidationError as DjangoValidationError
+from django.http import Http404, HttpResponse
+from django.utils.decorators import classonlymethod
+from django.utils.http import quote_etag
+from django.views import View
+from rest_framework import exceptions
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.views import exception_handler
+
+from accounts.authentication import CachedJWTAuthentication
+from accounts.throttling import acheck_throttles
+from . import cache, replicas
+from .fastpath import ValuesRepresentation
+from .pagination import StitchedChangeLogPagination
+from .serializers import InventoryChangeLogSerializer, InventoryChangeRollupSerializer
+from .views import CategoryViewSet, InventoryItemViewSet
+
+
+class AsyncReadView(View):
+    """
+    Async counterpart of one read action of a DRF viewset, for ASGI workers.
+    The viewset still supplies the (per-user) queryset, filters, serializer,
+    paginator, permissions, throttles and replica routing; authentication,
+    queries and the list cache are awaited instead, so a request waiting on
+    the database or a slow client doesn't hold a thread. Responses are JSON
+    only.
+    """
+    viewset_class = None
+    basename = None
+    action = None
+    detail = False
+    http_method_names = ["get", "head", "options"]
+    renderer = JSONRenderer()
+
+    @classonlymethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        # Request metrics label the view with the viewset action it mirrors.
+        view.actions = {"get": cls.action, "head": cls.action}
+        return view
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.authenticator = CachedJWTAuthentication()
+        self.request = Request(request)
+        try:
+            result = await self.authenticator.aauthenticate(request)
+            self.request.user, self.request.auth = result or (AnonymousUser(), None)
+            self.viewset = self.viewset_class(
+                request=self.request, args=args, kwargs=kwargs, format_kwarg=None,
+                action=self.action, detail=self.detail, basename=self.basename,
+            )
+            self.check_permissions()
+            await acheck_throttles(self.viewset, self.request)
+            token = replicas.read_from(await replicas.achoose_replica(self.request))
+            try:
+                response = await super().dispatch(request, *args, **kwargs)
+            finally:
+                replicas.reset(token)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+        return self.finalize_response(response)
+
+    def check_permissions(self):
+        for permission in self.viewset.get_permissions():
+            if not permission.has_permission(self.request, self.viewset):
+                if not self.request.user.is_authenticated:
+                    raise exceptions.NotAuthenticated()
+                raise exceptions.PermissionDenied(getattr(permission, "message", None))
+
+    def handle_exception(self, exc):
+        if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+            exc.auth_header = self.authenticator.authenticate_header(self.request)
+        context = {"view": self, "args": self.args, "kwargs": self.kwargs, "request": self.request}
+        response = exception_handler(exc, context)
+        if response is None:
+            raise exc
+        response.exception = True
+        return response
+
+    def finalize_response(self, response):
+        # Rendered here: Django would render a TemplateResponse on a thread.
+        if not isinstance(response, Response):
+            return response
+        content = self.renderer.render(response.data) if response.data is not None else b""
+        rendered = HttpResponse(content, status=response.status_code, content_type=self.renderer.media_type)
+        for header, value in response.items():
+            if header.lower() != "content-type":
+                rendered[header] = value
+        return rendered
+
+    async def filter_queryset(self, queryset):
+        # django-filter validates choice filters (e.g. ?category=) with a query.
+        return await sync_to_async(self.viewset.filter_queryset)(queryset)
+
+    async def get_object(self):
+        """
+        GenericAPIView.get_object() on the async ORM (list filters don't apply).
+        """
+        viewset = self.viewset
+        lookup = viewset.kwargs[viewset.lookup_url_kwarg or viewset.lookup_field]
+        try:
+            obj = await viewset.get_queryset().aget(**{viewset.lookup_field: lookup})
+        except (ObjectDoesNotExist, TypeError, ValueError, DjangoValidationError):
+            raise Http404(f"No {viewset.get_queryset().model._meta.object_name} matches the given query.")
+        viewset.check_object_permissions(self.request, obj)
+        return obj
+
+    async def paginated_rows(self, queryset):
+        """
+        A page of `queryset` rendered from values() rows (see fastpath).
+        """
+        rows = ValuesRepresentation(self.viewset.get_serializer())
+        paginator = self.viewset.paginator
+        page = await paginator.apaginate_queryset(rows.restrict(queryset), self.request, view=self.viewset)
+        return paginator.get_paginated_response(rows.serialize(page))
+
+    async def cached_list(self):
+        """
+        CachedListMixin.list() for the viewset, awaiting the cache and queries.
+        """
+        viewset = self.viewset
+        scopes = viewset.cache_scopes()
+        versions = await cache.aget_versions(scopes)
+        key, digest = cache.list_key(viewset.basename, scopes, versions, self.request)
+
+        entry = await default_cache.aget(key)
+        if entry is None:
+            queryset = await self.filter_queryset(viewset.get_queryset())
+            response = await self.paginated_rows(queryset)
+            entry = cache.list_entry(digest, response.data, versions)
+            await default_cache.aset(key, entry, cache.list_timeout())
+        return cache.list_response(self.request, entry)
+
+
+class ItemListView(AsyncReadView):
+    viewset_class = InventoryItemViewSet
+    basename = "item"
+    action = "list"
+
+    async def get(self, request):
+        return await self.cached_list()
+
+
+class ItemDetailView(AsyncReadView):
+    viewset_class = InventoryItemViewSet
+    basename = "item"
+    action = "retrieve"
+    detail = True
+
+    async def get(self, request, pk):
+        item = await self.get_object()
+        response = Response(self.viewset.get_serializer(item).data)
+        response["ETag"] = quote_etag(str(item.version))
+        return response
+
+
+class ItemLowStockView(AsyncReadView):
+    viewset_class = InventoryItemViewSet
+    basename = "item"
+    action = "low_stock"
+
+    async def get(self, request):
+        return await self.paginated_rows(self.viewset.low_stock_queryset())
+
+
+class ItemHistoryView(AsyncReadView):
+    viewset_class = InventoryItemViewSet
+    basename = "item"
+    action = "history"
+    detail = True
+
+    async def get(self, request, pk):
+        item = await self.get_object()
+        return await StitchedChangeLogPagination().apaginate(
+            self.request, item.changes.select_related("user"), item.rollups.all(),
+            lambda page: InventoryChangeLogSerializer(page, many=True).data,
+            lambda page: InventoryChangeRollupSerializer(page, many=True).data,
+        )
+
+
+class CategoryListView(AsyncReadView):
+    viewset_class = CategoryViewSet
+    basename = "category"
+    action = "list"
+
+    async def get(self, request):
+        return await self.cached_list()
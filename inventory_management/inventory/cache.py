@@ -0,0 +1,131 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+from . import replicas
+
+LIST_CACHE_TIMEOUT = getattr(settings, "INVENTORY_LIST_CACHE_TIMEOUT", 300)
+
+# Version scopes. Cached list entries are keyed by the versions of every scope
+# they depend on, so bumping a scope invalidates them without deleting keys.
+CATEGORIES = "categories"
+ITEMS = "items"  # everything item lists render, e.g. category names
+ALL_ITEMS = "items:all"  # the staff view of every user's items
+
+
+def user_items_scope(user_id):
+    return f"items:user:{user_id}"
+
+
+def _version_key(scope):
+    return f"inventory:version:{scope}"
+
+
+def get_versions(scopes):
+    """
+    Current version of each scope; a version is the time_ns() of its last bump.
+    """
+    keys = [_version_key(scope) for scope in scopes]
+    found = cache.get_many(keys)
+    missing = {key: time.time_ns() for key in keys if key not in found}
+    if missing:
+        # A lost version (eviction, restart) must still invalidate old entries,
+        # so it is recreated as "now".
+        for key, version in missing.items():
+            cache.add(key, version, None)
+        found.update(cache.get_many(list(missing)))
+    return [found.get(key, 0) for key in keys]
+
+
+async def aget_versions(scopes):
+    """
+    get_versions() for async views.
+    """
+    keys = [_version_key(scope) for scope in scopes]
+    found = await cache.aget_many(keys)
+    missing = {key: time.time_ns() for key in keys if key not in found}
+    if missing:
+        for key, version in missing.items():
+            await cache.aadd(key, version, None)
+        found.update(await cache.aget_many(list(missing)))
+    return [found.get(key, 0) for key in keys]
+
+
+def bump(*scopes):
+    now = time.time_ns()
+    cache.set_many({_version_key(scope): now for scope in scopes}, None)
+
+
+def bump_items(*user_ids):
+    bump(ALL_ITEMS, *(user_items_scope(user_id) for user_id in set(user_ids)))
+
+
+def list_key(basename, scopes, versions, request):
+    """
+    Cache key of a list response and its digest, which doubles as the ETag.
+    Lists read from a replica are kept apart: they may predate the versions
+    they are keyed by, and a user pinned to the primary must not get them.
+    """
+    source = "replica" if replicas.current_alias() else "primary"
+    digest = hashlib.md5(repr((scopes, versions, request.get_full_path(), source)).encode()).hexdigest()
+    return f"inventory:list:{basename}:{digest}", digest
+
+
+def list_timeout():
+    """
+    Lists from a replica are only trusted for the replica sticky window.
+    """
+    if replicas.current_alias():
+        return min(LIST_CACHE_TIMEOUT, replicas.sticky_seconds())
+    return LIST_CACHE_TIMEOUT
+
+
+def list_entry(digest, data, versions):
+    # Every write bumps a scope to time_ns(), so the newest version is when
+    # the list's data last changed; no MAX(last_updated) scan needed.
+    modified = max(versions) / 1e9
+    return {"data": data, "etag": quote_etag(digest), "last_modified": int(modified)}
+
+
+def list_response(request, entry):
+    """
+    A 304 if the client's validators match the cached entry, else its data.
+    """
+    response = get_conditional_response(
+        request, etag=entry["etag"], last_modified=entry["last_modified"]
+    ) or Response(entry["data"])
+    response["ETag"] = entry["etag"]
+    response["Last-Modified"] = http_date(entry["last_modified"])
+    response["Cache-Control"] = "private, no-cache"
+    patch_vary_headers(response, ("Authorization",))
+    return response
+
+
+class CachedListMixin:
+    """
+    Serve `list` from the cache, with ETag / Last-Modified validators so
+    polling clients get a 304 without the list being re-serialized.
+    Views define cache_scopes().
+    """
+
+    def cache_scopes(self):
+        raise NotImplementedError
+
+    def list(self, request, *args, **kwargs):
+        scopes = self.cache_scopes()
+        versions = get_versions(scopes)
+        key, digest = list_key(self.basename, scopes, versions, request)
+
+        entry = cache.get(key)
+        if entry is None:
+            response = super().list(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            entry = list_entry(digest, response.data, versions)
+            cache.set(key, entry, list_timeout())
+        return list_response(request, entry)
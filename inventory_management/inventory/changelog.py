@@ -0,0 +1,260 @@
+import atexit
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import DataError, IntegrityError, close_old_connections, transaction
+
+from .models import InventoryChangeLog, InventoryItem
+
+logger = logging.getLogger(__name__)
+
+
+def _entry(item, user, field, change_type, old_value, new_value, quantity_diff=None, location=None):
+    return InventoryChangeLog(
+        item=item,
+        user=user,
+        field_changed=field,
+        change_type=change_type,
+        old_value=old_value,
+        new_value=new_value,
+        quantity_changed=quantity_diff,
+        location=location,
+    )
+
+
+def creation_entries(item, user):
+    """
+    Log entries for a newly created item (restock + price initialization).
+    """
+    entries = []
+    if item.quantity > 0:
+        entries.append(_entry(item, user, "quantity", "restock", 0, item.quantity, item.quantity))
+    if item.price > 0:
+        entries.append(_entry(item, user, "price", "increase", 0, item.price))
+    return entries
+
+
+def update_entries(item, user, old_quantity, old_price):
+    """
+    Log entries for the quantity/price differences of an updated item.
+    """
+    entries = []
+    if item.quantity != old_quantity:
+        diff = item.quantity - old_quantity
+        change_type = "restock" if diff > 0 else "sale"
+        entries.append(_entry(item, user, "quantity", change_type, old_quantity, item.quantity, diff))
+    if item.price != old_price:
+        diff = item.price - old_price
+        change_type = "increase" if diff > 0 else "decrease"
+        entries.append(_entry(item, user, "price", change_type, old_price, item.price))
+    return entries
+
+
+def deletion_entries(item, user):
+    """
+    Log entries recorded right before an item is deleted.
+    """
+    entries = []
+    if item.quantity > 0:
+        entries.append(_entry(item, user, "quantity", "delete", item.quantity, 0, -item.quantity))
+    if item.price > 0:
+        entries.append(_entry(item, user, "price", "delete", item.price, 0))
+    return entries
+
+
+def transfer_entries(item, user, quantity, source, target):
+    """
+    Log entries for both sides of moving `quantity` of `item`. `source` and
+    `target` are (location or None for unassigned stock, old stock there).
+    """
+    (from_location, from_old), (to_location, to_old) = source, target
+    return [
+        _entry(item, user, "stock", "transfer_out", from_old, from_old - quantity, -quantity, from_location),
+        _entry(item, user, "stock", "transfer_in", to_old, to_old + quantity, quantity, to_location),
+    ]
+
+
+def record_changes(entries):
+    """
+    Persist log entries with a single batched INSERT, or hand them to the
+    change-log buffer once the surrounding transaction commits.
+    """
+    if not entries:
+        return
+    buffer = get_buffer()
+    if buffer is None:
+        InventoryChangeLog.objects.bulk_create(entries)
+    else:
+        transaction.on_commit(lambda: buffer.add(entries))
+
+
+class ChangeLogBuffer:
+    """
+    In-process queue of committed change-log rows, written with one bulk
+    INSERT every `max_entries` rows or `flush_interval` seconds, and at exit.
+    Rows only enter the buffer after their transaction commits, so rolled
+    back changes are never logged. Beyond `max_queue` queued rows (e.g.
+    while the database is unreachable) new rows are written synchronously.
+    """
+
+    def __init__(self, max_entries=500, flush_interval=0.2, max_queue=50_000):
+        self.max_entries = max_entries
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self._entries = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._worker = None
+        self._stopped = False
+        self._stats = {
+            "flushes": 0,
+            "entries_written": 0,
+            "entries_dropped": 0,
+            "entries_failed": 0,
+            "sync_writes": 0,
+            "flush_errors": 0,
+            "last_batch_size": 0,
+            "last_flush_ms": 0.0,
+            "max_flush_ms": 0.0,
+        }
+
+    def add(self, entries):
+        with self._lock:
+            overflow = len(self._entries) + len(entries) > self.max_queue
+            if not overflow:
+                self._entries.extend(entries)
+            full = len(self._entries) >= self.max_entries
+        if overflow:
+            self._write_now(entries)
+            return
+        self._ensure_worker()
+        if full:
+            self._wake.set()
+
+    def flush(self):
+        """
+        Write everything queued so far; returns the number of rows written.
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch, self._entries = self._entries, []
+            if not batch:
+                return 0
+            started = time.perf_counter()
+            try:
+                # Deleted items take their logs with them (CASCADE), so rows
+                # for items removed since they were queued are dropped.
+                live = set(
+                    InventoryItem.objects.filter(pk__in={e.item_id for e in batch}).values_list("pk", flat=True)
+                )
+                rows = [entry for entry in batch if entry.item_id in live]
+                written = self._write(rows)
+            except Exception:
+                with self._lock:
+                    self._entries[:0] = batch
+                self._stats["flush_errors"] += 1
+                logger.exception("Change-log flush of %d rows failed; will retry", len(batch))
+                return 0
+            elapsed = (time.perf_counter() - started) * 1000
+            self._stats["flushes"] += 1
+            self._stats["entries_written"] += written
+            self._stats["entries_dropped"] += len(batch) - len(rows)
+            self._stats["last_batch_size"] = written
+            self._stats["last_flush_ms"] = round(elapsed, 3)
+            self._stats["max_flush_ms"] = max(self._stats["max_flush_ms"], round(elapsed, 3))
+            return written
+
+    def _write(self, rows):
+        """
+        Insert `rows`; returns how many were written. Rows the database
+        rejects (constraint/data errors) are found by halving the batch and
+        dropped with an error log, so they can't block the rest. Other
+        errors (e.g. a lost connection) propagate and the batch is retried.
+        """
+        if not rows:
+            return 0
+        try:
+            with transaction.atomic():
+                InventoryChangeLog.objects.bulk_create(rows, batch_size=self.max_entries)
+            return len(rows)
+        except (IntegrityError, DataError):
+            if len(rows) == 1:
+                self._stats["entries_failed"] += 1
+                row = rows[0]
+                logger.exception(
+                    "Dropping change-log row the database rejected: item %s, %s %s -> %s",
+                    row.item_id, row.field_changed, row.old_value, row.new_value,
+                )
+                return 0
+        middle = len(rows) // 2
+        return self._write(rows[:middle]) + self._write(rows[middle:])
+
+    def _write_now(self, entries):
+        """
+        Write on the caller's thread when the queue is full.
+        """
+        logger.warning(
+            "Change-log queue is full (%d rows); writing %d rows synchronously", self.max_queue, len(entries)
+        )
+        self._stats["sync_writes"] += 1
+        try:
+            self._stats["entries_written"] += self._write(entries)
+        except Exception:
+            self._stats["entries_failed"] += len(entries)
+            logger.exception("Synchronous change-log write of %d rows failed; dropping them", len(entries))
+
+    def stats(self):
+        with self._lock:
+            depth = len(self._entries)
+        return {"queue_depth": depth, **self._stats}
+
+    def stop(self):
+        self._stopped = True
+        self._wake.set()
+        if self._worker is not None:
+            self._worker.join(timeout=5)
+        self.flush()
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="changelog-buffer", daemon=True)
+                self._worker.start()
+
+    def _run(self):
+        while not self._stopped:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            close_old_connections()
+            self.flush()
+        close_old_connections()
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_buffer():
+    """
+    The process-wide ChangeLogBuffer, or None when buffering is disabled
+    (settings.INVENTORY_CHANGELOG_BUFFER["ENABLED"]).
+    """
+    global _buffer
+    config = getattr(settings, "INVENTORY_CHANGELOG_BUFFER", {})
+    if not config.get("ENABLED"):
+        return None
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                _buffer = ChangeLogBuffer(
+                    max_entries=config.get("MAX_ENTRIES", 500),
+                    flush_interval=config.get("FLUSH_INTERVAL_MS", 200) / 1000,
+                    max_queue=config.get("MAX_QUEUE", 50_000),
+                )
+                atexit.register(_buffer.stop)
+    return _buffer
@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+# Backends whose entries only the current process can see.
+PROCESS_LOCAL_CACHES = {
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+}
+
+
+# A deployment check (`check --deploy`): the test runner turns DEBUG off.
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    List-cache invalidation, replica read-your-writes pins and shared
+    throttle buckets only hold across workers when they share a cache.
+    """
+    backend = settings.CACHES.get("default", {}).get("BACKEND")
+    if settings.DEBUG or getattr(settings, "CACHE_ALLOW_LOCAL", False) or backend not in PROCESS_LOCAL_CACHES:
+        return []
+    return [Warning(
+        f"The default cache ({backend}) is local to each process: with several workers, list caches, "
+        "replica pins and throttle buckets are per worker.",
+        hint="Set REDIS_URL (or CACHE_BACKEND/CACHE_LOCATION) to a shared cache such as Redis or Memcached, "
+             "or CACHE_ALLOW_LOCAL=True for a deployment that really runs a single process.",
+        id="inventory.W001",
+    )]
@@ -0,0 +1,102 @@
+import csv
+import json
+from datetime import datetime
+from decimal import Decimal
+
+from django.http import StreamingHttpResponse
+
+# (output column, queryset lookup) pairs; lookups are read with values_list()
+# so no model instances or related objects are built while exporting.
+ITEM_EXPORT_COLUMNS = [
+    ("id", "id"),
+    ("name", "name"),
+    ("sku", "sku"),
+    ("description", "description"),
+    ("quantity", "quantity"),
+    ("price", "price"),
+    ("user_name", "user__username"),
+    ("category", "category_id"),
+    ("category_name", "category__name"),
+    ("date_added", "date_added"),
+    ("last_updated", "last_updated"),
+]
+
+CHANGE_EXPORT_COLUMNS = [
+    ("id", "id"),
+    ("item", "item_id"),
+    ("item_name", "item__name"),
+    ("user", "user_id"),
+    ("user_name", "user__username"),
+    ("user_email", "user__email"),
+    ("field_changed", "field_changed"),
+    ("change_type", "change_type"),
+    ("old_value", "old_value"),
+    ("new_value", "new_value"),
+    ("quantity_changed", "quantity_changed"),
+    ("location", "location_id"),
+    ("timestamp", "timestamp"),
+]
+
+CONTENT_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson; charset=utf-8",
+}
+
+CHUNK_SIZE = 2000
+
+
+class _Echo:
+    """File-like object whose write() just returns the line, for csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def _rows(queryset, columns):
+    # iterator() uses a server-side cursor where the database supports it.
+    return queryset.values_list(*[lookup for _, lookup in columns]).iterator(chunk_size=CHUNK_SIZE)
+
+
+def _chunked(lines):
+    buffer = []
+    for line in lines:
+        buffer.append(line)
+        if len(buffer) >= CHUNK_SIZE:
+            yield "".join(buffer)
+            buffer = []
+    if buffer:
+        yield "".join(buffer)
+
+
+def plain_value(value):
+    # Same text forms as the API serializers use for these types.
+    if isinstance(value, datetime):
+        value = value.isoformat()
+        return value[:-6] + "Z" if value.endswith("+00:00") else value
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def _csv_lines(queryset, columns):
+    writer = csv.writer(_Echo())
+    yield writer.writerow([name for name, _ in columns])
+    for row in _rows(queryset, columns):
+        yield writer.writerow([plain_value(value) for value in row])
+
+
+def _ndjson_lines(queryset, columns):
+    names = [name for name, _ in columns]
+    for row in _rows(queryset, columns):
+        yield json.dumps({name: plain_value(value) for name, value in zip(names, row)}) + "\n"
+
+
+def export_response(queryset, columns, fmt, filename):
+    """
+    Stream `queryset` as CSV or NDJSON without materializing it.
+    """
+    lines = _ndjson_lines(queryset, columns) if fmt == "ndjson" else _csv_lines(queryset, columns)
+    response = StreamingHttpResponse(_chunked(lines), content_type=CONTENT_TYPES.get(fmt, CONTENT_TYPES["csv"]))
+    extension = "ndjson" if fmt == "ndjson" else "csv"
+    response["Content-Disposition"] = f'attachment; filename="{filename}.{extension}"'
+    return response
@@ -0,0 +1,110 @@
+from rest_framework import serializers
+from rest_framework.relations import PrimaryKeyRelatedField
+from rest_framework.response import Response
+
+# Fields whose to_representation() returns the database value unchanged.
+PASSTHROUGH_FIELDS = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.ChoiceField,
+    serializers.IntegerField,
+    PrimaryKeyRelatedField,
+)
+
+
+def requested_fields(request):
+    """
+    The field names asked for with ?fields=a,b,c on a read request, else None.
+    """
+    if request is None or request.method not in ("GET", "HEAD"):
+        return None
+    raw = request.query_params.get("fields")
+    if not raw:
+        return None
+    return {name.strip() for name in raw.split(",") if name.strip()}
+
+
+class SparseFieldsMixin:
+    """
+    ModelSerializer mixin: ?fields=id,name,quantity limits the output to
+    those fields (read requests only).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        requested = requested_fields(self.context.get("request"))
+        if requested is None:
+            return
+        unknown = requested - set(self.fields)
+        if unknown:
+            raise serializers.ValidationError({
+                "fields": [f"Unknown field(s): {', '.join(sorted(unknown))}. Choose from: {', '.join(self.fields)}."]
+            })
+        for name in set(self.fields) - requested:
+            self.fields.pop(name)
+
+
+class ValuesRepresentation:
+    """
+    Renders values() rows exactly as `serializer` renders model instances,
+    without building instances or walking DRF's per-field machinery: plain
+    columns are copied as-is and only decimals/dates go through their field.
+    Supports fields with a (dotted) model source; dotted sources through a
+    NULL relation are omitted like DRF omits them.
+    """
+
+    def __init__(self, serializer, extra_columns=()):
+        self.columns = []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if field.source == "*" or isinstance(field, serializers.SerializerMethodField):
+                raise ValueError(f"{type(serializer).__name__}.{name} can't be read from values()")
+            convert = None if isinstance(field, PASSTHROUGH_FIELDS) else field.to_representation
+            self.columns.append((name, "__".join(field.source_attrs), convert, len(field.source_attrs) > 1))
+        lookups = [lookup for _, lookup, _, _ in self.columns]
+        self.lookups = lookups + [column for column in extra_columns if column not in lookups]
+
+    def restrict(self, queryset):
+        """
+        Select only the columns the serializer renders (plus extra_columns).
+        """
+        return queryset.values(*self.lookups)
+
+    def serialize(self, rows):
+        data = []
+        for row in rows:
+            out = {}
+            for name, lookup, convert, nested in self.columns:
+                value = row[lookup]
+                if value is None:
+                    if nested:
+                        continue
+                    out[name] = None
+                else:
+                    out[name] = value if convert is None else convert(value)
+            data.append(out)
+        return data
+
+
+class FastListMixin:
+    """
+    Viewset mixin: `list` reads only the serializer's columns with values()
+    and renders them through ValuesRepresentation. ?fields= narrows both.
+    """
+
+    def values_representation(self):
+        ordering = getattr(self.paginator, "ordering", None) or ()
+        if isinstance(ordering, str):
+            ordering = (ordering,)
+        # Cursor pagination reads its position from the row.
+        extra = [field.lstrip("-") for field in ordering]
+        return ValuesRepresentation(self.get_serializer(), extra_columns=extra)
+
+    def list(self, request, *args, **kwargs):
+        rows = self.values_representation()
+        queryset = rows.restrict(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(rows.serialize(page))
+        return Response(rows.serialize(queryset))
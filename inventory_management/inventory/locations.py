@@ -0,0 +1,134 @@
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import filters
+from rest_framework.exceptions import ValidationError
+
+from . import cache
+from .changelog import record_changes, transfer_entries
+from .models import InventoryItem, Location, StockLevel
+
+
+class LocationFilter(filters.BaseFilterBackend):
+    """
+    ?location=<id>: items with stock at that location, found through
+    stock_location_item_idx rather than by scanning the user's items.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        raw = request.query_params.get("location")
+        if raw in (None, ""):
+            return queryset
+        try:
+            location = int(raw)
+        except ValueError:
+            raise ValidationError({"location": ["A valid integer is required."]})
+        # One filter() call, so both conditions apply to the same stock row.
+        return queryset.filter(stock_levels__location=location, stock_levels__quantity__gt=0)
+
+
+class TransferConflict(Exception):
+    """
+    A concurrent write (e.g. the location being deleted) broke a transfer.
+    """
+
+
+def transfer_stock(items, lines, user):
+    """
+    Apply transfer lines ({item, from_location, to_location, quantity};
+    a None location is the item's unassigned stock) in one transaction,
+    one after another. `items` is the queryset of items the user may move.
+
+    Returns (levels, items, errors): the stock levels touched, the items
+    whose allocated total changed, and per-line errors, in which case
+    nothing was written. The number of queries doesn't depend on the
+    number of lines.
+    """
+    location_ids = {line[side] for line in lines for side in ("from_location", "to_location")} - {None}
+    try:
+        with transaction.atomic():
+            # Locked in id order, so concurrent transfers can't deadlock.
+            locked = items.select_for_update(of=("self",)).order_by("pk").in_bulk({line["item"] for line in lines})
+            locations = Location.objects.in_bulk(location_ids)
+            levels = {
+                (level.item_id, level.location_id): level
+                for level in StockLevel.objects.select_for_update().filter(
+                    item__in=list(locked), location__in=list(locations)
+                )
+            }
+            allocated = {pk: item.allocated for pk, item in locked.items()}
+            touched, entries, errors = _apply(locked, locations, levels, lines, user)
+            if errors:
+                return [], [], errors
+            changed = [item for pk, item in locked.items() if item.allocated != allocated[pk]]
+            _save(touched, changed, entries)
+    except IntegrityError:
+        raise TransferConflict()
+    cache.bump_items(*{item.user_id for item in locked.values()})
+    return list(touched.values()), changed, []
+
+
+def _apply(items, locations, levels, lines, user):
+    touched, entries, errors = {}, [], []
+    for index, line in enumerate(lines):
+        item = items.get(line["item"])
+        if item is None:
+            errors.append({"index": index, "errors": {"item": ["Not found."]}})
+            continue
+        sides, problems = [], {}
+        for side in ("from_location", "to_location"):
+            location = locations.get(line[side]) if line[side] is not None else None
+            if line[side] is not None and (location is None or location.user_id != item.user_id):
+                problems[side] = ["Not found."]
+            sides.append(location)
+        if problems:
+            errors.append({"index": index, "errors": problems})
+            continue
+
+        source, target = sides
+        quantity = line["quantity"]
+        available = _stock(item, source, levels)
+        if quantity > available:
+            errors.append({"index": index, "errors": {"quantity": [f"Only {available} available."]}})
+            continue
+        entries.extend(transfer_entries(
+            item, user, quantity, (source, available), (target, _stock(item, target, levels))
+        ))
+        _move(item, source, -quantity, levels, touched)
+        _move(item, target, quantity, levels, touched)
+    return touched, entries, errors
+
+
+def _stock(item, location, levels):
+    if location is None:
+        return item.quantity - item.allocated
+    level = levels.get((item.pk, location.pk))
+    return level.quantity if level else 0
+
+
+def _move(item, location, quantity, levels, touched):
+    """
+    Add `quantity` (possibly negative) to `item`'s stock at `location`.
+    Unassigned stock isn't stored; it is what allocated leaves of quantity.
+    """
+    if location is None:
+        return
+    key = (item.pk, location.pk)
+    level = levels.get(key) or StockLevel(item=item, location=location, quantity=0)
+    level.item, level.location = item, location
+    level.quantity += quantity
+    item.allocated += quantity
+    levels[key] = touched[key] = level
+
+
+def _save(levels, items, entries):
+    existing = [level for level in levels.values() if level.pk is not None]
+    StockLevel.objects.bulk_create([level for level in levels.values() if level.pk is None])
+    if existing:
+        StockLevel.objects.bulk_update(existing, ["quantity"])
+    now = timezone.now()
+    for item in items:
+        item.version += 1
+        item.last_updated = now
+    if items:
+        InventoryItem.objects.bulk_update(items, ["allocated", "version", "last_updated"])
+    record_changes(entries)
@@ -0,0 +1,121 @@
+import json
+import statistics
+import time
+
+import django
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIClient
+
+from inventory.models import Category, InventoryChangeLog, InventoryItem
+
+ENDPOINTS = {
+    "items": "/api/inventory/items/",
+    "low_stock": "/api/inventory/items/low_stock/",
+    "history": "/api/inventory/items/{item}/history/",
+    "audit": "/api/inventory/items/audit/",
+    "changes": "/api/inventory/changes/",
+    "categories": "/api/inventory/categories/",
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the main read endpoints in-process with the test client and print "
+        "p50/p95/p99 latency, throughput and query counts per endpoint as JSON. "
+        "Run seed_inventory first for a reproducible dataset."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--username", default="loadtest-user-0", help="User the requests are made as.")
+        parser.add_argument("--requests", type=int, default=200, help="Timed requests per endpoint.")
+        parser.add_argument("--warmup", type=int, default=10, help="Untimed requests per endpoint first.")
+        parser.add_argument("--endpoints", nargs="*", choices=sorted(ENDPOINTS), default=list(ENDPOINTS))
+        parser.add_argument(
+            "--warm-cache",
+            action="store_true",
+            help="Keep the list cache between requests (default: clear it so views and serializers run every time).",
+        )
+        parser.add_argument("--output", help="Also write the JSON report to this file.")
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options["username"])
+        except User.DoesNotExist:
+            raise CommandError(f"No user {options['username']!r}; run seed_inventory first.")
+        item = InventoryItem.objects.filter(user=user).order_by("id").first()
+        if item is None and "history" in options["endpoints"]:
+            raise CommandError(f"{user.username} has no items to fetch history for.")
+
+        client = APIClient()
+        client.force_authenticate(user)
+
+        report = {
+            "database": connection.vendor,
+            "django": django.get_version(),
+            "user": user.username,
+            "staff": user.is_staff,
+            "dataset": {
+                "items": InventoryItem.objects.count(),
+                "user_items": InventoryItem.objects.filter(user=user).count(),
+                "change_logs": InventoryChangeLog.objects.count(),
+                "categories": Category.objects.count(),
+            },
+            "endpoints": {},
+        }
+        # Let the test client's "testserver" host through ALLOWED_HOSTS.
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]):
+            for name in options["endpoints"]:
+                url = ENDPOINTS[name].format(item=item.pk if item else None)
+                report["endpoints"][name] = self._run(client, url, options)
+
+        output = json.dumps(report, indent=2)
+        self.stdout.write(output)
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                f.write(output + "\n")
+
+    def _run(self, client, url, options):
+        for _ in range(options["warmup"]):
+            self._get(client, url, options)
+
+        timings, queries, errors = [], [], 0
+        started = time.perf_counter()
+        for _ in range(options["requests"]):
+            elapsed, count, status_code = self._get(client, url, options)
+            timings.append(elapsed)
+            queries.append(count)
+            errors += status_code != 200
+        wall = time.perf_counter() - started
+
+        p50, p95, p99 = (self._percentile(timings, p) for p in (50, 95, 99))
+        return {
+            "url": url,
+            "requests": len(timings),
+            "errors": errors,
+            "p50_ms": p50,
+            "p95_ms": p95,
+            "p99_ms": p99,
+            "mean_ms": round(statistics.fmean(timings), 3),
+            "throughput_rps": round(len(timings) / wall, 1),
+            "queries_min": min(queries),
+            "queries_max": max(queries),
+        }
+
+    def _get(self, client, url, options):
+        if not options["warm_cache"]:
+            cache.clear()
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response = client.get(url)
+            elapsed = (time.perf_counter() - started) * 1000
+        return elapsed, len(captured.captured_queries), response.status_code
+
+    def _percentile(self, timings, percent):
+        if len(timings) == 1:
+            return round(timings[0], 3)
+        return round(statistics.quantiles(timings, n=100, method="inclusive")[percent - 1], 3)
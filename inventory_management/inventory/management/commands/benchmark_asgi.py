@@ -0,0 +1,220 @@
+import asyncio
+import io
+import json
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import django
+from django.contrib.auth.models import User
+from django.core.asgi import get_asgi_application
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+from django.db import connection
+from django.test.utils import setup_test_environment
+from rest_framework_simplejwt.tokens import AccessToken
+
+from inventory.models import InventoryItem
+
+ENDPOINTS = {
+    "items": "items/",
+    "item": "items/{item}/",
+    "low_stock": "items/low_stock/",
+    "history": "items/{item}/history/",
+    "categories": "categories/",
+}
+WSGI_PREFIX = "/api/inventory/"
+ASGI_PREFIX = "/api/inventory/async/"
+HOST = "testserver"
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare concurrent-request throughput of the sync views on the WSGI handler (a fixed pool of "
+        "worker threads) with the async views on the ASGI handler (one event loop). Both handlers run "
+        "in-process with JWT auth; --client-delay-ms makes every response take that long to deliver, "
+        "like a slow client. Run seed_inventory first for a reproducible dataset."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--username", default="loadtest-user-0", help="User the requests are made as.")
+        parser.add_argument("--requests", type=int, default=500, help="Timed requests per endpoint and handler.")
+        parser.add_argument("--concurrency", type=int, default=50, help="Clients sending requests at once.")
+        parser.add_argument("--wsgi-threads", type=int, default=8, help="WSGI worker threads (e.g. gunicorn --threads).")
+        parser.add_argument("--client-delay-ms", type=float, default=20, help="Time each response takes to send.")
+        parser.add_argument("--endpoints", nargs="*", choices=sorted(ENDPOINTS), default=list(ENDPOINTS))
+        parser.add_argument(
+            "--warm-cache",
+            action="store_true",
+            help="Repeat identical URLs so lists come from the list cache (default: a unique ?_= per request).",
+        )
+        parser.add_argument("--output", help="Also write the JSON report to this file.")
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options["username"])
+        except User.DoesNotExist:
+            raise CommandError(f"No user {options['username']!r}; run seed_inventory first.")
+        item = InventoryItem.objects.filter(user=user).order_by("id").first()
+        if item is None and {"item", "history"} & set(options["endpoints"]):
+            raise CommandError(f"{user.username} has no items to fetch.")
+
+        setup_test_environment()  # lets HOST through ALLOWED_HOSTS
+        self.authorization = f"Bearer {AccessToken.for_user(user)}".encode()
+        self.delay = options["client_delay_ms"] / 1000
+        wsgi, asgi = get_wsgi_application(), get_asgi_application()
+
+        report = {
+            "database": connection.vendor,
+            "django": django.get_version(),
+            "user": user.username,
+            "concurrency": options["concurrency"],
+            "wsgi_threads": options["wsgi_threads"],
+            "client_delay_ms": options["client_delay_ms"],
+            "endpoints": {},
+        }
+        for name in options["endpoints"]:
+            path = ENDPOINTS[name].format(item=item.pk if item else None)
+            cache.clear()
+            results = {
+                "wsgi": self._run_wsgi(wsgi, WSGI_PREFIX + path, options),
+                "asgi": self._run_asgi(asgi, ASGI_PREFIX + path, options),
+            }
+            results["throughput_ratio"] = round(
+                results["asgi"]["throughput_rps"] / results["wsgi"]["throughput_rps"], 2
+            )
+            report["endpoints"][name] = results
+
+        output = json.dumps(report, indent=2)
+        self.stdout.write(output)
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                f.write(output + "\n")
+
+    def _query_string(self, n, options):
+        return "" if options["warm_cache"] else f"_={n}"
+
+    def _run_wsgi(self, app, path, options):
+        slots = threading.BoundedSemaphore(options["concurrency"])
+        timings, statuses = [], []
+
+        def request(n, queued):
+            try:
+                statuses.append(self._wsgi_request(app, path, self._query_string(n, options)))
+                timings.append((time.perf_counter() - queued) * 1000)
+            finally:
+                slots.release()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["wsgi_threads"]) as pool:
+            for n in range(options["requests"]):
+                slots.acquire()
+                pool.submit(request, n, time.perf_counter())
+        return self._summary(path, timings, statuses, time.perf_counter() - started)
+
+    def _wsgi_request(self, app, path, query_string):
+        environ = {
+            "REQUEST_METHOD": "GET",
+            "SCRIPT_NAME": "",
+            "PATH_INFO": path,
+            "QUERY_STRING": query_string,
+            "SERVER_NAME": HOST,
+            "SERVER_PORT": "80",
+            "SERVER_PROTOCOL": "HTTP/1.1",
+            "HTTP_HOST": HOST,
+            "HTTP_AUTHORIZATION": self.authorization.decode(),
+            "wsgi.version": (1, 0),
+            "wsgi.url_scheme": "http",
+            "wsgi.input": io.BytesIO(),
+            "wsgi.errors": sys.stderr,
+            "wsgi.multithread": True,
+            "wsgi.multiprocess": False,
+            "wsgi.run_once": False,
+        }
+        status = []
+        body = app(environ, lambda line, headers, exc_info=None: status.append(int(line.split()[0])))
+        try:
+            for _chunk in body:
+                # A sync worker thread is busy until the client has the response.
+                time.sleep(self.delay)
+        finally:
+            body.close()
+        return status[0]
+
+    def _run_asgi(self, app, path, options):
+        return asyncio.run(self._arun_asgi(app, path, options))
+
+    async def _arun_asgi(self, app, path, options):
+        slots = asyncio.Semaphore(options["concurrency"])
+        timings, statuses = [], []
+
+        async def request(n):
+            async with slots:
+                queued = time.perf_counter()
+                statuses.append(await self._asgi_request(app, path, self._query_string(n, options)))
+                timings.append((time.perf_counter() - queued) * 1000)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(request(n) for n in range(options["requests"])))
+        return self._summary(path, timings, statuses, time.perf_counter() - started)
+
+    async def _asgi_request(self, app, path, query_string):
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "root_path": "",
+            "query_string": query_string.encode(),
+            "headers": [(b"host", HOST.encode()), (b"authorization", self.authorization)],
+            "client": ("127.0.0.1", 0),
+            "server": (HOST, 80),
+        }
+        finished = asyncio.Event()
+        received = False
+        status = None
+
+        async def receive():
+            nonlocal received
+            if not received:
+                received = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            await finished.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                # The event loop serves other requests while this client reads.
+                await asyncio.sleep(self.delay)
+                if not message.get("more_body"):
+                    finished.set()
+
+        await app(scope, receive, send)
+        finished.set()
+        return status
+
+    def _summary(self, path, timings, statuses, wall):
+        p50, p95, p99 = (self._percentile(timings, p) for p in (50, 95, 99))
+        return {
+            "url": path,
+            "requests": len(timings),
+            "errors": sum(status != 200 for status in statuses),
+            "p50_ms": p50,
+            "p95_ms": p95,
+            "p99_ms": p99,
+            "throughput_rps": round(len(timings) / wall, 1),
+        }
+
+    def _percentile(self, timings, percent):
+        if len(timings) == 1:
+            return round(timings[0], 3)
+        return round(statistics.quantiles(timings, n=100, method="inclusive")[percent - 1], 3)
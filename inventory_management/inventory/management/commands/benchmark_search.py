@@ -0,0 +1,104 @@
+import json
+import random
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+from django.test import RequestFactory
+from rest_framework.request import Request
+
+from inventory.models import Category, InventoryItem
+from inventory.search import ItemSearchFilter
+from inventory.summary import rebuild_summary
+from inventory.views import InventoryItemViewSet
+
+WORDS = [
+    "hammer", "drill", "screwdriver", "wrench", "pliers", "saw", "chisel", "level", "tape", "clamp",
+    "socket", "ratchet", "sander", "grinder", "router", "planer", "file", "mallet", "crowbar", "vise",
+    "bolt", "screw", "nail", "washer", "anchor", "hinge", "bracket", "hook", "chain", "rope",
+    "red", "blue", "steel", "brass", "cordless", "heavy", "compact", "pro", "mini", "xl",
+]
+CATEGORIES = ["Hand tools", "Power tools", "Fasteners", "Hardware", "Outdoor", "Electrical", "Plumbing", "Paint"]
+DEFAULT_TERMS = ["hammer", "dri", "steel bolt", "power", "cordless gri", "zzz"]
+PAGE_SIZE = 10
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark ?search= (full-text index) against the old icontains filter on a seeded item table. "
+        "Seeds into the configured database, so point DATABASE_URL at a scratch database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--items", type=int, default=1_000_000, help="Number of items to seed.")
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--repeat", type=int, default=5, help="Timed runs per term and method.")
+        parser.add_argument("--terms", nargs="*", default=DEFAULT_TERMS)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        user, _ = User.objects.get_or_create(username="search-benchmark")
+        self._seed(user, options)
+        items = InventoryItem.objects.filter(user=user).select_related("category")
+
+        results = []
+        for term in options["terms"]:
+            results.append({
+                "term": term,
+                "icontains": self._time(lambda: self._icontains(items, term), options["repeat"]),
+                "index": self._time(lambda: self._indexed(items, term), options["repeat"]),
+            })
+        self.stdout.write(json.dumps({"items": items.count(), "results": results}, indent=2))
+
+    def _seed(self, user, options):
+        existing = InventoryItem.objects.filter(user=user).count()
+        missing = options["items"] - existing
+        if missing <= 0:
+            return
+        rng = random.Random(options["seed"])
+        categories = [Category.objects.get_or_create(name=name)[0] for name in CATEGORIES]
+        self.stdout.write(f"Seeding {missing} items...")
+        started = time.perf_counter()
+        while missing > 0:
+            batch = min(missing, options["batch_size"])
+            InventoryItem.objects.bulk_create(
+                InventoryItem(
+                    user=user,
+                    name=" ".join(rng.sample(WORDS, 3)),
+                    quantity=rng.randint(0, 500),
+                    price=rng.randint(100, 100_000) / 100,
+                    category=rng.choice(categories),
+                )
+                for _ in range(batch)
+            )
+            missing -= batch
+        # bulk_create() skips the StockSummary bookkeeping.
+        with transaction.atomic():
+            rebuild_summary()
+        self.stdout.write(f"Seeded in {time.perf_counter() - started:.1f}s")
+
+    def _icontains(self, items, term):
+        # What filters.SearchFilter did before: every word icontains name or category name.
+        for word in term.split():
+            items = items.filter(Q(name__icontains=word) | Q(category__name__icontains=word))
+        return items.count(), list(items[:PAGE_SIZE])
+
+    def _indexed(self, items, term):
+        request = Request(RequestFactory().get("/", {"search": term}))
+        items = ItemSearchFilter().filter_queryset(request, items, InventoryItemViewSet())
+        return items.count(), list(items[:PAGE_SIZE])
+
+    def _time(self, run, repeat):
+        timings, count = [], 0
+        for _ in range(repeat):
+            started = time.perf_counter()
+            count, _ = run()
+            timings.append((time.perf_counter() - started) * 1000)
+        return {
+            "matches": count,
+            "median_ms": round(statistics.median(timings), 2),
+            "min_ms": round(min(timings), 2),
+        }
@@ -0,0 +1,48 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from inventory.retention import DEFAULT_BATCH_SIZE, DEFAULT_RETENTION_DAYS, compact_change_logs, prune_tombstones
+from inventory.sync import DEFAULT_TOMBSTONE_DAYS
+
+
+class Command(BaseCommand):
+    help = (
+        "Roll change-log rows older than the retention window into daily per-item rollups "
+        "and archive the raw rows as gzipped NDJSON, then drop expired delta-sync tombstones. "
+        "Safe to schedule (cron, Heroku Scheduler)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=getattr(settings, "INVENTORY_CHANGELOG_RETENTION_DAYS", DEFAULT_RETENTION_DAYS),
+            help="Keep this many days of raw change-log rows.",
+        )
+        parser.add_argument(
+            "--archive-dir",
+            default=getattr(settings, "INVENTORY_CHANGELOG_ARCHIVE_DIR", settings.BASE_DIR / "archive"),
+        )
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument(
+            "--tombstone-days",
+            type=int,
+            default=getattr(settings, "INVENTORY_SYNC", {}).get("TOMBSTONE_DAYS", DEFAULT_TOMBSTONE_DAYS),
+            help="Keep this many days of deleted-item tombstones for delta sync.",
+        )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        pruned = prune_tombstones(now - timedelta(days=options["tombstone_days"]))
+        if pruned:
+            self.stdout.write(f"Dropped {pruned} expired tombstones.")
+
+        before = now - timedelta(days=options["days"])
+        count, path = compact_change_logs(before, options["archive_dir"], options["batch_size"])
+        if not count:
+            self.stdout.write(f"No change-log rows older than {before:%Y-%m-%d %H:%M}.")
+            return
+        self.stdout.write(self.style.SUCCESS(f"Compacted {count} change-log rows; archived to {path}."))
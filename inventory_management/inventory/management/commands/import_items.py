@@ -0,0 +1,231 @@
+import csv
+import json
+import time
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from inventory import cache
+from inventory.changelog import creation_entries, record_changes, update_entries
+from inventory.models import Category, InventoryItem
+from inventory.serializers import MAX_QUANTITY
+from inventory.summary import item_state, record_stock_changes
+
+PROGRESS_EVERY = 10  # seconds between progress lines
+
+
+class RowError(ValueError):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream a CSV or NDJSON file of items (the /items/export/ columns work) and upsert them for one "
+        "user in batches, matching on name or SKU. Only real quantity/price changes are logged."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--user", required=True, help="Username that owns the imported items.")
+        parser.add_argument("--format", choices=["csv", "ndjson"], help="Defaults to the file extension.")
+        parser.add_argument("--match", choices=["name", "sku"], default="name", help="Key to upsert on.")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--max-errors", type=int, default=100, help="Abort after this many bad rows.")
+        parser.add_argument("--dry-run", action="store_true", help="Parse and match, but roll every batch back.")
+
+    def handle(self, *args, **options):
+        try:
+            self.user = User.objects.get(username=options["user"])
+        except User.DoesNotExist:
+            raise CommandError(f"No user {options['user']!r}.")
+        path = Path(options["path"])
+        fmt = options["format"] or ("ndjson" if path.suffix in (".ndjson", ".jsonl") else "csv")
+        self.match = options["match"]
+        self.dry_run = options["dry_run"]
+        self.categories = dict(Category.objects.values_list("name", "id"))
+        self.totals = dict.fromkeys(("rows", "created", "updated", "unchanged", "errors"), 0)
+
+        started = self.last_report = time.perf_counter()
+        batch = []
+        with path.open(newline="", encoding="utf-8-sig") as f:
+            for line_number, row in self._read(f, fmt):
+                self.totals["rows"] += 1
+                try:
+                    batch.append(self._parse(row))
+                except RowError as e:
+                    self.totals["errors"] += 1
+                    self.stderr.write(f"line {line_number}: {e}")
+                    if self.totals["errors"] > options["max_errors"]:
+                        raise CommandError(f"More than {options['max_errors']} bad rows; aborting.")
+                if len(batch) >= options["batch_size"]:
+                    self._upsert(batch)
+                    batch = []
+                    self._progress(started)
+        if batch:
+            self._upsert(batch)
+
+        elapsed = time.perf_counter() - started
+        t = self.totals
+        self.stdout.write(self.style.SUCCESS(
+            f"{t['rows']} rows in {elapsed:.1f}s ({t['rows'] / max(elapsed, 1e-9):.0f} rows/s): "
+            f"{t['created']} created, {t['updated']} updated, {t['unchanged']} unchanged, {t['errors']} errors"
+            + (" (dry run, nothing saved)" if self.dry_run else "")
+        ))
+
+    def _read(self, f, fmt):
+        if fmt == "csv":
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, row
+            return
+        for line_number, line in enumerate(f, 1):
+            if line.strip():
+                try:
+                    yield line_number, json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield line_number, {"__error__": str(e)}
+
+    def _parse(self, row):
+        """
+        Validate one input row into {field: value}; only columns present are included.
+        """
+        if "__error__" in row:
+            raise RowError(f"invalid JSON: {row['__error__']}")
+        name = (row.get("name") or "").strip()
+        if not name or len(name) > 255:
+            raise RowError("name is required (max 255 characters)")
+        values = {"name": name}
+
+        sku = row.get("sku")
+        if sku not in (None, ""):
+            values["sku"] = str(sku).strip()
+            if len(values["sku"]) > 64:
+                raise RowError("sku is too long (max 64 characters)")
+        elif "sku" in row:
+            values["sku"] = None
+        if self.match == "sku" and not values.get("sku"):
+            raise RowError("sku is required with --match sku")
+
+        for field in ("quantity", "reorder_point"):
+            if row.get(field) not in (None, ""):
+                try:
+                    values[field] = int(row[field])
+                except (TypeError, ValueError):
+                    raise RowError(f"{field} must be an integer")
+                if not 0 <= values[field] <= MAX_QUANTITY:
+                    raise RowError(f"{field} must be between 0 and {MAX_QUANTITY}")
+        if row.get("price") not in (None, ""):
+            try:
+                values["price"] = Decimal(str(row["price"])).quantize(Decimal("0.01"))
+            except InvalidOperation:
+                raise RowError("price must be a number")
+            if values["price"] < 0 or values["price"] >= Decimal("1e8"):
+                raise RowError("price is out of range")
+        if "description" in row:
+            values["description"] = row["description"] or ""
+
+        category = row.get("category_name", row.get("category"))
+        if category not in (None, ""):
+            # Resolved to an id in _upsert(), inside the batch's transaction.
+            values["category_name"] = str(category).strip()
+            if len(values["category_name"]) > 100:
+                raise RowError("category is too long (max 100 characters)")
+        elif "category_name" in row or "category" in row:
+            values["category_id"] = None
+        return values
+
+    def _resolve_categories(self, rows):
+        """
+        Replace category names with ids, creating missing categories.
+        """
+        for row in rows:
+            if "category_name" in row:
+                name = row.pop("category_name")
+                if name not in self.categories:
+                    self.categories[name] = Category.objects.get_or_create(name=name)[0].pk
+                    self.new_categories.add(name)
+                row["category_id"] = self.categories[name]
+
+    def _row_error(self, row, message):
+        self.totals["errors"] += 1
+        self.stderr.write(f"{self.match} {row[self.match]!r}: {message}")
+
+    def _upsert(self, rows):
+        self.new_categories = set()
+        with transaction.atomic():
+            self._upsert_batch(rows)
+            if self.dry_run:
+                transaction.set_rollback(True)
+        if self.dry_run:
+            # Rolled back with the batch.
+            for name in self.new_categories:
+                del self.categories[name]
+
+    def _upsert_batch(self, rows):
+        key = self.match
+        # Later rows for the same key win, as if applied one after another.
+        rows = list({row[key]: row for row in rows}.values())
+        self._resolve_categories(rows)
+        existing = {}
+        for item in InventoryItem.objects.filter(user=self.user, **{f"{key}__in": [row[key] for row in rows]}).order_by("-id"):
+            existing[getattr(item, key)] = item  # oldest item wins among duplicate names
+        # SKUs are unique per user: which item holds (or, in this batch, claims) each one.
+        skus = {row["sku"] for row in rows if row.get("sku")}
+        holders = dict(InventoryItem.objects.filter(user=self.user, sku__in=skus).values_list("sku", "pk"))
+
+        created, updated, fields, entries, stock_changes = [], [], {"last_updated", "version"}, [], []
+        now = timezone.now()
+        for row in rows:
+            item = existing.get(row[key])
+            sku = row.get("sku")
+            if sku:
+                target = item.pk if item else ("new", row[key])
+                holder = holders.get(sku)
+                if holder is not None and holder != target:
+                    self._row_error(row, f"sku {sku!r} is already used by another item")
+                    continue
+                holders[sku] = target
+            if item is None:
+                if "price" not in row:
+                    self._row_error(row, "price is required for new items")
+                    continue
+                created.append(InventoryItem(user=self.user, **row))
+                continue
+            if row.get("quantity", item.quantity) < item.allocated:
+                self._row_error(row, f"quantity is below the {item.allocated} held at locations")
+                continue
+            changed = [field for field, value in row.items() if getattr(item, field) != value]
+            if not changed:
+                self.totals["unchanged"] += 1
+                continue
+            old_quantity, old_price, old_state = item.quantity, item.price, item_state(item)
+            for field in changed:
+                setattr(item, field, row[field])
+            item.last_updated = now
+            item.version += 1
+            fields.update(changed)
+            updated.append(item)
+            entries.extend(update_entries(item, self.user, old_quantity, old_price))
+            stock_changes.append((old_state, item_state(item)))
+
+        InventoryItem.objects.bulk_create(created)
+        if updated:
+            InventoryItem.objects.bulk_update(updated, sorted(fields))
+        entries.extend(entry for item in created for entry in creation_entries(item, self.user))
+        record_changes(entries)
+        record_stock_changes(stock_changes + [(None, item_state(item)) for item in created])
+        cache.bump_items(self.user.pk)
+        self.totals["created"] += len(created)
+        self.totals["updated"] += len(updated)
+
+    def _progress(self, started):
+        now = time.perf_counter()
+        if now - self.last_report < PROGRESS_EVERY:
+            return
+        self.last_report = now
+        rows = self.totals["rows"]
+        self.stdout.write(f"{rows} rows, {rows / (now - started):.0f} rows/s")
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from inventory.summary import live_totals, rebuild_summary, stored_totals
+
+
+class Command(BaseCommand):
+    help = "Rebuild the StockSummary table from InventoryItem and verify it against a live aggregate."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--verify-only",
+            action="store_true",
+            help="Only compare the stored summary with a live aggregate; don't rebuild.",
+        )
+
+    def handle(self, *args, **options):
+        if not options["verify_only"]:
+            with transaction.atomic():
+                rebuild_summary()
+            self.stdout.write("Rebuilt stock summary.")
+
+        live, stored = live_totals(), stored_totals()
+        mismatches = [
+            (key, live.get(key), stored.get(key))
+            for key in sorted(set(live) | set(stored), key=str)
+            if live.get(key) != stored.get(key)
+        ]
+        for (user_id, category_id), expected, actual in mismatches:
+            self.stderr.write(
+                f"user={user_id} category={category_id}: live={expected} stored={actual}"
+            )
+        if mismatches:
+            raise CommandError(f"{len(mismatches)} summary bucket(s) out of date.")
+        self.stdout.write(self.style.SUCCESS(f"Stock summary matches live totals ({len(live)} buckets)."))
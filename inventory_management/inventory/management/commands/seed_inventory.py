@@ -0,0 +1,138 @@
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from inventory.models import Category, InventoryChangeLog, InventoryItem
+from inventory.summary import rebuild_summary
+from inventory.management.commands.benchmark_search import WORDS
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a reproducible load-test dataset (users, categories, items and their change logs) "
+        "with bulk inserts. Seeds into the configured database, so point DATABASE_URL at a scratch database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=20)
+        parser.add_argument("--categories", type=int, default=25)
+        parser.add_argument("--items", type=int, default=20_000, help="Total items, skewed towards the first users.")
+        parser.add_argument("--logs-per-item", type=int, default=8, help="Average change-log rows per item.")
+        parser.add_argument("--days", type=int, default=180, help="Spread item history over this many days.")
+        parser.add_argument("--batch-size", type=int, default=2000)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--prefix", default="loadtest", help="Username/category prefix of seeded rows.")
+        parser.add_argument("--flush", action="store_true", help="Delete a previous seed with this prefix first.")
+
+    def handle(self, *args, **options):
+        prefix = options["prefix"]
+        seeded = User.objects.filter(username__startswith=f"{prefix}-")
+        if seeded.exists():
+            if not options["flush"]:
+                raise CommandError(f"A '{prefix}' dataset already exists; pass --flush to replace it.")
+            with transaction.atomic():
+                seeded.delete()
+                Category.objects.filter(name__startswith=f"{prefix}-").delete()
+                rebuild_summary()
+
+        rng = random.Random(options["seed"])
+        started = time.perf_counter()
+        users = self._seed_users(prefix, options["users"])
+        categories = self._seed_categories(prefix, options["categories"])
+        items, logs = self._seed_items(rng, users, categories, options)
+        with transaction.atomic():
+            rebuild_summary()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {len(users)} users, {len(categories)} categories, {items} items and {logs} change logs "
+            f"in {time.perf_counter() - started:.1f}s. Admin: {prefix}-admin, busiest user: {prefix}-user-0."
+        ))
+
+    def _seed_users(self, prefix, count):
+        password = make_password(None)
+        User.objects.bulk_create(
+            [User(username=f"{prefix}-admin", is_staff=True, password=password)]
+            + [User(username=f"{prefix}-user-{n}", password=password) for n in range(count)]
+        )
+        users = User.objects.filter(username__startswith=f"{prefix}-user-")
+        return sorted(users, key=lambda user: int(user.username.rsplit("-", 1)[1]))
+
+    def _seed_categories(self, prefix, count):
+        Category.objects.bulk_create([Category(name=f"{prefix}-category-{n}") for n in range(count)])
+        return list(Category.objects.filter(name__startswith=f"{prefix}-category-"))
+
+    def _seed_items(self, rng, users, categories, options):
+        # Zipf-like ownership: a few users own most of the stock.
+        weights = [1 / (rank + 1) for rank in range(len(users))]
+        now = timezone.now()
+        remaining, total_logs = options["items"], 0
+        while remaining > 0:
+            size = min(remaining, options["batch_size"])
+            histories = [self._history(rng, now, options) for _ in range(size)]
+            with transaction.atomic():
+                items = InventoryItem.objects.bulk_create(
+                    InventoryItem(
+                        user=rng.choices(users, weights)[0],
+                        name=" ".join(rng.sample(WORDS, 3)),
+                        quantity=history[-1][1],
+                        reorder_point=rng.choice((0, 5, 10, 20)),
+                        price=history[-1][2],
+                        category=rng.choice(categories) if rng.random() < 0.9 else None,
+                    )
+                    for history in histories
+                )
+                # auto_now/auto_now_add overwrote these on insert; backdate them.
+                for item, history in zip(items, histories):
+                    item.date_added, item.last_updated = history[0][0], history[-1][0]
+                InventoryItem.objects.bulk_update(items, ["date_added", "last_updated"])
+                logs = [log for item, history in zip(items, histories) for log in self._logs(item, history)]
+                InventoryChangeLog.objects.bulk_create(logs, batch_size=options["batch_size"])
+            total_logs += len(logs)
+            remaining -= size
+        return options["items"], total_logs
+
+    def _history(self, rng, now, options):
+        """
+        [(timestamp, quantity, price), ...] from creation to the item's current state.
+        """
+        created = now - timedelta(days=rng.uniform(0, options["days"]))
+        events = rng.randint(0, 2 * options["logs_per_item"])
+        stamps = sorted(created + (now - created) * rng.random() for _ in range(events))
+        quantity, price = rng.randint(0, 200), round(rng.uniform(1, 500), 2)
+        history = [(created, quantity, price)]
+        for stamp in stamps:
+            if rng.random() < 0.15:
+                price = round(max(0.5, price * rng.uniform(0.8, 1.25)), 2)
+            else:
+                quantity = max(0, quantity + rng.choice((-1, 1)) * rng.randint(1, 25))
+            history.append((stamp, quantity, price))
+        return history
+
+    def _logs(self, item, history):
+        user = item.user
+        (created, quantity, price), entries = history[0], []
+        if quantity > 0:
+            entries.append(self._log(item, user, created, "quantity", "restock", 0, quantity, quantity))
+        entries.append(self._log(item, user, created, "price", "increase", 0, price))
+        for stamp, new_quantity, new_price in history[1:]:
+            if new_quantity != quantity:
+                diff = new_quantity - quantity
+                change_type = "restock" if diff > 0 else "sale"
+                entries.append(self._log(item, user, stamp, "quantity", change_type, quantity, new_quantity, diff))
+            elif new_price != price:
+                change_type = "increase" if new_price > price else "decrease"
+                entries.append(self._log(item, user, stamp, "price", change_type, price, new_price))
+            quantity, price = new_quantity, new_price
+        return entries
+
+    def _log(self, item, user, timestamp, field, change_type, old_value, new_value, quantity_diff=None):
+        return InventoryChangeLog(
+            item=item, user=user, timestamp=timestamp, field_changed=field, change_type=change_type,
+            old_value=old_value, new_value=new_value, quantity_changed=quantity_diff,
+        )
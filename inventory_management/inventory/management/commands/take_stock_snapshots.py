@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from inventory.snapshots import take_snapshots
+
+
+class Command(BaseCommand):
+    help = (
+        "Snapshot the quantity and price of every item changed since its last snapshot, "
+        "so /items/as_of/ only reads the change logs after it. Safe to schedule (cron, Heroku Scheduler)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--at",
+            help="Reconstruct the snapshot at this past ISO 8601 time from the change logs "
+                 "instead of reading the current item rows.",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        at = None
+        if options["at"]:
+            at = parse_datetime(options["at"])
+            if at is None:
+                raise CommandError(f"Invalid --at: {options['at']!r}")
+            if timezone.is_naive(at):
+                at = timezone.make_aware(at)
+        count = take_snapshots(at, options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Wrote {count} item snapshots."))
@@ -0,0 +1,230 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.db import connections
+from django.utils.crypto import constant_time_compare
+from rest_framework import authentication, permissions, renderers
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.views import APIView
+
+from .changelog import get_buffer
+
+slow_logger = logging.getLogger("inventory.slow_requests")
+
+METRICS_TOKEN = "metrics-token"
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+HISTOGRAMS = {
+    "inventory_http_request_duration_seconds": ("Wall time per request.", DURATION_BUCKETS),
+    "inventory_http_db_duration_seconds": ("Time spent in SQL per request.", DURATION_BUCKETS),
+    "inventory_http_db_queries": ("SQL queries per request.", QUERY_BUCKETS),
+    "inventory_http_response_size_bytes": ("Response body size.", SIZE_BUCKETS),
+}
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def samples(self):
+        """
+        Cumulative (le, count) pairs, ending with +Inf.
+        """
+        total = 0
+        for bound, count in zip(self.buckets + ("+Inf",), self.counts):
+            total += count
+            yield bound, total
+
+
+class QueryCollector:
+    """
+    Database execute wrapper counting the queries and SQL time of one
+    request (on every configured database), optionally keeping the SQL.
+    """
+
+    def __init__(self, capture_sql=False):
+        self.capture_sql = capture_sql
+        self.count = 0
+        self.duration = 0.0
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.count += 1
+            self.duration += elapsed
+            if self.capture_sql:
+                self.queries.append({"sql": sql, "ms": round(elapsed * 1000, 3)})
+
+    @contextmanager
+    def watch(self):
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(self))
+            yield self
+
+
+class MetricsRegistry:
+    """
+    In-process request metrics. Each worker process keeps its own registry,
+    so scrape every worker (or run one per container).
+    """
+
+    def __init__(self, slow_log_size=20):
+        self._lock = threading.Lock()
+        self._requests = {}
+        self._histograms = {name: {} for name in HISTOGRAMS}
+        self._slow = []
+        self._slow_log_size = slow_log_size
+        self._tiebreak = itertools.count()
+
+    def observe(self, labels, status_code, duration, db_duration, queries, size):
+        with self._lock:
+            key = labels + (("status", str(status_code)),)
+            self._requests[key] = self._requests.get(key, 0) + 1
+            for name, value in (
+                ("inventory_http_request_duration_seconds", duration),
+                ("inventory_http_db_duration_seconds", db_duration),
+                ("inventory_http_db_queries", queries),
+                ("inventory_http_response_size_bytes", size),
+            ):
+                if value is None:
+                    continue
+                series = self._histograms[name]
+                if labels not in series:
+                    series[labels] = Histogram(HISTOGRAMS[name][1])
+                series[labels].observe(value)
+
+    def record_slow(self, entry):
+        """
+        Keep the `slow_log_size` slowest requests seen so far.
+        """
+        item = (entry["duration_ms"], next(self._tiebreak), entry)
+        with self._lock:
+            if len(self._slow) < self._slow_log_size:
+                heapq.heappush(self._slow, item)
+            elif item > self._slow[0]:
+                heapq.heapreplace(self._slow, item)
+
+    def slow_requests(self):
+        with self._lock:
+            return [entry for _, _, entry in sorted(self._slow, reverse=True)]
+
+    def render(self):
+        lines = [
+            "# HELP inventory_http_requests_total Requests handled, by view action and status.",
+            "# TYPE inventory_http_requests_total counter",
+        ]
+        with self._lock:
+            for labels, count in sorted(self._requests.items()):
+                lines.append(f"inventory_http_requests_total{_labels(labels)} {count}")
+            for name, (help_text, _) in HISTOGRAMS.items():
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+                for labels, histogram in sorted(self._histograms[name].items()):
+                    for bound, count in histogram.samples():
+                        lines.append(f"{name}_bucket{_labels(labels + (('le', str(bound)),))} {count}")
+                    lines.append(f"{name}_sum{_labels(labels)} {_number(histogram.sum)}")
+                    lines.append(f"{name}_count{_labels(labels)} {histogram.count}")
+
+        buffer = get_buffer()
+        if buffer is not None:
+            for key, value in buffer.stats().items():
+                name = f"inventory_changelog_buffer_{key}"
+                lines += [f"# TYPE {name} gauge", f"{name} {value}"]
+        return "\n".join(lines) + "\n"
+
+
+def _number(value):
+    # repr() round-trips; a format like :g would drop digits from long-running sums.
+    return repr(float(value))
+
+
+def _labels(labels):
+    def escape(value):
+        return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{key}="{escape(value)}"' for key, value in labels) + "}"
+
+
+registry = MetricsRegistry(settings.INVENTORY_METRICS.get("SLOW_REQUEST_LOG_SIZE", 20))
+
+
+class PrometheusRenderer(renderers.BaseRenderer):
+    media_type = "text/plain"
+    format = "prometheus"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if not isinstance(data, str):  # error responses
+            data = "\n".join(f"# {key}: {value}" for key, value in data.items()) + "\n"
+        return data.encode(self.charset)
+
+
+class MetricsTokenAuthentication(authentication.BaseAuthentication):
+    """
+    Lets scrapers in with `Authorization: Bearer <INVENTORY_METRICS["TOKEN"]>`;
+    any other header is left to the regular (JWT) authentication.
+    """
+
+    def authenticate(self, request):
+        token = settings.INVENTORY_METRICS.get("TOKEN")
+        if token and constant_time_compare(request.headers.get("Authorization", ""), f"Bearer {token}"):
+            return AnonymousUser(), METRICS_TOKEN
+        return None
+
+    def authenticate_header(self, request):
+        # Without it DRF turns failed authentication into 403s.
+        return 'Bearer realm="metrics"'
+
+
+class CanReadMetrics(permissions.BasePermission):
+    def has_permission(self, request, view):
+        return request.auth is METRICS_TOKEN or bool(request.user and request.user.is_staff)
+
+
+class MetricsView(APIView):
+    """
+    Prometheus text exposition of the request metrics (admins or the scrape token).
+    """
+    authentication_classes = [MetricsTokenAuthentication, *api_settings.DEFAULT_AUTHENTICATION_CLASSES]
+    permission_classes = [CanReadMetrics]
+    renderer_classes = [PrometheusRenderer]
+
+    def get(self, request):
+        return Response(registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+class SlowRequestsView(APIView):
+    """
+    The slowest requests seen by this process, with their SQL, when
+    INVENTORY_METRICS["SLOW_REQUEST_MS"] is set.
+    """
+    authentication_classes = MetricsView.authentication_classes
+    permission_classes = [CanReadMetrics]
+
+    def get(self, request):
+        return Response({
+            "threshold_ms": settings.INVENTORY_METRICS.get("SLOW_REQUEST_MS"),
+            "requests": registry.slow_requests(),
+        })
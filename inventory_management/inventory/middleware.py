@@ -0,0 +1,150 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from .metrics import QueryCollector, registry, slow_logger
+
+
+class RequestMetricsMiddleware:
+    """
+    Records wall time, SQL time, query count and response size of every API
+    request (INVENTORY_METRICS["PATH_PREFIXES"]) into the metrics registry,
+    labelled by URL name and viewset action. With SLOW_REQUEST_MS set,
+    requests slower than that are logged with their SQL.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        config = settings.INVENTORY_METRICS
+        self.enabled = config.get("ENABLED", True)
+        self.prefixes = tuple(config.get("PATH_PREFIXES", ()))
+        self.slow_ms = config.get("SLOW_REQUEST_MS")
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not self.enabled or not request.path.startswith(self.prefixes):
+            return self.get_response(request)
+
+        collector = QueryCollector(capture_sql=self.slow_ms is not None)
+        started = time.perf_counter()
+        with collector.watch():
+            response = self.get_response(request)
+        if response.streaming:
+            # Exports run their queries while streaming; measure to the last chunk.
+            chunks = response.streaming_content
+            response.streaming_content = self._stream(chunks, request, response, collector, started)
+        else:
+            self._record(request, response, collector, started, len(response.content))
+        return response
+
+    async def __acall__(self, request):
+        if not self.enabled or not request.path.startswith(self.prefixes):
+            return await self.get_response(request)
+
+        collector = QueryCollector(capture_sql=self.slow_ms is not None)
+        started = time.perf_counter()
+        # Under ASGI both the async ORM and sync views run their queries on
+        # the request's own worker thread, so the wrappers are installed there.
+        watch = collector.watch()
+        await sync_to_async(watch.__enter__)()
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(watch.__exit__)(None, None, None)
+        if not response.streaming:
+            self._record(request, response, collector, started, len(response.content))
+        elif response.is_async:
+            chunks = response.streaming_content
+            response.streaming_content = self._astream(chunks, request, response, collector, started)
+        else:
+            # Django consumes sync iterators on that same thread.
+            chunks = response.streaming_content
+            response.streaming_content = self._stream(chunks, request, response, collector, started)
+        return response
+
+    async def _astream(self, chunks, request, response, collector, started):
+        size = 0
+        async for chunk in chunks:
+            size += len(chunk)
+            yield chunk
+        self._record(request, response, collector, started, size)
+
+    def _stream(self, chunks, request, response, collector, started):
+        size = 0
+        with collector.watch():
+            for chunk in chunks:
+                size += len(chunk)
+                yield chunk
+        self._record(request, response, collector, started, size)
+
+    def _record(self, request, response, collector, started, size):
+        duration = time.perf_counter() - started
+        labels = _labels(request)
+        registry.observe(labels, response.status_code, duration, collector.duration, collector.count, size)
+
+        duration_ms = duration * 1000
+        if self.slow_ms is not None and duration_ms >= self.slow_ms:
+            entry = {
+                "method": request.method,
+                "path": request.get_full_path(),
+                "view": dict(labels)["view"],
+                "status": response.status_code,
+                "duration_ms": round(duration_ms, 3),
+                "db_ms": round(collector.duration * 1000, 3),
+                "queries": collector.queries,
+            }
+            registry.record_slow(entry)
+            slow_logger.warning(
+                "Slow request %s %s: %.1f ms, %d queries (%.1f ms SQL)",
+                request.method, entry["path"], duration_ms, collector.count, entry["db_ms"],
+                extra={"slow_request": entry},
+            )
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise that can also sit in an async middleware chain. Under ASGI a
+    sync-only middleware makes Django run it, and everything inside it
+    including async views, on a worker thread per request.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        # Only static URLs touch the filesystem here (and only with autorefresh).
+        if self.autorefresh:
+            static_file = self.find_file(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
+
+
+def _labels(request):
+    match = request.resolver_match
+    if match is None:
+        return (("view", "unmatched"), ("action", ""), ("method", request.method))
+    # DRF viewsets map HTTP methods to actions (list, create, low_stock, ...).
+    actions = getattr(match.func, "actions", None) or {}
+    action = actions.get(request.method.lower(), request.method.lower())
+    return (("view", match.view_name or match._func_path), ("action", action), ("method", request.method))
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:22
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='inventorychangelog',
+            index=models.Index(fields=['item', 'timestamp'], name='changelog_item_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inventorychangelog',
+            index=models.Index(fields=['timestamp'], name='changelog_ts_idx'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:24
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def populate_summary(apps, schema_editor):
+    InventoryItem = apps.get_model("inventory", "InventoryItem")
+    StockSummary = apps.get_model("inventory", "StockSummary")
+    rows = InventoryItem.objects.values("user_id", "category_id").annotate(
+        item_count=models.Count("id"),
+        total_quantity=models.Sum("quantity"),
+        total_value=models.Sum(
+            models.ExpressionWrapper(
+                models.F("quantity") * models.F("price"),
+                output_field=models.DecimalField(max_digits=20, decimal_places=2),
+            )
+        ),
+    ).order_by()
+    StockSummary.objects.bulk_create(StockSummary(**row) for row in rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0002_changelog_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('item_count', models.IntegerField(default=0)),
+                ('total_quantity', models.BigIntegerField(default=0)),
+                ('total_value', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='inventory.category')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_summaries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'category'], name='summary_user_category_idx')],
+            },
+        ),
+        migrations.RunPython(populate_summary, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:25
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0003_stock_summary'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inventoryitem',
+            name='reorder_point',
+            field=models.PositiveIntegerField(default=5),
+        ),
+        migrations.AddIndex(
+            model_name='inventoryitem',
+            index=models.Index(condition=models.Q(('quantity__lt', models.F('reorder_point'))), fields=['user', 'quantity'], name='item_below_reorder_idx'),
+        ),
+    ]
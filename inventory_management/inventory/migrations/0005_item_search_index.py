@@ -0,0 +1,36 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.db import migrations
+
+from inventory.migrations._search_schema import PG_SEARCH_VECTOR, create_sqlite_search, drop_sqlite_search
+
+PG_INDEX_NAME = "item_name_search_idx"
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        InventoryItem = apps.get_model("inventory", "InventoryItem")
+        schema_editor.add_index(InventoryItem, GinIndex(PG_SEARCH_VECTOR, name=PG_INDEX_NAME))
+    elif vendor == "sqlite":
+        with schema_editor.connection.cursor() as cursor:
+            create_sqlite_search(cursor)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        InventoryItem = apps.get_model("inventory", "InventoryItem")
+        schema_editor.remove_index(InventoryItem, GinIndex(PG_SEARCH_VECTOR, name=PG_INDEX_NAME))
+    elif vendor == "sqlite":
+        drop_sqlite_search(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0004_item_reorder_point'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
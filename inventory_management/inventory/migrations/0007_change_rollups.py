@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0006_changelog_event_timestamp'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventoryChangeRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('quantity_delta', models.IntegerField(default=0)),
+                ('quantity_events', models.PositiveIntegerField(default=0)),
+                ('price_events', models.PositiveIntegerField(default=0)),
+                ('min_price', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('max_price', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('close_price', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('last_timestamp', models.DateTimeField()),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rollups', to='inventory.inventoryitem')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['day'], name='rollup_day_idx')],
+                'constraints': [models.UniqueConstraint(fields=('item', 'day'), name='rollup_item_day_uniq')],
+            },
+        ),
+    ]
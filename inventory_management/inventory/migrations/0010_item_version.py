@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:51
+
+from django.db import migrations, models
+
+from inventory.migrations._search_schema import resume_sqlite_search_triggers, suspend_sqlite_search_triggers
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0009_item_sku'),
+    ]
+
+    operations = [
+        migrations.RunPython(suspend_sqlite_search_triggers, resume_sqlite_search_triggers),
+        migrations.AddField(
+            model_name='inventoryitem',
+            name='version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.RunPython(resume_sqlite_search_triggers, suspend_sqlite_search_triggers),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:23
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+from inventory.migrations._search_schema import resume_sqlite_search_triggers, suspend_sqlite_search_triggers
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0012_item_list_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(suspend_sqlite_search_triggers, resume_sqlite_search_triggers),
+        migrations.AddField(
+            model_name='inventoryitem',
+            name='allocated',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(resume_sqlite_search_triggers, suspend_sqlite_search_triggers),
+        migrations.AlterField(
+            model_name='inventorychangelog',
+            name='change_type',
+            field=models.CharField(choices=[('restock', 'Restock'), ('sale', 'Sale'), ('increase', 'Increase'), ('decrease', 'Decrease'), ('transfer_in', 'Transfer in'), ('transfer_out', 'Transfer out')], max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='inventorychangelog',
+            name='field_changed',
+            field=models.CharField(choices=[('quantity', 'Quantity'), ('price', 'Price'), ('stock', 'Stock at location')], max_length=50),
+        ),
+        migrations.CreateModel(
+            name='Location',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='locations', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='inventorychangelog',
+            name='location',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='inventory.location'),
+        ),
+        migrations.CreateModel(
+            name='StockLevel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.PositiveIntegerField(default=0)),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_levels', to='inventory.inventoryitem')),
+                ('location', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='stock_levels', to='inventory.location')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='location',
+            constraint=models.UniqueConstraint(fields=('user', 'name'), name='location_user_name_uniq'),
+        ),
+        migrations.AddIndex(
+            model_name='stocklevel',
+            index=models.Index(fields=['location', 'item'], name='stock_location_item_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='stocklevel',
+            constraint=models.UniqueConstraint(fields=('item', 'location'), name='stock_item_location_uniq'),
+        ),
+    ]
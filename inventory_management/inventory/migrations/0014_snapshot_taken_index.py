@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0013_locations'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='inventorysnapshot',
+            index=models.Index(fields=['taken_at'], name='snapshot_taken_idx'),
+        ),
+    ]
@@ -0,0 +1,111 @@
+"""
+PostgreSQL: replace the GIN index over to_tsvector(name) with a table of
+item documents (name and category name), kept in sync by triggers like
+the SQLite FTS5 table, so both backends search the same columns.
+Nothing changes on SQLite.
+"""
+from django.contrib.postgres.indexes import GinIndex
+from django.db import migrations
+
+from inventory.migrations._search_schema import PG_SEARCH_VECTOR
+
+OLD_INDEX_NAME = "item_name_search_idx"
+
+PG_SEARCH_TABLE = "inventory_item_search"
+
+PG_DOCUMENT = (
+    "to_tsvector('simple', {item}.name) || "
+    "to_tsvector('simple', coalesce((SELECT name FROM inventory_category WHERE id = {item}.category_id), ''))"
+)
+
+PG_CREATE = [
+    f"""
+    CREATE TABLE {PG_SEARCH_TABLE} (
+        item_id bigint PRIMARY KEY,
+        document tsvector NOT NULL
+    )
+    """,
+    f"""
+    INSERT INTO {PG_SEARCH_TABLE} (item_id, document)
+    SELECT i.id, {PG_DOCUMENT.format(item="i")} FROM inventory_inventoryitem i
+    """,
+    f"CREATE INDEX {PG_SEARCH_TABLE}_document_idx ON {PG_SEARCH_TABLE} USING gin (document)",
+    f"""
+    CREATE FUNCTION inventory_item_search_upsert() RETURNS trigger AS $$
+    BEGIN
+        INSERT INTO {PG_SEARCH_TABLE} (item_id, document) VALUES (new.id, {PG_DOCUMENT.format(item="new")})
+        ON CONFLICT (item_id) DO UPDATE SET document = excluded.document;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    f"""
+    CREATE FUNCTION inventory_item_search_delete() RETURNS trigger AS $$
+    BEGIN
+        DELETE FROM {PG_SEARCH_TABLE} WHERE item_id = old.id;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    f"""
+    CREATE FUNCTION inventory_category_search_update() RETURNS trigger AS $$
+    BEGIN
+        UPDATE {PG_SEARCH_TABLE} s SET document = {PG_DOCUMENT.format(item="i")}
+        FROM inventory_inventoryitem i
+        WHERE i.category_id = new.id AND s.item_id = i.id;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER inventory_item_search_iu AFTER INSERT OR UPDATE OF name, category_id
+    ON inventory_inventoryitem FOR EACH ROW EXECUTE FUNCTION inventory_item_search_upsert()
+    """,
+    """
+    CREATE TRIGGER inventory_item_search_d AFTER DELETE
+    ON inventory_inventoryitem FOR EACH ROW EXECUTE FUNCTION inventory_item_search_delete()
+    """,
+    """
+    CREATE TRIGGER inventory_category_search_u AFTER UPDATE OF name
+    ON inventory_category FOR EACH ROW EXECUTE FUNCTION inventory_category_search_update()
+    """,
+]
+
+PG_DROP = [
+    "DROP TRIGGER IF EXISTS inventory_category_search_u ON inventory_category",
+    "DROP TRIGGER IF EXISTS inventory_item_search_d ON inventory_inventoryitem",
+    "DROP TRIGGER IF EXISTS inventory_item_search_iu ON inventory_inventoryitem",
+    "DROP FUNCTION IF EXISTS inventory_category_search_update()",
+    "DROP FUNCTION IF EXISTS inventory_item_search_delete()",
+    "DROP FUNCTION IF EXISTS inventory_item_search_upsert()",
+    f"DROP TABLE IF EXISTS {PG_SEARCH_TABLE}",
+]
+
+
+def create_search_table(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    InventoryItem = apps.get_model("inventory", "InventoryItem")
+    schema_editor.remove_index(InventoryItem, GinIndex(PG_SEARCH_VECTOR, name=OLD_INDEX_NAME))
+    for statement in PG_CREATE:
+        schema_editor.execute(statement)
+
+
+def drop_search_table(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for statement in PG_DROP:
+        schema_editor.execute(statement)
+    InventoryItem = apps.get_model("inventory", "InventoryItem")
+    schema_editor.add_index(InventoryItem, GinIndex(PG_SEARCH_VECTOR, name=OLD_INDEX_NAME))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0014_snapshot_taken_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_table, drop_search_table),
+    ]
@@ -0,0 +1,85 @@
+"""
+The full-text search schema as migration 0005 created it, for the
+migrations that install or work around it. Frozen: inventory.search may
+change, these must not. A change to the triggers needs a new migration
+with its own copy of the new SQL. (The loader skips modules starting
+with "_", so this isn't a migration itself.)
+"""
+from django.contrib.postgres.search import SearchVector
+
+PG_SEARCH_VECTOR = SearchVector("name", config="simple")
+
+SQLITE_FTS_TABLE = "inventory_item_fts"
+
+SQLITE_FTS_TRIGGERS = {
+    "inventory_item_fts_ai": f"""
+    CREATE TRIGGER IF NOT EXISTS inventory_item_fts_ai AFTER INSERT ON inventory_inventoryitem BEGIN
+        INSERT INTO {SQLITE_FTS_TABLE}(rowid, name, category_name)
+        VALUES (new.id, new.name, (SELECT name FROM inventory_category WHERE id = new.category_id));
+    END
+    """,
+    "inventory_item_fts_au": f"""
+    CREATE TRIGGER IF NOT EXISTS inventory_item_fts_au AFTER UPDATE OF name, category_id ON inventory_inventoryitem BEGIN
+        UPDATE {SQLITE_FTS_TABLE}
+        SET name = new.name,
+            category_name = (SELECT name FROM inventory_category WHERE id = new.category_id)
+        WHERE rowid = new.id;
+    END
+    """,
+    "inventory_item_fts_ad": f"""
+    CREATE TRIGGER IF NOT EXISTS inventory_item_fts_ad AFTER DELETE ON inventory_inventoryitem BEGIN
+        DELETE FROM {SQLITE_FTS_TABLE} WHERE rowid = old.id;
+    END
+    """,
+    "inventory_category_fts_au": f"""
+    CREATE TRIGGER IF NOT EXISTS inventory_category_fts_au AFTER UPDATE OF name ON inventory_category BEGIN
+        UPDATE {SQLITE_FTS_TABLE} SET category_name = new.name
+        WHERE rowid IN (SELECT id FROM inventory_inventoryitem WHERE category_id = new.id);
+    END
+    """,
+}
+
+
+def create_sqlite_search(cursor):
+    """
+    Create and fill the FTS5 table, then its triggers, if they are missing.
+    """
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [SQLITE_FTS_TABLE])
+    if cursor.fetchone() is None:
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE {SQLITE_FTS_TABLE} USING fts5("
+            "name, category_name, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+        cursor.execute(
+            f"INSERT INTO {SQLITE_FTS_TABLE}(rowid, name, category_name) "
+            "SELECT i.id, i.name, c.name FROM inventory_inventoryitem i "
+            "LEFT JOIN inventory_category c ON c.id = i.category_id"
+        )
+    for statement in SQLITE_FTS_TRIGGERS.values():
+        cursor.execute(statement)
+
+
+def drop_sqlite_search(schema_editor):
+    for name in SQLITE_FTS_TRIGGERS:
+        schema_editor.execute(f"DROP TRIGGER IF EXISTS {name}")
+    schema_editor.execute(f"DROP TABLE IF EXISTS {SQLITE_FTS_TABLE}")
+
+
+def suspend_sqlite_search_triggers(apps, schema_editor):
+    """
+    RunPython step for migrations that rebuild inventory_inventoryitem on
+    SQLite (e.g. AddField with a default): the category trigger references
+    the item table and would block the rebuild. Pair with
+    resume_sqlite_search_triggers after the schema change.
+    """
+    if schema_editor.connection.vendor == "sqlite":
+        for name in SQLITE_FTS_TRIGGERS:
+            schema_editor.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+
+def resume_sqlite_search_triggers(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == "sqlite" and SQLITE_FTS_TABLE in connection.introspection.table_names():
+        with connection.cursor() as cursor:
+            for statement in SQLITE_FTS_TRIGGERS.values():
+                cursor.execute(statement)
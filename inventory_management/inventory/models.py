@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
 
 
 class Category(models.Model):
@@ -13,32 +14,216 @@ class Category(models.Model):
 class InventoryItem(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="items")
     name = models.CharField(max_length=255)
+    # Optional external identifier (e.g. from a supplier catalog); unique per user.
+    sku = models.CharField(max_length=64, null=True, blank=True)
     description = models.TextField(blank=True)
     quantity = models.PositiveIntegerField(default=0)
+    reorder_point = models.PositiveIntegerField(default=5)
     price = models.DecimalField(max_digits=10, decimal_places=2)
     category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True)
     date_added = models.DateTimeField(auto_now_add=True)
     last_updated = models.DateTimeField(auto_now=True)
+    # Bumped by every write; updates compare-and-swap on it (see InventoryItemViewSet).
+    version = models.PositiveIntegerField(default=1)
+    # Denormalized sum of stock_levels; the rest of `quantity` is unassigned
+    # to any location. Quantity writes keep quantity >= allocated.
+    allocated = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "sku"], condition=models.Q(sku__isnull=False), name="item_user_sku_uniq"
+            ),
+        ]
+        indexes = [
+            # Partial index: only rows below their reorder point, so the
+            # low-stock queue stays small however large the table grows.
+            models.Index(
+                fields=["user", "quantity"],
+                condition=models.Q(quantity__lt=models.F("reorder_point")),
+                name="item_below_reorder_idx",
+            ),
+            # Delta sync (/items/sync/) walks a user's items by last change.
+            models.Index(fields=["user", "last_updated"], name="item_user_updated_idx"),
+            # The list's per-user filters and orderings (filterset_fields /
+            # ordering_fields), so pages come off an index instead of a sort.
+            models.Index(fields=["user", "date_added"], name="item_user_added_idx"),
+            models.Index(fields=["user", "quantity"], name="item_user_quantity_idx"),
+            models.Index(fields=["user", "price"], name="item_user_price_idx"),
+            models.Index(fields=["user", "name"], name="item_user_name_idx"),
+            models.Index(fields=["user", "category"], name="item_user_category_idx"),
+            # Admins filter every user's items by price.
+            models.Index(fields=["price"], name="item_price_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        # Saves outside the API's compare-and-swap (admin, shell) still
+        # invalidate the versions clients hold.
+        if not self._state.adding:
+            self.version += 1
+            if kwargs.get("update_fields") is not None:
+                kwargs["update_fields"] = {*kwargs["update_fields"], "version"}
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.name} ({self.quantity})"
 
 
+class Location(models.Model):
+    """
+    A warehouse, store or shelf holding some of its owner's stock.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="locations")
+    name = models.CharField(max_length=100)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "name"], name="location_user_name_uniq"),
+        ]
+
+    def __str__(self):
+        return self.name
+
+
+class StockLevel(models.Model):
+    """
+    How much of an item is at a location. Changed only by transfers, which
+    keep InventoryItem.allocated equal to the item's sum of levels.
+    """
+    item = models.ForeignKey(InventoryItem, on_delete=models.CASCADE, related_name="stock_levels")
+    location = models.ForeignKey(Location, on_delete=models.PROTECT, related_name="stock_levels")
+    quantity = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["item", "location"], name="stock_item_location_uniq"),
+        ]
+        indexes = [
+            # Stock at a location, and items filtered by ?location=.
+            models.Index(fields=["location", "item"], name="stock_location_item_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.item_id} @ {self.location_id}: {self.quantity}"
+
+
+class InventoryItemTombstone(models.Model):
+    """
+    Left behind by a deleted item so delta sync can tell clients to drop it.
+    Kept for INVENTORY_SYNC["TOMBSTONE_DAYS"] (see compact_change_logs).
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="item_tombstones")
+    # Not a foreign key: the item row is gone.
+    item_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "deleted_at"], name="tombstone_user_deleted_idx"),
+            models.Index(fields=["deleted_at"], name="tombstone_deleted_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.item_id} deleted {self.deleted_at:%Y-%m-%d %H:%M}"
+
+
 class InventoryChangeLog(models.Model):
     item = models.ForeignKey(InventoryItem, on_delete=models.CASCADE, related_name="changes")
     user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
+    # "stock" rows are one side of a transfer: old/new values are the stock
+    # at `location` (null: the item's unassigned stock); the item total is unchanged.
     field_changed = models.CharField(
         max_length=50,
-        choices=[("quantity", "Quantity"), ("price", "Price")]
+        choices=[("quantity", "Quantity"), ("price", "Price"), ("stock", "Stock at location")]
     )
     change_type = models.CharField(
         max_length=20,
-        choices=[("restock", "Restock"), ("sale", "Sale"), ("increase", "Increase"), ("decrease", "Decrease")]
+        choices=[
+            ("restock", "Restock"), ("sale", "Sale"), ("increase", "Increase"), ("decrease", "Decrease"),
+            ("transfer_in", "Transfer in"), ("transfer_out", "Transfer out"),
+        ]
     )
+    location = models.ForeignKey("Location", on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
     old_value = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
     new_value = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
     quantity_changed = models.IntegerField(null=True, blank=True)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Set when the change happens, not when the row is written (see ChangeLogBuffer).
+    timestamp = models.DateTimeField(default=timezone.now, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["item", "timestamp"], name="changelog_item_ts_idx"),
+            models.Index(fields=["timestamp"], name="changelog_ts_idx"),
+        ]
 
     def __str__(self):
         return f"{self.item.name} - {self.field_changed} {self.change_type}"
+
+
+class InventoryChangeRollup(models.Model):
+    """
+    One item's change-log activity for one day, written by compact_change_logs
+    when the raw rows age out of the retention window.
+    """
+    item = models.ForeignKey(InventoryItem, on_delete=models.CASCADE, related_name="rollups")
+    day = models.DateField()
+    quantity_delta = models.IntegerField(default=0)
+    quantity_events = models.PositiveIntegerField(default=0)
+    price_events = models.PositiveIntegerField(default=0)
+    min_price = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    max_price = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    close_price = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    last_timestamp = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["item", "day"], name="rollup_item_day_uniq"),
+        ]
+        indexes = [
+            models.Index(fields=["day"], name="rollup_day_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.item_id} {self.day}: {self.quantity_delta:+d}"
+
+
+class InventorySnapshot(models.Model):
+    """
+    An item's quantity and price at `taken_at`. Point-in-time (as_of) queries
+    start from the latest snapshot and only read the change logs after it.
+    """
+    item = models.ForeignKey(InventoryItem, on_delete=models.CASCADE, related_name="snapshots")
+    taken_at = models.DateTimeField()
+    quantity = models.PositiveIntegerField()
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["item", "taken_at"], name="snapshot_item_taken_idx"),
+            # Finds where complete history resumes after compaction (snapshots.history_start).
+            models.Index(fields=["taken_at"], name="snapshot_taken_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.item_id} @ {self.taken_at:%Y-%m-%d %H:%M}: {self.quantity}"
+
+
+class StockSummary(models.Model):
+    """
+    Running totals per (owner, category), kept current by the item write paths.
+    Rows are additive: a bucket may be split over several rows (e.g. after its
+    category is deleted), so readers always SUM them.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="stock_summaries")
+    category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True)
+    item_count = models.IntegerField(default=0)
+    total_quantity = models.BigIntegerField(default=0)
+    total_value = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "category"], name="summary_user_category_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}/{self.category_id}: {self.item_count} items"
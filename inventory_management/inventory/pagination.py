@@ -0,0 +1,152 @@
+from django.core.paginator import InvalidPage
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination, PageNumberPagination, _reverse_ordering
+from rest_framework.utils.urls import remove_query_param
+
+
+class AsyncPageNumberPagination(PageNumberPagination):
+    """
+    PageNumberPagination that async views can await: apaginate_queryset()
+    runs the COUNT and the page query with the async ORM.
+    """
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        paginator = self.django_paginator_class(queryset, page_size)
+        paginator.count = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            raise NotFound(self.invalid_page_message.format(page_number=page_number, message=str(exc)))
+        self.page.object_list = [row async for row in self.page.object_list]
+
+        if paginator.num_pages > 1 and self.template is not None:
+            self.display_page_controls = True
+        return list(self.page)
+
+
+class ItemPagination(AsyncPageNumberPagination):
+    page_size_query_param = "page_size"
+    max_page_size = 500
+
+
+class AsyncCursorPagination(CursorPagination):
+    """
+    CursorPagination with apaginate_queryset(), the same keyset logic with
+    the page read by the async ORM.
+    """
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        offset, reverse, current_position = self.cursor or (0, False, None)
+
+        queryset = queryset.order_by(*(_reverse_ordering(self.ordering) if reverse else self.ordering))
+        if current_position is not None:
+            order = self.ordering[0]
+            # (cursor reversed) XOR (ordering reversed) walks towards smaller values.
+            lookup = "lt" if self.cursor.reverse != order.startswith("-") else "gt"
+            queryset = queryset.filter(**{f"{order.lstrip('-')}__{lookup}": current_position})
+
+        results = [row async for row in queryset[offset:offset + self.page_size + 1]]
+        self.page = results[:self.page_size]
+        has_following = len(results) > len(self.page)
+        following = self._get_position_from_instance(results[-1], self.ordering) if has_following else None
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = current_position is not None or offset > 0
+            self.has_previous = has_following
+            if self.has_next:
+                self.next_position = current_position
+            if self.has_previous:
+                self.previous_position = following
+        else:
+            self.has_next = has_following
+            self.has_previous = current_position is not None or offset > 0
+            if self.has_next:
+                self.next_position = following
+            if self.has_previous:
+                self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+
+class ChangeLogCursorPagination(AsyncCursorPagination):
+    """
+    Cursor pagination for change-log feeds (newest first, ties by id).
+    The cursor holds the timestamp of the page's boundary row plus a small
+    offset past rows sharing that timestamp (DRF's CursorPagination), so a
+    page is an index seek on timestamp rather than OFFSET over the whole
+    feed, and no COUNT(*) is run over the log table.
+    """
+    ordering = ("-timestamp", "-id")
+    page_size_query_param = "page_size"
+    max_page_size = 500
+
+
+class ChangeRollupCursorPagination(AsyncCursorPagination):
+    """
+    Keyset pagination for daily rollups of compacted change logs (newest first).
+    """
+    ordering = ("-day", "-id")
+    cursor_query_param = "rollup_cursor"
+    page_size_query_param = "page_size"
+    max_page_size = 500
+
+
+class StitchedChangeLogPagination:
+    """
+    Live change-log rows (newest first), then the daily rollups of rows that
+    have been compacted away. When the live rows run out, `next` points at
+    the first page of rollups; rollup pages use their own cursor parameter.
+    """
+
+    def __init__(self):
+        self.live = ChangeLogCursorPagination()
+        self.rollups = ChangeRollupCursorPagination()
+
+    def paginate(self, request, logs, rollups, serialize_logs, serialize_rollups, view=None):
+        """
+        serialize_logs/serialize_rollups turn a page of rows into response data.
+        """
+        if self.rollups.cursor_query_param in request.query_params:
+            page = self.rollups.paginate_queryset(rollups, request, view)
+            return self.rollups.get_paginated_response(serialize_rollups(page))
+
+        page = self.live.paginate_queryset(logs, request, view)
+        response = self.live.get_paginated_response(serialize_logs(page))
+        if response.data["next"] is None and rollups.exists():
+            self._link_rollups(request, response)
+        return response
+
+    async def apaginate(self, request, logs, rollups, serialize_logs, serialize_rollups, view=None):
+        """
+        paginate() for async views.
+        """
+        if self.rollups.cursor_query_param in request.query_params:
+            page = await self.rollups.apaginate_queryset(rollups, request, view)
+            return self.rollups.get_paginated_response(serialize_rollups(page))
+
+        page = await self.live.apaginate_queryset(logs, request, view)
+        response = self.live.get_paginated_response(serialize_logs(page))
+        if response.data["next"] is None and await rollups.aexists():
+            self._link_rollups(request, response)
+        return response
+
+    def _link_rollups(self, request, response):
+        self.rollups.base_url = remove_query_param(request.build_absolute_uri(), self.live.cursor_query_param)
+        response.data["next"] = self.rollups.encode_cursor(Cursor(offset=0, reverse=False, position=None))
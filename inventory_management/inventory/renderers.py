@@ -0,0 +1,41 @@
+import csv
+import io
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.renderers import BaseRenderer
+
+
+class CSVRenderer(BaseRenderer):
+    """
+    Selected with ?format=csv. Exports stream their own body,
+    so this only renders small payloads such as error details.
+    """
+    media_type = "text/csv"
+    format = "csv"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        if not isinstance(data, dict):
+            data = {"detail": data}
+        out = io.StringIO()
+        writer = csv.writer(out)
+        writer.writerow(data.keys())
+        writer.writerow(data.values())
+        return out.getvalue().encode(self.charset)
+
+
+class NDJSONRenderer(BaseRenderer):
+    """
+    Newline-delimited JSON, selected with ?format=ndjson.
+    """
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return (json.dumps(data, cls=DjangoJSONEncoder) + "\n").encode(self.charset)
@@ -0,0 +1,114 @@
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import permissions
+
+# Alias the current request reads from; None means the primary.
+_read_alias = ContextVar("inventory_read_alias", default=None)
+
+
+def replica_aliases():
+    return list(getattr(settings, "DATABASE_REPLICAS", ()))
+
+
+def sticky_seconds():
+    return getattr(settings, "REPLICA_STICKY_SECONDS", 10)
+
+
+def current_alias():
+    """
+    The replica the current request reads from, or None for the primary.
+    """
+    return _read_alias.get()
+
+
+def _pin_key(user_id):
+    return f"inventory:replica-pin:{user_id}"
+
+
+def pin_to_primary(user_id):
+    """
+    Send `user_id`'s reads to the primary for REPLICA_STICKY_SECONDS, long
+    enough for the replicas to catch up with their write.
+    """
+    cache.set(_pin_key(user_id), True, sticky_seconds())
+
+
+def _pick(request, pinned):
+    if request.method not in permissions.SAFE_METHODS or pinned:
+        return None
+    return random.choice(replica_aliases())
+
+
+def choose_replica(request):
+    """
+    A replica for this (authenticated) request's reads, or None when it has
+    to read the primary: no replicas, not a safe method, or the user wrote
+    within the sticky window.
+    """
+    if not replica_aliases():
+        return None
+    user = request.user
+    return _pick(request, user.is_authenticated and cache.get(_pin_key(user.pk), False))
+
+
+async def achoose_replica(request):
+    if not replica_aliases():
+        return None
+    user = request.user
+    return _pick(request, user.is_authenticated and await cache.aget(_pin_key(user.pk), False))
+
+
+def read_from(alias):
+    """
+    Route this context's reads to `alias` (None: the primary); returns a
+    token for reset().
+    """
+    return _read_alias.set(alias)
+
+
+def reset(token):
+    _read_alias.reset(token)
+
+
+class ReplicaRouter:
+    """
+    Reads go where the current request was routed (see ReplicaReadsMixin),
+    everything else to the primary. Replicas hold the same data, so
+    relations across aliases are fine.
+    """
+
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+
+class ReplicaReadsMixin:
+    """
+    Viewset mixin: GET/HEAD requests read from a replica unless the user
+    wrote within REPLICA_STICKY_SECONDS; any other request pins its user to
+    the primary for that window (failed writes too, so a client refetching
+    after a 409/412 sees the current row). Streamed bodies are read after
+    the view returns, from the primary.
+    """
+    _replica_token = None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self._replica_token = read_from(choose_replica(request))
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if self._replica_token is not None:
+            reset(self._replica_token)
+            self._replica_token = None
+        unsafe = request.method not in permissions.SAFE_METHODS
+        if unsafe and replica_aliases() and request.user.is_authenticated:
+            pin_to_primary(request.user.pk)
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -0,0 +1,125 @@
+import gzip
+import json
+import os
+from pathlib import Path
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .exports import CHANGE_EXPORT_COLUMNS, plain_value
+from .models import InventoryChangeLog, InventoryChangeRollup, InventoryItemTombstone
+from .snapshots import take_snapshots
+
+DEFAULT_RETENTION_DAYS = 90
+DEFAULT_BATCH_SIZE = 5000
+
+
+def _merge(rollup, log):
+    rollup.last_timestamp = max(rollup.last_timestamp, log.timestamp)
+    if log.field_changed == "quantity":
+        rollup.quantity_events += 1
+        rollup.quantity_delta += log.quantity_changed or 0
+    elif log.field_changed == "price":
+        rollup.price_events += 1
+        price = log.new_value
+        rollup.min_price = price if rollup.min_price is None else min(rollup.min_price, price)
+        rollup.max_price = price if rollup.max_price is None else max(rollup.max_price, price)
+        # Logs are compacted oldest first, so the latest price event closes the day.
+        rollup.close_price = price
+
+
+def _rollup_batch(logs):
+    keys = {(log.item_id, timezone.localdate(log.timestamp)) for log in logs}
+    existing = InventoryChangeRollup.objects.filter(
+        item_id__in={item_id for item_id, _ in keys}, day__in={day for _, day in keys}
+    )
+    rollups = {(r.item_id, r.day): r for r in existing}
+    created = {}
+    for log in logs:
+        key = (log.item_id, timezone.localdate(log.timestamp))
+        rollup = rollups.get(key)
+        if rollup is None:
+            rollup = rollups[key] = created[key] = InventoryChangeRollup(
+                item_id=log.item_id, day=key[1], last_timestamp=log.timestamp
+            )
+        _merge(rollup, log)
+
+    InventoryChangeRollup.objects.bulk_create(created.values())
+    updated = [rollups[key] for key in keys if key not in created]
+    InventoryChangeRollup.objects.bulk_update(updated, [
+        "quantity_delta", "quantity_events", "price_events",
+        "min_price", "max_price", "close_price", "last_timestamp",
+    ])
+
+
+def _archive_line(log):
+    names = [name for name, _ in CHANGE_EXPORT_COLUMNS]
+    row = {
+        "id": log.id,
+        "item": log.item_id,
+        "item_name": log.item.name,
+        "user": log.user_id,
+        "user_name": log.user.username if log.user else None,
+        "user_email": log.user.email if log.user else None,
+        "field_changed": log.field_changed,
+        "change_type": log.change_type,
+        "old_value": log.old_value,
+        "new_value": log.new_value,
+        "quantity_changed": log.quantity_changed,
+        "location": log.location_id,
+        "timestamp": log.timestamp,
+    }
+    return json.dumps({name: plain_value(row[name]) for name in names}) + "\n"
+
+
+def compact_change_logs(before, archive_dir, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Roll InventoryChangeLog rows older than `before` into per-item daily
+    rollups, archive the raw rows to a gzipped NDJSON file (same columns
+    as /changes/export/) and delete them. Each batch is archived and synced
+    to disk before its rows are deleted in one transaction with the
+    rollup updates. Returns (rows compacted, archive path or None).
+    """
+    logs = InventoryChangeLog.objects.filter(timestamp__lt=before).select_related("item", "user")
+    batch = list(logs.order_by("timestamp", "id")[:batch_size])
+    if not batch:
+        return 0, None
+
+    # as_of queries start from a snapshot; pin every item's state at the
+    # cutoff before the logs that lead up to it are deleted.
+    take_snapshots(before)
+
+    archive_dir = Path(archive_dir)
+    archive_dir.mkdir(parents=True, exist_ok=True)
+    stamp = timezone.now().strftime("%Y%m%dT%H%M%S")
+    path = archive_dir / f"changelog-{stamp}-before-{before:%Y%m%dT%H%M%S}.ndjson.gz"
+
+    total = 0
+    with open(path, "ab") as raw, gzip.GzipFile(fileobj=raw, mode="ab") as archive:
+        while batch:
+            archive.write("".join(_archive_line(log) for log in batch).encode("utf-8"))
+            archive.flush()
+            raw.flush()
+            os.fsync(raw.fileno())
+
+            with transaction.atomic():
+                _rollup_batch(batch)
+                InventoryChangeLog.objects.filter(pk__in=[log.pk for log in batch]).delete()
+            total += len(batch)
+
+            last = batch[-1]
+            batch = list(
+                logs.filter(Q(timestamp__gt=last.timestamp) | Q(timestamp=last.timestamp, id__gt=last.id))
+                .order_by("timestamp", "id")[:batch_size]
+            )
+    return total, path
+
+
+
+def prune_tombstones(before):
+    """
+    Delete delta-sync tombstones left before `before`; returns how many.
+    """
+    deleted, _rows = InventoryItemTombstone.objects.filter(deleted_at__lt=before).delete()
+    return deleted
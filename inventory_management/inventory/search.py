@@ -0,0 +1,146 @@
+import re
+
+from django.db import connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from rest_framework import filters
+
+from .models import InventoryItem
+
+# PostgreSQL: tsvector of each item's name and category name, GIN-indexed and
+# kept in sync by triggers (see migration 0015).
+PG_SEARCH_TABLE = "inventory_item_search"
+
+# SQLite: FTS5 table keyed by item id, kept in sync by triggers.
+SQLITE_FTS_TABLE = "inventory_item_fts"
+
+SQLITE_FTS_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS inventory_item_fts_ai AFTER INSERT ON inventory_inventoryitem BEGIN
+        INSERT INTO {SQLITE_FTS_TABLE}(rowid, name, category_name)
+        VALUES (new.id, new.name, (SELECT name FROM inventory_category WHERE id = new.category_id));
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS inventory_item_fts_au AFTER UPDATE OF name, category_id ON inventory_inventoryitem BEGIN
+        UPDATE {SQLITE_FTS_TABLE}
+        SET name = new.name,
+            category_name = (SELECT name FROM inventory_category WHERE id = new.category_id)
+        WHERE rowid = new.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS inventory_item_fts_ad AFTER DELETE ON inventory_inventoryitem BEGIN
+        DELETE FROM {SQLITE_FTS_TABLE} WHERE rowid = old.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS inventory_category_fts_au AFTER UPDATE OF name ON inventory_category BEGIN
+        UPDATE {SQLITE_FTS_TABLE} SET category_name = new.name
+        WHERE rowid IN (SELECT id FROM inventory_inventoryitem WHERE category_id = new.id);
+    END
+    """,
+]
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def install_sqlite_search_triggers(cursor):
+    # Migrations use their own frozen copy (migrations/_search_schema.py).
+    for statement in SQLITE_FTS_TRIGGERS:
+        cursor.execute(statement)
+
+
+def search_words(terms):
+    """
+    The words of search terms, as matched against the full-text index.
+    """
+    return [word for term in terms for word in _WORD.findall(term)]
+
+
+def _fts5_query(words):
+    # Every word must match (in any column), each as a prefix.
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def _tsquery(words):
+    # Same semantics for to_tsquery: every word, each as a prefix.
+    return " & ".join(f"{word}:*" for word in words)
+
+
+def matching_item_ids(words, vendor):
+    """
+    Subquery of ids of items whose name or category matches every word.
+    """
+    if vendor == "sqlite":
+        return RawSQL(f"SELECT rowid FROM {SQLITE_FTS_TABLE} WHERE {SQLITE_FTS_TABLE} MATCH %s", [_fts5_query(words)])
+    return RawSQL(
+        f"SELECT item_id FROM {PG_SEARCH_TABLE} WHERE document @@ to_tsquery('simple', %s)", [_tsquery(words)]
+    )
+
+
+class ItemSearchFilter(filters.SearchFilter):
+    """
+    ?search= over item and category names, answered from a full-text index:
+    a PostgreSQL tsvector table (GIN) or SQLite FTS5. Words are prefix-matched and
+    results come back by relevance unless ?ordering= is given. Other
+    databases fall back to SearchFilter's icontains lookups.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        words = search_words(self.get_search_terms(request))
+        vendor = connections[queryset.db].vendor
+        if not words or vendor not in ("sqlite", "postgresql"):
+            return super().filter_queryset(request, queryset, view)
+        if vendor == "sqlite":
+            return self._sqlite_search(queryset, words)
+        return self._postgres_search(queryset, words)
+
+    def _sqlite_search(self, queryset, words):
+        table = InventoryItem._meta.db_table
+        # The unary + hides the rowid from FTS5's planner hooks, forcing the
+        # plan "full-text match first, then item by primary key". Otherwise
+        # SQLite may walk the user's items and run the MATCH once per row.
+        return queryset.extra(
+            tables=[SQLITE_FTS_TABLE],
+            where=[f"{table}.id = +{SQLITE_FTS_TABLE}.rowid", f"{SQLITE_FTS_TABLE} MATCH %s"],
+            params=[_fts5_query(words)],
+            select={"search_rank": f"{SQLITE_FTS_TABLE}.rank"},
+            order_by=["search_rank"],
+        )
+
+    def _postgres_search(self, queryset, words):
+        table = InventoryItem._meta.db_table
+        query = _tsquery(words)
+        return queryset.extra(
+            tables=[PG_SEARCH_TABLE],
+            where=[
+                f"{table}.id = {PG_SEARCH_TABLE}.item_id",
+                f"{PG_SEARCH_TABLE}.document @@ to_tsquery('simple', %s)",
+            ],
+            params=[query],
+            select={"search_rank": f"ts_rank({PG_SEARCH_TABLE}.document, to_tsquery('simple', %s))"},
+            select_params=[query],
+            order_by=["-search_rank", "id"],
+        )
+
+
+class ChangeLogSearchFilter(filters.SearchFilter):
+    """
+    ?search= for change logs: each word matches the item (through the item
+    search index), the username prefix, or the field/change type exactly.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        words = search_words(self.get_search_terms(request))
+        vendor = connections[queryset.db].vendor
+        if not words or vendor not in ("sqlite", "postgresql"):
+            return super().filter_queryset(request, queryset, view)
+        for word in words:
+            queryset = queryset.filter(
+                Q(item__in=matching_item_ids([word], vendor))
+                | Q(user__username__istartswith=word)
+                | Q(field_changed=word.lower())
+                | Q(change_type=word.lower())
+            )
+        return queryset
@@ -1,5 +1,6 @@
 from rest_framework import serializers
-from .models import InventoryItem, Category, InventoryChangeLog
+from .fastpath import SparseFieldsMixin
+from .models import InventoryItem, Category, InventoryChangeLog, InventoryChangeRollup, Location, StockLevel
 
 
 class CategorySerializer(serializers.ModelSerializer):
@@ -8,26 +9,68 @@ class CategorySerializer(serializers.ModelSerializer):
         fields = "__all__"
 
 
-class InventoryItemSerializer(serializers.ModelSerializer):
+# Upper bound of the quantity column (PositiveIntegerField) on PostgreSQL and MySQL.
+MAX_QUANTITY = 2**31 - 1
+
+ALLOCATED_STOCK_ERROR = "{allocated} are held at locations; transfer them out before lowering the quantity."
+
+
+class InventoryItemSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     user_name = serializers.CharField(source="user.username", read_only=True)
     category_name = serializers.CharField(source="category.name", read_only=True)
 
-
     class Meta:
         model = InventoryItem
         fields = [
             "id",
             "name",
+            "sku",
             "description",
             "quantity",
+            "allocated",
+            "reorder_point",
             "price",
             "user_name",      # ✅ added
             "category",
             "category_name",  # ✅ added
              "date_added",
             "last_updated",
+            "version",
         ]
-        read_only_fields = ("user", "date_added", "last_updated")
+        read_only_fields = ("user", "date_added", "last_updated", "version", "allocated")
+
+    def validate_quantity(self, value):
+        if self.instance is not None and value < self.instance.allocated:
+            raise serializers.ValidationError(ALLOCATED_STOCK_ERROR.format(allocated=self.instance.allocated))
+        return value
+
+    def validate_sku(self, value):
+        if not value:
+            return None
+        owner = self.instance.user if self.instance else self.context["request"].user
+        clash = InventoryItem.objects.filter(user=owner, sku=value)
+        if self.instance:
+            clash = clash.exclude(pk=self.instance.pk)
+        if clash.exists():
+            raise serializers.ValidationError("You already have an item with this SKU.")
+        return value
+
+
+def duplicate_sku_errors(rows):
+    """
+    Per-index errors for rows of one bulk request that share a SKU: they
+    would each pass validate_sku() and then clash with each other on insert.
+    """
+    indexes = {}
+    for index, row in enumerate(rows):
+        sku = row.get("sku") if isinstance(row, dict) else None
+        if isinstance(sku, str) and sku.strip():
+            indexes.setdefault(sku.strip(), []).append(index)
+    return {
+        index: {"sku": ["Duplicate SKU in request."]}
+        for same in indexes.values() if len(same) > 1 for index in same
+    }
+
 
 # class InventoryItemSerializer(serializers.ModelSerializer):
 #     user_name = serializers.CharField(source="user.username", read_only=True)
@@ -37,7 +80,7 @@ class InventoryItemSerializer(serializers.ModelSerializer):
 #         read_only_fields = ("user", "date_added", "last_updated")
 
 
-class InventoryChangeLogSerializer(serializers.ModelSerializer):
+class InventoryChangeLogSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     item_name = serializers.CharField(source="item.name", read_only=True)
     user_name = serializers.CharField(source="user.username", read_only=True)
     user_email = serializers.EmailField(source="user.email", read_only=True)
@@ -45,3 +88,112 @@ class InventoryChangeLogSerializer(serializers.ModelSerializer):
     class Meta:
         model = InventoryChangeLog
         fields = "__all__"
+
+
+class InventoryChangeRollupSerializer(serializers.ModelSerializer):
+    """
+    A day of compacted change-log rows, as stitched into history/changes feeds.
+    """
+    kind = serializers.SerializerMethodField()
+    item_name = serializers.CharField(source="item.name", read_only=True)
+
+    class Meta:
+        model = InventoryChangeRollup
+        fields = [
+            "kind",
+            "id",
+            "item",
+            "item_name",
+            "day",
+            "quantity_delta",
+            "quantity_events",
+            "price_events",
+            "min_price",
+            "max_price",
+            "close_price",
+            "last_timestamp",
+        ]
+
+    def get_kind(self, obj):
+        return "daily_rollup"
+
+
+class ItemStateSerializer(serializers.ModelSerializer):
+    """
+    An item's quantity and price at a past instant (see snapshots.with_state_at).
+    """
+    category_name = serializers.CharField(source="category.name", read_only=True)
+    quantity = serializers.IntegerField(source="quantity_at")
+    price = serializers.DecimalField(source="price_at", max_digits=10, decimal_places=2)
+
+    class Meta:
+        model = InventoryItem
+        fields = ["id", "name", "category", "category_name", "quantity", "price"]
+
+
+class StockAdjustmentSerializer(serializers.Serializer):
+    """
+    Signed quantity change: positive = restock, negative = sale.
+    """
+    delta = serializers.IntegerField(min_value=-MAX_QUANTITY, max_value=MAX_QUANTITY)
+
+    def validate_delta(self, value):
+        if value == 0:
+            raise serializers.ValidationError("Delta must be non-zero.")
+        return value
+
+
+class LocationSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Location
+        fields = ["id", "name"]
+
+    def validate_name(self, value):
+        owner = self.instance.user if self.instance else self.context["request"].user
+        clash = Location.objects.filter(user=owner, name=value)
+        if self.instance:
+            clash = clash.exclude(pk=self.instance.pk)
+        if clash.exists():
+            raise serializers.ValidationError("You already have a location with this name.")
+        return value
+
+
+class StockLevelSerializer(serializers.ModelSerializer):
+    item_name = serializers.CharField(source="item.name", read_only=True)
+    location_name = serializers.CharField(source="location.name", read_only=True)
+
+    class Meta:
+        model = StockLevel
+        fields = ["item", "item_name", "location", "location_name", "quantity"]
+
+
+class TransferSerializer(serializers.Serializer):
+    """
+    One line of a transfer: move `quantity` of `item` between locations;
+    a null location is the item's unassigned stock.
+    """
+    item = serializers.IntegerField()
+    from_location = serializers.IntegerField(allow_null=True)
+    to_location = serializers.IntegerField(allow_null=True)
+    quantity = serializers.IntegerField(min_value=1)
+
+    def validate(self, attrs):
+        if attrs["from_location"] == attrs["to_location"]:
+            raise serializers.ValidationError({"to_location": ["Must differ from from_location."]})
+        return attrs
+
+
+class StockTotalsSerializer(serializers.Serializer):
+    item_count = serializers.IntegerField()
+    total_quantity = serializers.IntegerField()
+    total_value = serializers.DecimalField(max_digits=20, decimal_places=2)
+
+
+class CategoryStockTotalsSerializer(StockTotalsSerializer):
+    category = serializers.IntegerField(allow_null=True)
+    category_name = serializers.CharField(allow_null=True)
+
+
+class UserStockTotalsSerializer(StockTotalsSerializer):
+    user = serializers.IntegerField()
+    user_name = serializers.CharField()
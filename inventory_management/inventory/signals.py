@@ -0,0 +1,49 @@
+from django.contrib.auth.models import User
+from django.db import connections
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import cache
+from .models import Category, InventoryItem, InventoryItemTombstone
+from .search import SQLITE_FTS_TABLE, install_sqlite_search_triggers
+
+
+@receiver([post_save, post_delete], sender=Category)
+def category_changed(sender, instance, **kwargs):
+    # Item lists show category names, so they are invalidated too.
+    cache.bump(cache.CATEGORIES, cache.ITEMS)
+
+
+@receiver(pre_delete, sender=Category)
+def category_deleted(sender, instance, **kwargs):
+    # SET_NULL clears the items' category with a bare UPDATE; mark them
+    # changed so delta sync sends them again.
+    InventoryItem.objects.filter(category=instance).update(version=F("version") + 1, last_updated=timezone.now())
+
+
+@receiver([post_save, post_delete], sender=InventoryItem)
+def item_changed(sender, instance, **kwargs):
+    cache.bump_items(instance.user_id)
+
+
+@receiver(post_delete, sender=InventoryItem)
+def item_deleted(sender, instance, origin=None, **kwargs):
+    """
+    Leave a tombstone for delta sync, however the item was deleted (API,
+    admin, queryset delete, cascades) -- except along with its owner, whose
+    tombstones are deleted too.
+    """
+    if isinstance(origin, User) or getattr(origin, "model", None) is User:
+        return
+    InventoryItemTombstone.objects.create(user_id=instance.user_id, item_id=instance.pk)
+
+
+def restore_search_triggers(sender, using, plan=None, **kwargs):
+    # Migrations that rebuild inventory_inventoryitem on SQLite drop its FTS triggers.
+    connection = connections[using]
+    if connection.vendor != "sqlite" or SQLITE_FTS_TABLE not in connection.introspection.table_names():
+        return
+    with connection.cursor() as cursor:
+        install_sqlite_search_triggers(cursor)
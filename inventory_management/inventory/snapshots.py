@@ -0,0 +1,98 @@
+from datetime import datetime, timezone as dt_timezone
+
+from django.db.models import DecimalField, F, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import InventoryChangeLog, InventoryChangeRollup, InventoryItem, InventorySnapshot
+
+STATE_FIELD = DecimalField(max_digits=12, decimal_places=2)
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def _latest_snapshot(at):
+    return InventorySnapshot.objects.filter(item=OuterRef("pk"), taken_at__lte=at).order_by("-taken_at", "-id")
+
+
+def _latest_logged(field, at):
+    # Only the logs between the item's snapshot and `at`; the newest one
+    # holds the value in effect at `at`.
+    logs = InventoryChangeLog.objects.filter(
+        item=OuterRef("pk"),
+        field_changed=field,
+        timestamp__lte=at,
+        timestamp__gt=Coalesce(OuterRef("snapshot_at"), Value(_EPOCH)),
+    )
+    return Subquery(logs.order_by("-timestamp", "-id").values("new_value")[:1], output_field=STATE_FIELD)
+
+
+def history_start():
+    """
+    The earliest instant with_state_at() can reconstruct, or None while no
+    change logs have been compacted. Logs up to the newest compacted change
+    only survive as daily rollups; complete history resumes at the first
+    snapshot taken after it (compaction pins one at its cutoff).
+    """
+    # Two index seeks: the latest rollup day holds the newest compacted change.
+    compacted = (
+        InventoryChangeRollup.objects.order_by("-day", "-last_timestamp").values_list("last_timestamp", flat=True)
+        .first()
+    )
+    if compacted is None:
+        return None
+    pinned = InventorySnapshot.objects.filter(taken_at__gte=compacted).order_by("taken_at")
+    return pinned.values_list("taken_at", flat=True).first() or compacted
+
+
+def with_state_at(items, at):
+    """
+    Annotate items with `quantity_at` and `price_at`, their values at `at`:
+    the latest snapshot taken at or before `at`, overridden by the newest
+    change log between that snapshot and `at`. Items added after `at` are
+    left out; deleted items are gone along with their logs.
+    """
+    snapshot = _latest_snapshot(at)
+    items = items.filter(date_added__lte=at).annotate(
+        snapshot_at=Subquery(snapshot.values("taken_at")[:1]),
+        snapshot_quantity=Subquery(snapshot.values("quantity")[:1]),
+        snapshot_price=Subquery(snapshot.values("price")[:1]),
+        logged_quantity=_latest_logged("quantity", at),
+        logged_price=_latest_logged("price", at),
+    )
+    return items.annotate(
+        quantity_at=Coalesce("logged_quantity", "snapshot_quantity", Value(0), output_field=STATE_FIELD),
+        price_at=Coalesce("logged_price", "snapshot_price", Value(0), output_field=STATE_FIELD),
+    )
+
+
+def take_snapshots(at=None, batch_size=1000):
+    """
+    Snapshot every item whose state changed since its latest snapshot;
+    returns the number of snapshots written.
+
+    Without `at`, snapshots are the items' current rows (items updated since
+    their last snapshot). With `at`, they are reconstructed from the change
+    logs, for items with logged changes since their last snapshot; compaction
+    uses this to pin the state at its cutoff before deleting older logs.
+    """
+    if at is None:
+        at = timezone.now()
+        latest = Subquery(_latest_snapshot(at).values("taken_at")[:1])
+        items = InventoryItem.objects.annotate(snapshot_at=latest).filter(
+            Q(snapshot_at__isnull=True) | Q(last_updated__gt=F("snapshot_at"))
+        )
+        rows = items.values_list("pk", "quantity", "price")
+    else:
+        items = with_state_at(InventoryItem.objects.all(), at).filter(
+            Q(snapshot_at__isnull=True) | Q(logged_quantity__isnull=False) | Q(logged_price__isnull=False)
+        )
+        rows = items.values_list("pk", "quantity_at", "price_at")
+
+    written, batch = 0, []
+    for pk, quantity, price in rows.iterator(chunk_size=batch_size):
+        batch.append(InventorySnapshot(item_id=pk, taken_at=at, quantity=int(quantity), price=price))
+        if len(batch) >= batch_size:
+            written += len(InventorySnapshot.objects.bulk_create(batch))
+            batch = []
+    written += len(InventorySnapshot.objects.bulk_create(batch))
+    return written
@@ -0,0 +1,96 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Subquery, Sum
+
+from .models import InventoryItem, StockSummary
+
+VALUE_FIELD = DecimalField(max_digits=20, decimal_places=2)
+
+
+def item_state(item, quantity=None):
+    """
+    The parts of an item that feed the summary: (user_id, category_id, quantity, price).
+    `quantity` stands in for item.quantity, e.g. the level before an F() update.
+    """
+    return (item.user_id, item.category_id, item.quantity if quantity is None else quantity, item.price)
+
+
+def record_stock_changes(changes):
+    """
+    Apply (old_state, new_state) pairs to StockSummary; either side may be None
+    for creations/deletions. Changes are netted per bucket first, so a batch
+    issues one UPDATE per (user, category) touched.
+    """
+    deltas = defaultdict(lambda: [0, 0, Decimal("0")])
+    for old, new in changes:
+        for state, sign in ((old, -1), (new, 1)):
+            if state is None:
+                continue
+            user_id, category_id, quantity, price = state
+            delta = deltas[(user_id, category_id)]
+            delta[0] += sign
+            delta[1] += sign * quantity
+            delta[2] += sign * quantity * Decimal(price)
+
+    for (user_id, category_id), (count, quantity, value) in deltas.items():
+        if count or quantity or value:
+            _apply(user_id, category_id, count, quantity, value)
+
+
+def _apply(user_id, category_id, count, quantity, value):
+    bucket = StockSummary.objects.filter(user_id=user_id, category_id=category_id)
+    updated = StockSummary.objects.filter(pk=Subquery(bucket.order_by("pk").values("pk")[:1])).update(
+        item_count=F("item_count") + count,
+        total_quantity=F("total_quantity") + quantity,
+        total_value=F("total_value") + value,
+    )
+    if not updated:
+        StockSummary.objects.create(
+            user_id=user_id, category_id=category_id,
+            item_count=count, total_quantity=quantity, total_value=value,
+        )
+
+
+def live_totals():
+    """
+    Aggregate straight from InventoryItem: {(user_id, category_id): (count, quantity, value)}.
+    """
+    rows = InventoryItem.objects.values("user_id", "category_id").annotate(
+        item_count=Count("id"),
+        total_quantity=Sum("quantity"),
+        total_value=Sum(ExpressionWrapper(F("quantity") * F("price"), output_field=VALUE_FIELD)),
+    ).order_by()
+    return {
+        (row["user_id"], row["category_id"]): (row["item_count"], row["total_quantity"], row["total_value"])
+        for row in rows
+    }
+
+
+def stored_totals():
+    """
+    Current StockSummary contents in the same shape as live_totals(), empty buckets omitted.
+    """
+    rows = StockSummary.objects.values("user_id", "category_id").annotate(
+        count=Sum("item_count"), quantity=Sum("total_quantity"), value=Sum("total_value"),
+    ).order_by()
+    return {
+        (row["user_id"], row["category_id"]): (row["count"], row["quantity"], row["value"])
+        for row in rows
+        if row["count"] or row["quantity"] or row["value"]
+    }
+
+
+def rebuild_summary():
+    """
+    Replace StockSummary with a fresh aggregate of InventoryItem.
+    Call inside a transaction.
+    """
+    StockSummary.objects.all().delete()
+    StockSummary.objects.bulk_create(
+        StockSummary(
+            user_id=user_id, category_id=category_id,
+            item_count=count, total_quantity=quantity, total_value=value,
+        )
+        for (user_id, category_id), (count, quantity, value) in live_totals().items()
+    )
@@ -1,3 +1,1394 @@
-from django.test import TestCase
+import csv
+import gzip
+import io
+import json
+import os
+import tempfile
+import threading
+from unittest import mock, skipUnless
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import OperationalError, connection, connections, reset_queries
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient, APITestCase, APITransactionTestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.throttling import LocalBuckets, buckets
+from .admin import EstimatedCountPaginator
+from .changelog import ChangeLogBuffer
+from .checks import check_shared_cache
+from .metrics import MetricsRegistry
+from .models import (
+    Category, InventoryItem, InventoryChangeLog, InventoryChangeRollup, InventoryItemTombstone, InventorySnapshot,
+    Location, StockLevel,
+)
+from .serializers import InventoryChangeLogSerializer, InventoryItemSerializer
+from .summary import live_totals, stored_totals
+from .sync import encode_cursor
+
+
+class QueryCountTests(APITestCase):
+    """
+    Each endpoint must run a fixed number of queries, however many rows it returns.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user("owner", email="owner@example.com")
+        self.admin = User.objects.create_user("admin", is_staff=True)
+        self.item = InventoryItem.objects.create(user=self.owner, name="First", quantity=1, price=2)
+        self._create_rows(1)
+
+    def _create_rows(self, count):
+        """
+        Add `count` categories, items and logs, plus `count` more logs on self.item.
+        """
+        for i in range(count):
+            category = Category.objects.create(name=f"Category {Category.objects.count()}")
+            item = InventoryItem.objects.create(
+                user=self.owner, name=f"Item {i}", quantity=1, price=2, category=category
+            )
+            for logged in (item, self.item):
+                InventoryChangeLog.objects.create(
+                    item=logged, user=self.owner, field_changed="quantity",
+                    change_type="restock", old_value=0, new_value=1, quantity_changed=1,
+                )
+
+    def assertConstantQueries(self, url, expected, user=None):
+        self.client.force_authenticate(user or self.owner)
+        with self.assertNumQueries(expected):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        first = len(response.data["results"]) if "results" in response.data else None
+
+        self._create_rows(8)
+        with self.assertNumQueries(expected):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        if first is not None:
+            self.assertGreater(len(response.data["results"]), first)
+
+    def test_item_list(self):
+        self.assertConstantQueries("/api/inventory/items/", 2)
+
+    def test_item_list_admin(self):
+        self.assertConstantQueries("/api/inventory/items/", 2, user=self.admin)
+
+    def test_item_detail(self):
+        self.assertConstantQueries(f"/api/inventory/items/{self.item.pk}/", 1)
+
+    def test_low_stock(self):
+        self.assertConstantQueries("/api/inventory/items/low_stock/", 2)
+
+    def test_low_stock_threshold(self):
+        self.assertConstantQueries("/api/inventory/items/low_stock/?threshold=5", 2)
+
+    # The last page of a change feed also checks for daily rollups (one cheap query);
+    # page_size keeps every row on that last page.
+    def test_history(self):
+        self.assertConstantQueries(f"/api/inventory/items/{self.item.pk}/history/", 3)
+
+    def test_audit(self):
+        self.assertConstantQueries("/api/inventory/items/audit/?page_size=100", 2)
+
+    def test_audit_admin(self):
+        self.assertConstantQueries("/api/inventory/items/audit/?page_size=100", 2, user=self.admin)
+
+    def test_change_list(self):
+        self.assertConstantQueries("/api/inventory/changes/?page_size=100", 2)
+
+    def test_change_detail(self):
+        log = InventoryChangeLog.objects.first()
+        self.assertConstantQueries(f"/api/inventory/changes/{log.pk}/", 1)
+
+    def test_category_list(self):
+        self.assertConstantQueries("/api/inventory/categories/", 2)
+
+
+class SparseFieldsTests(APITestCase):
+    """
+    List pages rendered from values() rows must match the serializer's
+    output for model instances; ?fields= narrows both.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user("owner", email="owner@example.com")
+        self.client.force_authenticate(self.owner)
+        tools = Category.objects.create(name="Tools")
+        for i, (category, price) in enumerate([(tools, "1.50"), (None, "2.00"), (tools, "99999.99")]):
+            response = self.client.post("/api/inventory/items/", {
+                "name": f"hammer {i}", "quantity": i + 1, "price": price,
+                "category": category and category.pk, "sku": f"S{i}" if i else "",
+            }, format="json")
+            self.assertEqual(response.status_code, 201, response.data)
+        # A log whose user was deleted renders without user_name/user_email.
+        InventoryChangeLog.objects.filter(pk=InventoryChangeLog.objects.order_by("id").first().pk).update(user=None)
+
+    def test_values_rows_match_serializer(self):
+        response = self.client.get("/api/inventory/items/?ordering=id")
+        expected = InventoryItemSerializer(InventoryItem.objects.order_by("id"), many=True).data
+        self.assertEqual(response.json()["results"], [dict(row) for row in expected])
+
+        response = self.client.get("/api/inventory/changes/")
+        logs = InventoryChangeLog.objects.order_by("-timestamp", "-id")
+        expected = InventoryChangeLogSerializer(logs, many=True).data
+        self.assertEqual(response.json()["results"], [dict(row) for row in expected])
+
+    def test_fields_narrow_the_response(self):
+        rows = self.client.get("/api/inventory/items/?fields=id,name,quantity&ordering=id").data["results"]
+        self.assertEqual([set(row) for row in rows], [{"id", "name", "quantity"}] * 3)
+        item = InventoryItem.objects.order_by("id").first()
+        self.assertEqual(self.client.get(f"/api/inventory/items/{item.pk}/?fields=name").data, {"name": "hammer 0"})
+        rows = self.client.get("/api/inventory/changes/?fields=id,new_value&change_type=restock").data["results"]
+        self.assertEqual({tuple(row) for row in rows}, {("id", "new_value")})
+
+    def test_unknown_field_is_rejected(self):
+        response = self.client.get("/api/inventory/items/?fields=id,bogus")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("bogus", str(response.data["fields"]))
+
+    def test_fields_keep_query_count(self):
+        for url in ["/api/inventory/items/?fields=id,name", "/api/inventory/items/?fields=id,category_name"]:
+            cache.clear()
+            with self.assertNumQueries(2):
+                self.assertEqual(self.client.get(url).status_code, 200)
+
+
+class ExportTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user("owner", email="owner@example.com")
+        tools = Category.objects.create(name="Tools")
+        self.client.force_authenticate(self.owner)
+        for i in range(5):
+            self.client.post("/api/inventory/items/", {
+                "name": f"Item {i}", "quantity": i, "price": "2.50", "category": tools.pk if i % 2 else None,
+            }, format="json")
+        other = User.objects.create_user("other")
+        InventoryItem.objects.create(user=other, name="Theirs", quantity=1, price=1)
+
+    def _body(self, response):
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content).decode()
+
+    def test_items_csv_streams_the_filtered_list_in_chunks(self):
+        with mock.patch("inventory.exports.CHUNK_SIZE", 2):
+            response = self.client.get("/api/inventory/items/export/", {"format": "csv"})
+            chunks = list(response.streaming_content)
+        self.assertEqual(len(chunks), 3)  # header + 5 rows, two lines a chunk
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="items.csv"')
+        rows = list(csv.DictReader(io.StringIO(b"".join(chunks).decode())))
+        self.assertEqual([row["name"] for row in rows], [f"Item {i}" for i in range(5)])
+        detail = self.client.get(f"/api/inventory/items/{rows[1]['id']}/").data
+        for column in ("price", "category_name", "date_added", "user_name"):
+            self.assertEqual(rows[1][column], str(detail[column]))
+
+        response = self.client.get("/api/inventory/items/export/", {"format": "csv", "category": detail["category"]})
+        self.assertEqual(len(self._body(response).splitlines()), 3)
+
+    def test_changes_ndjson_is_scoped_to_the_user(self):
+        body = self._body(self.client.get("/api/inventory/changes/export/", {"format": "ndjson"}))
+        logs = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual(len(logs), InventoryChangeLog.objects.filter(item__user=self.owner).count())
+        self.assertEqual({log["user_email"] for log in logs}, {"owner@example.com"})
+        self.assertEqual(logs[0]["timestamp"], self.client.get("/api/inventory/changes/").data["results"][0]["timestamp"])
+
+
+class RequestMetricsTests(APITestCase):
+    LIST = '{view="item-list",action="list",method="GET"}'
+
+    def setUp(self):
+        cache.clear()
+        self.registry = MetricsRegistry(slow_log_size=2)
+        for target in ("inventory.middleware.registry", "inventory.metrics.registry"):
+            patcher = mock.patch(target, self.registry)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.owner = User.objects.create_user("owner")
+        self.staff = User.objects.create_user("staff", is_staff=True)
+        for n in range(3):
+            InventoryItem.objects.create(user=self.owner, name=f"Item {n}", quantity=n, price=1)
+        self.client.force_authenticate(self.owner)
+
+    def _samples(self):
+        return dict(line.rsplit(" ", 1) for line in self.registry.render().splitlines() if not line.startswith("#"))
+
+    def _bearer(self, token):
+        return {"HTTP_AUTHORIZATION": f"Bearer {token}"}
+
+    def test_sync_requests(self):
+        reset_queries()  # as request_started will, so the capture lines up
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/inventory/items/")
+        executed = len(queries)
+        self.client.get("/admin/login/")  # outside PATH_PREFIXES
+        samples = self._samples()
+        requests = 'inventory_http_requests_total{view="item-list",action="list",method="GET",status="200"}'
+        self.assertEqual(samples[requests], "1")
+        self.assertEqual(samples[f"inventory_http_db_queries_count{self.LIST}"], "1")
+        self.assertEqual(samples[f"inventory_http_db_queries_sum{self.LIST}"], repr(float(executed)))
+        size = repr(float(len(response.content)))
+        self.assertEqual(samples[f"inventory_http_response_size_bytes_sum{self.LIST}"], size)
+        self.assertEqual(samples[f'inventory_http_db_queries_bucket{self.LIST[:-1]},le="+Inf"}}'], "1")
+        self.assertFalse([key for key in samples if "admin" in key])
+
+    def test_streamed_responses_are_measured_to_the_last_chunk(self):
+        response = self.client.get("/api/inventory/items/export/?format=csv")
+        self.assertEqual(self._samples(), {})
+        body = b"".join(response.streaming_content)
+        labels = '{view="item-export",action="export",method="GET"}'
+        samples = self._samples()
+        self.assertEqual(samples[f"inventory_http_response_size_bytes_sum{labels}"], repr(float(len(body))))
+        self.assertNotEqual(samples[f"inventory_http_db_queries_sum{labels}"], "0.0")
+
+    async def test_async_requests(self):
+        auth = {"Authorization": f"Bearer {AccessToken.for_user(self.owner)}"}
+        response = await self.async_client.get("/api/inventory/async/items/", headers=auth)
+        labels = '{view="async-item-list",action="list",method="GET"}'
+        samples = self._samples()
+        self.assertEqual(samples[f"inventory_http_request_duration_seconds_count{labels}"], "1")
+        self.assertEqual(samples[f"inventory_http_response_size_bytes_sum{labels}"], repr(float(len(response.content))))
+        self.assertNotEqual(samples[f"inventory_http_db_queries_sum{labels}"], "0.0")
+
+    def test_large_sums_keep_every_digit(self):
+        self.registry.observe((("view", "v"), ("action", "a"), ("method", "GET")), 200, 123456790, 0, 0, 0)
+        self.assertIn(' 123456790.0\n', self.registry.render())
+
+    @override_settings(INVENTORY_METRICS={**settings.INVENTORY_METRICS, "TOKEN": "s3cret"})
+    def test_metrics_need_the_token_or_staff(self):
+        client = APIClient()
+        self.assertEqual(client.get("/metrics").status_code, 401)
+        self.assertEqual(client.get("/metrics", **self._bearer("wrong")).status_code, 401)
+        self.assertEqual(client.get("/metrics", **self._bearer(AccessToken.for_user(self.owner))).status_code, 403)
+        for token in ("s3cret", AccessToken.for_user(self.staff)):
+            with self.subTest(token=token):
+                response = client.get("/metrics", **self._bearer(token))
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(response["Content-Type"].startswith("text/plain; version=0.0.4"))
+                self.assertIn("# TYPE inventory_http_requests_total counter", response.content.decode())
+        self.assertEqual(client.get("/metrics/slow/", **self._bearer("s3cret")).status_code, 200)
+
+    @override_settings(INVENTORY_METRICS={**settings.INVENTORY_METRICS, "SLOW_REQUEST_MS": 0})
+    def test_slow_requests_are_logged_with_their_sql(self):
+        with self.assertLogs("inventory.slow_requests", "WARNING") as logs:
+            for path in ["/api/inventory/items/", "/api/inventory/categories/", "/api/inventory/changes/"]:
+                self.client.get(path)
+        self.assertEqual(len(logs.records), 3)
+        self.assertIn("Slow request GET /api/inventory/items/", logs.output[0])
+
+        slow = APIClient().get("/metrics/slow/", **self._bearer(AccessToken.for_user(self.staff))).data
+        self.assertEqual(slow["threshold_ms"], 0)
+        durations = [entry["duration_ms"] for entry in slow["requests"]]
+        self.assertEqual((len(durations), durations), (2, sorted(durations, reverse=True)))
+        self.assertTrue(all(entry["queries"] and "sql" in entry["queries"][0] for entry in slow["requests"]))
+
+
+class SharedCacheCheckTests(TestCase):
+    def test_process_local_cache_warns_outside_debug(self):
+        locmem = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+        redis = {"default": {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": "redis://x"}}
+        with override_settings(DEBUG=False, CACHES=locmem):
+            self.assertEqual([warning.id for warning in check_shared_cache(None)], ["inventory.W001"])
+        for overrides in [{"DEBUG": True}, {"CACHE_ALLOW_LOCAL": True}, {"CACHES": redis}]:
+            with self.subTest(**overrides), override_settings(**{"DEBUG": False, "CACHES": locmem, **overrides}):
+                self.assertEqual(check_shared_cache(None), [])
+
+
+class BulkItemTests(APITestCase):
+    url = "/api/inventory/items/bulk/"
+
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user("owner")
+        self.client.force_authenticate(self.owner)
+
+    def _rows(self, count, start=0):
+        return [{"name": f"Item {i}", "quantity": i, "price": "1.50"} for i in range(start, start + count)]
+
+    def test_valid_batch_creates_and_logs_everything(self):
+        response = self.client.post(self.url, self._rows(3), format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["errors"], [])
+        self.assertEqual([row["name"] for row in response.data["results"]], ["Item 0", "Item 1", "Item 2"])
+        self.assertEqual(self.owner.items.count(), 3)
+        # A price log each, and a restock log for the two with stock.
+        self.assertEqual(InventoryChangeLog.objects.filter(field_changed="price").count(), 3)
+        self.assertEqual(InventoryChangeLog.objects.filter(change_type="restock").count(), 2)
+
+        ids = [row["id"] for row in response.data["results"]]
+        response = self.client.patch(self.url, [{"id": pk, "quantity": 10} for pk in ids], format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row["version"] for row in response.data["results"]], [2, 2, 2])
+        self.assertEqual(set(self.owner.items.values_list("quantity", flat=True)), {10})
+
+    def test_mixed_batch_reports_errors_by_index_and_skips_those_rows(self):
+        rows = [self._rows(1)[0], {"name": "No price"}, {"name": "Negative", "price": 1, "quantity": -1}]
+        response = self.client.post(self.url, rows, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([error["index"] for error in response.data["errors"]], [1, 2])
+        self.assertIn("price", response.data["errors"][0]["errors"])
+        self.assertEqual(list(self.owner.items.values_list("name", flat=True)), ["Item 0"])
+
+        item = self.owner.items.get()
+        other = InventoryItem.objects.create(user=User.objects.create_user("other"), name="Theirs", price=1)
+        response = self.client.patch(self.url, [
+            {"id": item.pk, "price": "cheap"}, {"id": other.pk, "price": "2"}, {"id": item.pk, "version": 99},
+            {"price": "2"},
+        ], format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([error["index"] for error in response.data["errors"]], [0, 1, 2, 3])
+        item.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual((item.price, item.version, other.price), (Decimal("1.50"), 1, 1))
+
+    def test_queries_do_not_grow_with_the_batch(self):
+        self.client.post(self.url, self._rows(1, start=1000), format="json")  # creates the summary bucket
+        counts = []
+        for size in (2, 50):
+            with CaptureQueriesContext(connection) as created:
+                response = self.client.post(self.url, self._rows(size, start=len(counts) * 100), format="json")
+            self.assertEqual(response.status_code, 201)
+            patch = [{"id": row["id"], "quantity": 7, "price": "3"} for row in response.data["results"]]
+            with CaptureQueriesContext(connection) as updated:
+                self.assertEqual(self.client.patch(self.url, patch, format="json").status_code, 200)
+            counts.append((len(created), len(updated)))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_duplicate_skus_in_one_batch_are_row_errors(self):
+        rows = [{"name": "A", "price": 1, "sku": "X1"}, {"name": "B", "price": 1, "sku": "X1"}]
+        response = self.client.post(self.url, rows, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([error["index"] for error in response.data["errors"]], [0, 1])
+        self.assertFalse(InventoryItem.objects.exists())
+
+        items = self.client.post(self.url, [{"name": "A", "price": 1}, {"name": "B", "price": 1}], format="json")
+        ids = [row["id"] for row in items.data["results"]]
+        response = self.client.patch(self.url, [{"id": pk, "sku": "X2"} for pk in ids], format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([error["index"] for error in response.data["errors"]], [0, 1])
+        self.assertFalse(InventoryItem.objects.filter(sku="X2").exists())
+
+
+class ImportItemsTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user("owner")
+        self.other = User.objects.create_user("other")
+
+    def _import(self, lines, *args):
+        with tempfile.NamedTemporaryFile("w", suffix=".ndjson", delete=False) as f:
+            f.write("\n".join(json.dumps(line) for line in lines))
+        self.addCleanup(os.unlink, f.name)
+        stderr = io.StringIO()
+        call_command("import_items", f.name, "--user", "owner", *args, stdout=io.StringIO(), stderr=stderr)
+        return stderr.getvalue()
+
+    def test_dry_run_writes_nothing(self):
+        self._import([{"name": "Saw", "price": "3", "category": "Tools"}], "--dry-run")
+        self.assertFalse(Category.objects.exists())
+        self.assertFalse(InventoryItem.objects.exists())
+
+    def test_sku_clashes_are_row_errors(self):
+        InventoryItem.objects.create(user=self.owner, name="Hammer", sku="H1", price=1)
+        InventoryItem.objects.create(user=self.other, name="Nail", sku="N1", price=1)
+        errors = self._import([
+            {"name": "Claw hammer", "sku": "H1", "price": "2"},  # another of the owner's items has H1
+            {"name": "Nail", "sku": "N1", "price": "1"},  # only the other user's
+            {"name": "Saw", "sku": "S1", "price": "3"},
+            {"name": "Jigsaw", "sku": "S1", "price": "3"},
+        ])
+        self.assertIn("'Claw hammer': sku 'H1'", errors)
+        self.assertIn("'Jigsaw': sku 'S1'", errors)
+        self.assertEqual(sorted(self.owner.items.values_list("name", flat=True)), ["Hammer", "Nail", "Saw"])
+
+    def test_out_of_range_rows_are_row_errors(self):
+        long_sku = "S" * 64
+        InventoryItem.objects.create(user=self.owner, name="Saw", sku=long_sku, price=1)
+        rows = [
+            {"name": "Drill", "quantity": 2**31, "price": "1"},
+            {"name": "Vise", "reorder_point": 2**40, "price": "1"},
+            {"name": "Jigsaw", "sku": long_sku + "X", "price": "1"},  # would truncate to Saw's SKU
+            {"name": "Level", "category": "C" * 101, "price": "1"},
+            {"name": "Hammer", "quantity": 2**31 - 1, "price": "1"},
+        ]
+        errors = self._import(rows)
+        for line, message in [(1, "quantity must be between"), (2, "reorder_point must be"), (3, "sku is too long"),
+                              (4, "category is too long")]:
+            self.assertIn(f"line {line}: {message}", errors)
+        self.assertEqual(sorted(self.owner.items.values_list("name", flat=True)), ["Hammer", "Saw"])
+        self.assertFalse(Category.objects.exists())
+
+        with self.assertRaisesMessage(CommandError, "More than 3 bad rows"):
+            self._import(rows, "--max-errors", "3")
+
+
+class LoadTestCommandTests(TestCase):
+    """
+    Smoke tests for seed_inventory and benchmark_api on a tiny dataset.
+    """
+
+    def _seed(self, *args):
+        stdout = io.StringIO()
+        call_command("seed_inventory", "--users", "2", "--categories", "2", "--items", "30", "--logs-per-item", "2",
+                     "--batch-size", "7", *args, stdout=stdout)
+        return stdout.getvalue()
+
+    def test_seed_inventory(self):
+        self.assertIn("Seeded 2 users, 2 categories, 30 items", self._seed())
+        self.assertEqual(InventoryItem.objects.count(), 30)
+        self.assertTrue(User.objects.get(username="loadtest-admin").is_staff)
+        self.assertEqual(stored_totals(), live_totals())
+        first = sorted(InventoryItem.objects.values_list("name", "quantity"))
+
+        with self.assertRaisesMessage(CommandError, "pass --flush"):
+            self._seed()
+        self._seed("--flush")
+        self.assertEqual(sorted(InventoryItem.objects.values_list("name", "quantity")), first)
+        self.assertEqual(Category.objects.count(), 2)
+
+    def test_benchmark_api(self):
+        self._seed()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "report.json")
+            stdout = io.StringIO()
+            call_command("benchmark_api", "--requests", "3", "--warmup", "1", "--endpoints", "items", "history",
+                         "--output", path, stdout=stdout)
+            with open(path) as f:
+                self.assertEqual(json.load(f), json.loads(stdout.getvalue()))
+        report = json.loads(stdout.getvalue())
+        self.assertEqual((report["user"], report["dataset"]["items"]), ("loadtest-user-0", 30))
+        self.assertEqual(set(report["endpoints"]), {"items", "history"})
+        for name, result in report["endpoints"].items():
+            with self.subTest(endpoint=name):
+                self.assertEqual((result["requests"], result["errors"]), (3, 0))
+                self.assertLessEqual(result["p50_ms"], result["p99_ms"])
+                self.assertGreater(result["queries_min"], 0)
+
+    def test_benchmark_api_needs_a_seeded_user(self):
+        with self.assertRaisesMessage(CommandError, "run seed_inventory first"):
+            call_command("benchmark_api", stdout=io.StringIO())
+        with self.assertRaises(CommandError):
+            call_command("benchmark_api", "--endpoints", "nope", stdout=io.StringIO(), stderr=io.StringIO())
+
+
+class StockAdjustmentTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user("owner")
+        self.item = InventoryItem.objects.create(user=self.owner, name="Hammer", quantity=3, price=1)
+        self.url = f"/api/inventory/items/{self.item.pk}/adjust/"
+        self.client.force_authenticate(self.owner)
+
+    def _adjust(self, delta):
+        return self.client.post(self.url, {"delta": delta}, format="json")
+
+    def test_over_withdrawal_is_refused(self):
+        self.assertEqual(self._adjust(-4).status_code, 409)
+        response = self._adjust(-3)
+        self.assertEqual((response.status_code, response.data["quantity"]), (200, 0))
+        self.assertEqual(self._adjust(-1).status_code, 409)
+        self.assertEqual(self.item.changes.filter(change_type="sale").count(), 1)
+
+    def test_delta_must_fit_the_quantity_column(self):
+        for delta in (0, 10**12, -(10**12), 2**31):
+            with self.subTest(delta=delta):
+                self.assertEqual(self._adjust(delta).status_code, 400)
+        self.assertEqual(self._adjust(2**31 - 4).status_code, 200)
+        self.assertEqual(self._adjust(1).status_code, 409)
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.quantity, 2**31 - 1)
+
+
+class LowStockTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user("owner")
+        for name, quantity, reorder_point in [
+            ("Nails", 2, 10), ("Screws", 4, 5), ("Bolts", 0, 3), ("Glue", 7, 7), ("Tape", 1, 0),
+        ]:
+            InventoryItem.objects.create(
+                user=self.owner, name=name, quantity=quantity, reorder_point=reorder_point, price=1,
+            )
+        InventoryItem.objects.create(user=User.objects.create_user("other"), name="Nuts", quantity=0, reorder_point=9, price=1)
+        self.client.force_authenticate(self.owner)
+
+    def _names(self, query=""):
+        response = self.client.get(f"/api/inventory/items/low_stock/{query}")
+        self.assertEqual(response.status_code, 200)
+        return [row["name"] for row in response.data["results"]]
+
+    def test_items_below_their_reorder_point_by_shortfall(self):
+        # Shortfalls: Nails 8, Bolts 3, Screws 1; Glue is at its reorder point.
+        self.assertEqual(self._names(), ["Nails", "Bolts", "Screws"])
+
+    def test_threshold_overrides_reorder_points(self):
+        self.assertEqual(self._names("?threshold=3"), ["Bolts", "Tape", "Nails"])
+        self.assertEqual(self._names("?threshold=0"), [])
+
+    def test_pagination(self):
+        response = self.client.get("/api/inventory/items/low_stock/?page_size=2")
+        self.assertEqual(response.data["count"], 3)
+        self.assertEqual([row["name"] for row in response.data["results"]], ["Nails", "Bolts"])
+        self.assertEqual(self._names("?page_size=2&page=2"), ["Screws"])
+
+    def test_invalid_threshold(self):
+        auth = {"Authorization": f"Bearer {AccessToken.for_user(self.owner)}"}
+        for threshold in ("abc", "1.5", "-1"):
+            for prefix in ("", "async/"):
+                with self.subTest(threshold=threshold, prefix=prefix):
+                    url = f"/api/inventory/{prefix}items/low_stock/?threshold={threshold}"
+                    response = self.client.get(url, headers=auth)
+                    self.assertEqual(response.status_code, 400)
+                    self.assertIn("threshold", response.json())
+
+
+@skipUnless(connection.vendor in ("sqlite", "postgresql"), "full-text search needs SQLite FTS5 or PostgreSQL")
+class ItemSearchTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user("owner")
+        self.other = User.objects.create_user("other")
+        self.tools = Category.objects.create(name="Power tools")
+        self.drill = InventoryItem.objects.create(
+            user=self.owner, name="Cordless drill", quantity=1, price=1, category=self.tools
+        )
+        self.hammer = InventoryItem.objects.create(user=self.owner, name="Claw hammer", quantity=1, price=1)
+        InventoryItem.objects.create(user=self.other, name="Drill bits", quantity=1, price=1)
+        self.client.force_authenticate(self.owner)
+
+    def _search(self, term):
+        response = self.client.get("/api/inventory/items/", {"search": term})
+        return [row["name"] for row in response.data["results"]]
+
+    def test_words_are_prefix_matched_against_item_and_category(self):
+        self.assertEqual(self._search("dri"), ["Cordless drill"])
+        self.assertEqual(self._search("cord DRILL"), ["Cordless drill"])
+        self.assertEqual(self._search("power"), ["Cordless drill"])
+        self.assertEqual(self._search("power cord"), ["Cordless drill"])
+        # Category names are prefix-matched by word too, not searched for substrings.
+        self.assertEqual(self._search("ower"), [])
+        self.assertEqual(self._search("drill hammer"), [])
+        # FTS5 query syntax in the input is treated as text.
+        self.assertEqual(self._search('"drill" OR -hammer*'), [])
+
+    def test_index_follows_updates_and_deletes(self):
+        self.client.patch(f"/api/inventory/items/{self.hammer.pk}/", {"name": "Ball peen hammer"}, format="json")
+        self.assertEqual(self._search("peen"), ["Ball peen hammer"])
+        self.assertEqual(self._search("claw"), [])
+
+        self.client.patch(f"/api/inventory/items/{self.hammer.pk}/", {"category": self.tools.pk}, format="json")
+        self.assertEqual(sorted(self._search("power")), ["Ball peen hammer", "Cordless drill"])
+        self.tools.name = "Workshop"
+        self.tools.save()
+        self.assertEqual(self._search("power"), [])
+        self.assertEqual(sorted(self._search("workshop")), ["Ball peen hammer", "Cordless drill"])
+
+        self.client.delete(f"/api/inventory/items/{self.drill.pk}/")
+        self.assertEqual(self._search("cordless"), [])
+        self.assertEqual(self._search("drill"), [])
+
+    def test_change_logs_are_searched_by_item(self):
+        self.client.post(f"/api/inventory/items/{self.drill.pk}/adjust/", {"delta": 2}, format="json")
+        response = self.client.get("/api/inventory/changes/", {"search": "cordl"})
+        self.assertEqual({row["item"] for row in response.data["results"]}, {self.drill.pk})
+        response = self.client.get("/api/inventory/changes/", {"search": "power"})
+        self.assertEqual({row["item"] for row in response.data["results"]}, {self.drill.pk})
+
+
+class CompactChangeLogsTests(APITestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user("owner")
+        self.item = InventoryItem.objects.create(user=self.owner, name="Hammer", quantity=10, price=4)
+        InventoryItem.objects.filter(pk=self.item.pk).update(date_added=timezone.now() - timedelta(days=200))
+        self.client.force_authenticate(self.owner)
+        archive_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(archive_dir.cleanup)
+        self.archive_dir = archive_dir.name
+
+    def _log(self, days_ago, field, old, new, hour=12):
+        at = timezone.localtime() - timedelta(days=days_ago)
+        change_types = {"quantity": ("sale", "restock"), "price": ("decrease", "increase")}
+        return InventoryChangeLog.objects.create(
+            item=self.item, user=self.owner, field_changed=field, change_type=change_types[field][new > old],
+            old_value=old, new_value=new, quantity_changed=new - old if field == "quantity" else None,
+            timestamp=at.replace(hour=hour, minute=0),
+        )
+
+    def _compact(self):
+        out = io.StringIO()
+        call_command(
+            "compact_change_logs", "--days", "90", "--archive-dir", self.archive_dir, "--batch-size", "2", stdout=out
+        )
+        return out.getvalue()
+
+    def test_old_rows_are_rolled_up_and_archived(self):
+        old = [
+            self._log(100, "quantity", 5, 10, hour=9),
+            self._log(100, "price", 5, 6, hour=10),
+            self._log(100, "quantity", 10, 8, hour=11),
+            self._log(100, "price", 6, 4, hour=12),
+            self._log(95, "quantity", 8, 7),
+        ]
+        recent = self._log(1, "quantity", 7, 10)
+
+        self.assertIn("Compacted 5 change-log rows", self._compact())
+        self.assertEqual(list(InventoryChangeLog.objects.all()), [recent])
+        day1, day2 = InventoryChangeRollup.objects.order_by("day")
+        self.assertEqual(
+            (day1.day, day1.quantity_delta, day1.quantity_events, day1.price_events,
+             day1.min_price, day1.max_price, day1.close_price, day1.last_timestamp),
+            (timezone.localdate(old[0].timestamp), 3, 2, 2, 4, 6, 4, old[3].timestamp),
+        )
+        self.assertEqual((day2.quantity_delta, day2.quantity_events, day2.price_events), (-1, 1, 0))
+        # Pinned at the cutoff, so as_of still sees the compacted values.
+        snapshot = InventorySnapshot.objects.get(item=self.item)
+        self.assertEqual((snapshot.quantity, snapshot.price), (7, 4))
+
+        [name] = os.listdir(self.archive_dir)
+        with gzip.open(os.path.join(self.archive_dir, name), "rt", encoding="utf-8") as f:
+            archived = [json.loads(line) for line in f]
+        self.assertEqual([row["id"] for row in archived], [log.pk for log in old])
+        self.assertEqual((archived[1]["field_changed"], archived[1]["new_value"]), ("price", "6.00"))
+
+        self.assertIn("No change-log rows", self._compact())
+        self.assertEqual(InventoryChangeRollup.objects.count(), 2)
+
+    def test_history_continues_into_rollups(self):
+        self._log(100, "quantity", 5, 10)
+        recent = self._log(1, "quantity", 10, 7)
+        self._compact()
+
+        response = self.client.get(f"/api/inventory/items/{self.item.pk}/history/")
+        self.assertEqual([row["id"] for row in response.data["results"]], [recent.pk])
+        self.assertIn("rollup_cursor=", response.data["next"])
+        rollups = self.client.get(response.data["next"]).data["results"]
+        self.assertEqual([(row["kind"], row["quantity_delta"]) for row in rollups], [("daily_rollup", 5)])
+
+    def test_expired_tombstones_are_pruned(self):
+        expired = InventoryItemTombstone.objects.create(user=self.owner, item_id=1000)
+        InventoryItemTombstone.objects.filter(pk=expired.pk).update(deleted_at=timezone.now() - timedelta(days=31))
+        kept = InventoryItemTombstone.objects.create(user=self.owner, item_id=1001)
+        with override_settings(INVENTORY_SYNC={"TOMBSTONE_DAYS": 30}):
+            self._compact()
+        self.assertEqual(list(InventoryItemTombstone.objects.all()), [kept])
+
+
+class AsOfTests(APITestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user("owner")
+        self.now = timezone.now()
+        self.item = InventoryItem.objects.create(user=self.owner, name="Hammer", quantity=7, price=6)
+        InventoryItem.objects.filter(pk=self.item.pk).update(date_added=self.now - timedelta(days=10))
+        self._log(10, "quantity", "restock", 0, 10)
+        self._log(10, "price", "increase", 0, 4)
+        self._log(5, "quantity", "sale", 10, 7)
+        InventorySnapshot.objects.create(item=self.item, taken_at=self.now - timedelta(days=4), quantity=7, price=4)
+        self._log(3, "price", "increase", 4, 6)
+        InventoryItem.objects.create(user=self.owner, name="Saw", quantity=1, price=1)
+        self.client.force_authenticate(self.owner)
+
+    def _log(self, days_ago, field, change_type, old, new):
+        InventoryChangeLog.objects.create(
+            item=self.item, user=self.owner, field_changed=field, change_type=change_type,
+            old_value=old, new_value=new, quantity_changed=new - old if field == "quantity" else None,
+            timestamp=self.now - timedelta(days=days_ago),
+        )
+
+    def _as_of(self, days_ago, path="/api/inventory/items/as_of/"):
+        return self.client.get(path, {"at": (self.now - timedelta(days=days_ago)).isoformat()})
+
+    def _states(self, days_ago):
+        response = self._as_of(days_ago)
+        self.assertEqual(response.status_code, 200)
+        return [(row["name"], row["quantity"], row["price"]) for row in response.data["results"]]
+
+    def test_states_are_rebuilt_from_snapshots_and_logs(self):
+        self.assertEqual(self._states(6), [("Hammer", 10, "4.00")])
+        self.assertEqual(self._states(4.5), [("Hammer", 7, "4.00")])
+        self.assertEqual(self._states(2), [("Hammer", 7, "6.00")])
+        # Items added since are only listed from their date_added on.
+        response = self.client.get("/api/inventory/items/as_of/", {"at": timezone.now().isoformat()})
+        self.assertEqual([row["name"] for row in response.data["results"]], ["Hammer", "Saw"])
+
+        detail = f"/api/inventory/items/{self.item.pk}/as_of/"
+        self.assertEqual(self._as_of(3.5, detail).data["quantity"], 7)
+        self.assertEqual(self._as_of(11, detail).status_code, 404)
+        self.assertEqual(self.client.get(detail, {"at": "yesterday"}).status_code, 400)
+
+    def test_compacted_history_is_refused(self):
+        with tempfile.TemporaryDirectory() as archive_dir:
+            call_command("compact_change_logs", "--days", "4", "--archive-dir", archive_dir, stdout=io.StringIO())
+        # The sale 5 days ago is only in a rollup; history resumes at the snapshot 4 days ago.
+        for days_ago in (6, 4.5):
+            with self.subTest(days_ago=days_ago):
+                response = self._as_of(days_ago)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("compacted", str(response.data["at"]))
+        self.assertEqual(self._states(3.5), [("Hammer", 7, "4.00")])
+        self.assertEqual(self._states(2), [("Hammer", 7, "6.00")])
+
+
+class StockSummaryTests(APITestCase):
+    """
+    Every write path keeps the StockSummary buckets equal to a live aggregate.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_superuser("owner", password="x")
+        self.tools = Category.objects.create(name="Tools")
+        self.paint = Category.objects.create(name="Paint")
+        self.client.force_authenticate(self.owner)
+
+    def assertSummaryMatches(self):
+        self.assertEqual(stored_totals(), live_totals())
+
+    def test_api_writes(self):
+        response = self.client.post(
+            "/api/inventory/items/", {"name": "Hammer", "quantity": 4, "price": "2.50", "category": self.tools.pk}
+        )
+        pk = response.data["id"]
+        self.client.post("/api/inventory/items/", {"name": "Saw", "quantity": 1, "price": "9"})
+        self.assertSummaryMatches()
+        self.assertEqual(stored_totals()[(self.owner.pk, self.tools.pk)], (1, 4, Decimal("10.00")))
+
+        self.client.post(f"/api/inventory/items/{pk}/adjust/", {"delta": -3}, format="json")
+        self.assertSummaryMatches()
+        self.client.patch(f"/api/inventory/items/{pk}/", {"category": self.paint.pk, "price": "3"}, format="json")
+        self.assertSummaryMatches()
+        self.assertNotIn((self.owner.pk, self.tools.pk), stored_totals())
+        self.client.delete(f"/api/inventory/items/{pk}/")
+        self.assertSummaryMatches()
+        self.assertEqual(list(stored_totals()), [(self.owner.pk, None)])
+
+    def test_admin_writes(self):
+        self.client.force_login(self.owner)
+        form = {
+            "name": "Hammer", "sku": "", "description": "", "quantity": 5, "reorder_point": 0,
+            "price": "2.00", "user": self.owner.pk, "category": self.tools.pk,
+        }
+        self.assertEqual(self.client.post("/admin/inventory/inventoryitem/add/", form).status_code, 302)
+        item = InventoryItem.objects.get()
+        self.assertSummaryMatches()
+
+        form.update(quantity=2, category=self.paint.pk)
+        self.client.post(f"/admin/inventory/inventoryitem/{item.pk}/change/", form)
+        self.assertSummaryMatches()
+        self.assertEqual(item.changes.filter(change_type="sale").count(), 1)
+
+        # Rows staff can't edit go along with the item.
+        location = Location.objects.create(user=self.owner, name="Store")
+        StockLevel.objects.create(item=item, location=location, quantity=1)
+        InventoryChangeRollup.objects.create(item=item, day=timezone.localdate(), last_timestamp=timezone.now())
+        InventorySnapshot.objects.create(item=item, taken_at=timezone.now(), quantity=2, price=2)
+        response = self.client.post(f"/admin/inventory/inventoryitem/{item.pk}/delete/", {"post": "yes"})
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(InventoryItem.objects.exists())
+        self.assertFalse(InventoryChangeLog.objects.exists())
+        self.assertSummaryMatches()
+
+    def test_rebuild_command_repairs_drift(self):
+        InventoryItem.objects.bulk_create([InventoryItem(user=self.owner, name="Hammer", quantity=2, price=1)])
+        self.assertNotEqual(stored_totals(), live_totals())
+        with self.assertRaises(CommandError):
+            call_command("rebuild_stock_summary", "--verify-only", stdout=io.StringIO(), stderr=io.StringIO())
+        call_command("rebuild_stock_summary", stdout=io.StringIO())
+        self.assertSummaryMatches()
+
+
+@mock.patch.object(ChangeLogBuffer, "_ensure_worker")  # flushed by hand, on the test's connection
+class ChangeLogBufferTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user("owner")
+        self.item = InventoryItem.objects.create(user=self.owner, name="Hammer", quantity=1, price=1)
+
+    def _entry(self, change_type="restock"):
+        return InventoryChangeLog(
+            item=self.item, user=self.owner, field_changed="quantity", change_type=change_type,
+            old_value=0, new_value=1, quantity_changed=1,
+        )
+
+    def test_rejected_row_does_not_block_the_others(self, _worker):
+        buffer = ChangeLogBuffer()
+        buffer.add([self._entry(), self._entry(change_type=None), self._entry()])
+        with self.assertLogs("inventory.changelog", "ERROR"):
+            self.assertEqual(buffer.flush(), 2)
+        self.assertEqual(InventoryChangeLog.objects.count(), 2)
+        stats = buffer.stats()
+        self.assertEqual((stats["queue_depth"], stats["entries_failed"]), (0, 1))
+
+        buffer.add([self._entry()])
+        self.assertEqual(buffer.flush(), 1)
+
+    def test_full_queue_writes_synchronously(self, _worker):
+        buffer = ChangeLogBuffer(max_queue=2)
+        buffer.add([self._entry(), self._entry()])
+        with self.assertLogs("inventory.changelog", "WARNING"):
+            buffer.add([self._entry()])
+        self.assertEqual(InventoryChangeLog.objects.count(), 1)
+        self.assertEqual((buffer.stats()["queue_depth"], buffer.stats()["sync_writes"]), (2, 1))
+
+
+@skipUnless(connection.vendor == "sqlite", "reads SQLite's EXPLAIN QUERY PLAN")
+class QueryPlanTests(APITestCase):
+    """
+    No list endpoint may fall back to a full table scan (other than of the
+    small category table) for its filters and orderings.
+    """
+    SMALL_TABLES = {"inventory_category", "auth_user"}
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command("seed_inventory", users=3, categories=3, items=300, logs_per_item=2, stdout=io.StringIO())
+        cls.owner = User.objects.get(username="loadtest-user-0")
+        cls.admin = User.objects.create_user("admin", is_staff=True)
+        cls.category = Category.objects.order_by("id").first()
+        cls.item = cls.owner.items.order_by("id").first()
+        cls.location = Location.objects.create(user=cls.owner, name="Shelf")
+        StockLevel.objects.bulk_create(
+            StockLevel(item=item, location=cls.location, quantity=1) for item in cls.owner.items.all()[::2]
+        )
+
+    def _plan_problems(self, path, sorted_by_index=False):
+        """
+        Full table scans in the plans of the queries behind `path`, plus
+        sorts when the ordering should come straight off an index.
+        """
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f"/api/inventory/{path}")
+        self.assertEqual(response.status_code, 200, path)
+        problems = []
+        with connection.cursor() as cursor:
+            for query in queries.captured_queries:
+                cursor.execute(f"EXPLAIN QUERY PLAN {query['sql']}")
+                for *_ids, detail in cursor.fetchall():
+                    words = detail.split()
+                    # FTS5 MATCH shows as "SCAN <fts table> VIRTUAL TABLE INDEX".
+                    indexed = "USING" in words or "VIRTUAL" in words
+                    full_scan = words[0] == "SCAN" and not indexed and words[1] not in self.SMALL_TABLES
+                    if full_scan or (sorted_by_index and "TEMP B-TREE" in detail):
+                        problems.append(f"{detail} in {query['sql']}")
+        return problems
+
+    def test_owner_endpoints_use_indexes(self):
+        self.client.force_authenticate(self.owner)
+        since = self.client.get("/api/inventory/items/sync/").data["cursor"]
+        for path in [
+            "items/", f"items/?category={self.category.pk}", "items/?price__gte=5&price__lte=50",
+            "items/?quantity__lte=3", "items/?date_added__gte=2020-01-01T00:00:00Z", "items/?search=item",
+            "items/low_stock/", f"items/sync/?since={since}",
+            "items/audit/", "changes/", "changes/?change_type=sale", "changes/?ordering=timestamp",
+            f"items/{self.item.pk}/", f"items/{self.item.pk}/history/", "categories/",
+            f"items/?location={self.location.pk}", f"items/{self.item.pk}/stock/",
+            f"locations/{self.location.pk}/stock/", f"changes/?location={self.location.pk}",
+        ]:
+            with self.subTest(path=path):
+                self.assertEqual(self._plan_problems(path), [])
+        for path in [
+            "items/?ordering=date_added", "items/?ordering=-date_added", "items/?ordering=quantity",
+            "items/?ordering=-price", "items/?ordering=name", "items/low_stock/?threshold=5",
+        ]:
+            with self.subTest(path=path):
+                self.assertEqual(self._plan_problems(path, sorted_by_index=True), [])
+
+    def test_low_stock_uses_the_partial_index(self):
+        self.client.force_authenticate(self.owner)
+        cache.clear()
+        reset_queries()
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get("/api/inventory/items/low_stock/").status_code, 200)
+        plans = []
+        with connection.cursor() as cursor:
+            for query in queries.captured_queries:
+                cursor.execute(f"EXPLAIN QUERY PLAN {query['sql']}")
+                plans.append(" ".join(detail for *_ids, detail in cursor.fetchall()))
+        # Both the COUNT and the page query.
+        self.assertEqual(len([plan for plan in plans if "item_below_reorder_idx" in plan]), 2, plans)
+
+    def test_admin_filters_use_indexes(self):
+        self.client.force_authenticate(self.admin)
+        for path in [
+            "items/?price__gte=5&price__lte=50", f"items/?category={self.category.pk}",
+            "items/audit/", "changes/", "changes/?ordering=timestamp",
+        ]:
+            with self.subTest(path=path):
+                self.assertEqual(self._plan_problems(path), [])
+
+
+class ConditionalListTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user("owner")
+        self.other = User.objects.create_user("other")
+        self.item = InventoryItem.objects.create(user=self.owner, name="Hammer", quantity=3, price=10)
+        self.client.force_authenticate(self.owner)
+
+    def test_repeat_list_is_served_from_cache(self):
+        self.client.get("/api/inventory/items/")
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/inventory/items/")
+        self.assertEqual(response.data["count"], 1)
+
+    def test_etag_and_last_modified_give_304(self):
+        response = self.client.get("/api/inventory/items/")
+        self.assertIn("Last-Modified", response)
+        response = self.client.get("/api/inventory/items/", HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+        response = self.client.get("/api/inventory/items/", HTTP_IF_MODIFIED_SINCE=response["Last-Modified"])
+        self.assertEqual(response.status_code, 304)
+
+    def test_writes_invalidate_only_the_owners_lists(self):
+        etag = self.client.get("/api/inventory/items/")["ETag"]
+        self.client.force_authenticate(self.other)
+        other_etag = self.client.get("/api/inventory/items/")["ETag"]
+
+        self.client.force_authenticate(self.owner)
+        self.client.post(f"/api/inventory/items/{self.item.pk}/adjust/", {"delta": -1}, format="json")
+        response = self.client.get("/api/inventory/items/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["results"][0]["quantity"], 2)
+
+        self.client.force_authenticate(self.other)
+        response = self.client.get("/api/inventory/items/", HTTP_IF_NONE_MATCH=other_etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_category_rename_invalidates_item_lists(self):
+        category = Category.objects.create(name="Tools")
+        self.item.category = category
+        self.item.save()
+        self.client.get("/api/inventory/items/")
+        category.name = "Hand tools"
+        category.save()
+        response = self.client.get("/api/inventory/items/")
+        self.assertEqual(response.data["results"][0]["category_name"], "Hand tools")
+
+
+class LargeTableAdminTests(TestCase):
+    """
+    Admin changelists must not COUNT(*), DISTINCT or load rows per row displayed.
+    """
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser("admin", password="x")
+        self.client.force_login(self.admin)
+        self.item = InventoryItem.objects.create(user=self.admin, name="Hammer", quantity=1, price=2)
+        for month in (1, 3):
+            self._log(datetime(2026, month, 15, tzinfo=dt_timezone.utc))
+
+    def _log(self, at):
+        InventoryChangeLog.objects.create(
+            item=self.item, user=self.admin, field_changed="quantity", change_type="restock",
+            old_value=0, new_value=1, quantity_changed=1, timestamp=at,
+        )
+
+    def _changelist(self, path):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f"/admin/inventory/{path}")
+        self.assertEqual(response.status_code, 200)
+        return response, [query["sql"] for query in queries.captured_queries]
+
+    @mock.patch.object(EstimatedCountPaginator, "count_limit", 1)
+    def test_counts_are_estimated_or_bounded(self):
+        response, unfiltered = self._changelist("inventorychangelog/")
+        self.assertEqual(response.context["cl"].result_count, InventoryChangeLog.objects.order_by("-pk").first().pk)
+        self.assertFalse([sql for sql in unfiltered if "COUNT(" in sql or "DISTINCT" in sql])
+
+        response, queries = self._changelist("inventorychangelog/?change_type__exact=restock")
+        self.assertEqual(response.context["cl"].result_count, 1)
+        self.assertTrue(all("LIMIT 1" in sql for sql in queries if "COUNT(" in sql))
+
+        for _ in range(5):
+            self._log(timezone.now())
+        self.assertEqual(len(self._changelist("inventorychangelog/")[1]), len(unfiltered))
+
+    def test_date_hierarchy_lists_every_period_in_range(self):
+        response, queries = self._changelist("inventorychangelog/?timestamp__year=2026")
+        for month in (1, 2, 3):
+            self.assertContains(response, f"?timestamp__month={month}&amp;timestamp__year=2026")
+        self.assertFalse([sql for sql in queries if "DISTINCT" in sql])
+
+
+@override_settings(INVENTORY_SYNC={"SETTLE_SECONDS": 0, "TOMBSTONE_DAYS": 30})
+class DeltaSyncTests(APITestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user("owner")
+        self.other = User.objects.create_user("other")
+        self.items = [
+            InventoryItem.objects.create(user=self.owner, name=f"Item {i}", quantity=i, price=1) for i in range(5)
+        ]
+        InventoryItem.objects.create(user=self.other, name="Elsewhere", quantity=1, price=1)
+        self.client.force_authenticate(self.owner)
+
+    def _sync(self, cursor=None, **params):
+        if cursor:
+            params["since"] = cursor
+        return self.client.get("/api/inventory/items/sync/", params).data
+
+    def test_pages_through_everything_then_only_changes(self):
+        seen, cursor, more = [], None, True
+        while more:
+            data = self._sync(cursor, page_size=2)
+            seen += [row["id"] for row in data["items"]]
+            cursor, more = data["cursor"], data["more"]
+        self.assertEqual(sorted(seen), [item.pk for item in self.items])
+        self.assertEqual(self._sync(cursor)["items"], [])
+
+        self.client.post(f"/api/inventory/items/{self.items[0].pk}/adjust/", {"delta": 1}, format="json")
+        self.client.delete(f"/api/inventory/items/{self.items[1].pk}/")
+        data = self._sync(cursor, fields="id,quantity")
+        self.assertEqual(data["items"], [{"id": self.items[0].pk, "quantity": 1}])
+        self.assertEqual([row["id"] for row in data["deleted"]], [self.items[1].pk])
+        self.assertFalse(data["more"])
+
+    def test_expired_cursor_requires_resync(self):
+        stale = encode_cursor(None, (timezone.now() - timedelta(days=31), None))
+        response = self.client.get("/api/inventory/items/sync/", {"since": stale})
+        self.assertEqual(response.status_code, 410)
+        response = self.client.get("/api/inventory/items/sync/", {"since": "not-a-cursor"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_deletes_outside_the_api_are_synced(self):
+        tools = Category.objects.create(name="Tools")
+        InventoryItem.objects.filter(pk=self.items[1].pk).update(category=tools)
+        cursor = self._sync()["cursor"]
+
+        InventoryItem.objects.filter(pk=self.items[0].pk).delete()
+        tools.delete()
+        self.other.delete()  # its items go without tombstones, along with the user's own
+        data = self._sync(cursor, fields="id,category")
+        self.assertEqual(data["items"], [{"id": self.items[1].pk, "category": None}])
+        self.assertEqual([row["id"] for row in data["deleted"]], [self.items[0].pk])
+
+
+class LocationTransferTests(APITestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user("owner")
+        self.other = User.objects.create_user("other")
+        self.items = [
+            InventoryItem.objects.create(user=self.owner, name=f"Item {i}", quantity=10, price=1) for i in range(3)
+        ]
+        self.store = Location.objects.create(user=self.owner, name="Store")
+        self.depot = Location.objects.create(user=self.owner, name="Depot")
+        self.client.force_authenticate(self.owner)
+
+    def _transfer(self, *lines):
+        return self.client.post("/api/inventory/items/transfer/", [
+            {"item": item.pk, "from_location": source and source.pk, "to_location": target and target.pk,
+             "quantity": quantity}
+            for item, source, target, quantity in lines
+        ], format="json")
+
+    def _stock(self):
+        return {(level.item_id, level.location_id): level.quantity for level in StockLevel.objects.all()}
+
+    def test_transfer_moves_stock_and_logs_both_sides(self):
+        first, second, third = self.items
+        response = self._transfer(
+            (first, None, self.store, 6), (first, self.store, self.depot, 2), (second, None, self.depot, 10),
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(self._stock(), {
+            (first.pk, self.store.pk): 4, (first.pk, self.depot.pk): 2, (second.pk, self.depot.pk): 10,
+        })
+        first.refresh_from_db()
+        self.assertEqual((first.quantity, first.allocated, first.version), (10, 6, 2))
+        logs = InventoryChangeLog.objects.filter(item=first, field_changed="stock").order_by("id")
+        self.assertEqual(
+            [(log.change_type, log.location_id, log.old_value, log.new_value) for log in logs],
+            [("transfer_out", None, 10, 4), ("transfer_in", self.store.pk, 0, 6),
+             ("transfer_out", self.store.pk, 6, 4), ("transfer_in", self.depot.pk, 0, 2)],
+        )
+
+        listed = self.client.get("/api/inventory/items/", {"location": self.depot.pk}).data["results"]
+        self.assertEqual(sorted(row["id"] for row in listed), [first.pk, second.pk])
+        self.assertEqual(self.client.get(f"/api/inventory/locations/{self.store.pk}/stock/").data["count"], 1)
+
+        # More lines, same queries.
+        shelf = Location.objects.create(user=self.owner, name="Shelf")
+        with CaptureQueriesContext(connection) as one:
+            self._transfer((third, None, self.depot, 1))
+        with CaptureQueriesContext(connection) as many:
+            response = self._transfer(*[(item, None, shelf, 1) for item in (first, third)])
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(len(one), len(many))
+
+    def test_invalid_transfer_changes_nothing(self):
+        first, second, _third = self.items
+        elsewhere = Location.objects.create(user=self.other, name="Store")
+        response = self._transfer(
+            (first, None, self.store, 5), (second, self.store, self.depot, 1), (first, None, elsewhere, 1),
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([error["index"] for error in response.data["errors"]], [1, 2])
+        self.assertEqual(self._stock(), {})
+        self.assertFalse(InventoryChangeLog.objects.filter(field_changed="stock").exists())
+        first.refresh_from_db()
+        self.assertEqual((first.allocated, first.version), (0, 1))
+
+    def test_quantity_cannot_drop_below_allocated_stock(self):
+        first = self.items[0]
+        self._transfer((first, None, self.store, 8))
+        url = f"/api/inventory/items/{first.pk}/"
+        self.assertEqual(self.client.patch(url, {"quantity": 5}, format="json").status_code, 400)
+        self.assertEqual(self.client.post(f"{url}adjust/", {"delta": -3}, format="json").status_code, 409)
+        self.assertEqual(self.client.post(f"{url}adjust/", {"delta": -2}, format="json").status_code, 200)
+
+        self.assertEqual(self.client.delete(f"/api/inventory/locations/{self.store.pk}/").status_code, 409)
+        self._transfer((first, self.store, None, 8))
+        self.assertEqual(self.client.delete(f"/api/inventory/locations/{self.store.pk}/").status_code, 204)
+
+
+@override_settings(DATABASE_REPLICAS=["replica"], REPLICA_STICKY_SECONDS=60)
+class ReplicaRoutingTests(APITransactionTestCase):
+    """
+    "replica" is a second connection to the test database, so like a real
+    replica it only sees committed rows.
+    """
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user("owner")
+        self.other = User.objects.create_user("other")
+        self.item = InventoryItem.objects.create(user=self.owner, name="Hammer", quantity=1, price=10)
+        self.client.force_authenticate(self.owner)
+
+    def _request(self, method, path, **kwargs):
+        """
+        The response and which aliases ran queries for it.
+        """
+        with (
+            CaptureQueriesContext(connections["default"]) as primary,
+            CaptureQueriesContext(connections["replica"]) as replica,
+        ):
+            response = getattr(self.client, method)(path, **kwargs)
+        used = {alias for alias, queries in (("default", primary), ("replica", replica)) if queries.captured_queries}
+        return response, used
+
+    def test_reads_stick_to_primary_after_a_write(self):
+        self.assertIsNot(connections["replica"], connections["default"])
+        for path in ["/api/inventory/items/", "/api/inventory/items/audit/", "/api/inventory/categories/"]:
+            self.assertEqual(self._request("get", path)[1], {"replica"})
+        adjust = f"/api/inventory/items/{self.item.pk}/adjust/"
+        self.assertEqual(self._request("post", adjust, data={"delta": 1}, format="json")[1], {"default"})
+        response, used = self._request("get", "/api/inventory/items/")
+        self.assertEqual((used, response.data["results"][0]["quantity"]), ({"default"}, 2))
+
+        self.client.force_authenticate(self.other)
+        self.assertEqual(self._request("get", "/api/inventory/items/")[1], {"replica"})
+        self.client.force_authenticate(self.owner)
+        cache.clear()  # the sticky window has passed
+        response, used = self._request("get", "/api/inventory/items/")
+        self.assertEqual((used, response.data["results"][0]["quantity"]), ({"replica"}, 2))
+
+
+class ThrottleTests(APITestCase):
+    def setUp(self):
+        buckets.clear()
+        self.addCleanup(buckets.clear)
+        self.owner = User.objects.create_user("owner", password="secret")
+        self.other = User.objects.create_user("other")
+
+    def _rates(self, **rates):
+        return override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, "DEFAULT_THROTTLE_RATES": rates})
+
+    def test_bucket_allows_bursts_then_refills(self):
+        bucket = LocalBuckets(max_keys=10)
+        self.assertEqual([bucket.take("k", 2, 1.0, now=0) for _ in range(3)], [0, 0, 1.0])
+        self.assertEqual(bucket.take("k", 2, 1.0, now=0.5), 0.5)
+        self.assertEqual(bucket.take("k", 2, 1.0, now=1.0), 0)
+
+    def test_login_is_rejected_before_the_password_is_checked(self):
+        credentials = {"username": "owner", "password": "wrong"}
+        with self._rates(token="2/min"), mock.patch(
+            "django.contrib.auth.backends.ModelBackend.authenticate", return_value=None
+        ) as authenticate:
+            statuses = [self.client.post("/api/accounts/auth/token/", credentials).status_code for _ in range(3)]
+            response = self.client.post("/api/accounts/auth/token/", credentials)
+        self.assertEqual(statuses, [401, 401, 429])
+        self.assertEqual(authenticate.call_count, 2)
+        self.assertTrue(response.has_header("Retry-After"))
+
+    def test_actions_are_limited_per_user(self):
+        with self._rates(**{"item.audit": "1/min"}):
+            self.client.force_authenticate(self.owner)
+            self.assertEqual(self.client.get("/api/inventory/items/audit/").status_code, 200)
+            self.assertEqual(self.client.get("/api/inventory/items/audit/").status_code, 429)
+            self.assertEqual(self.client.get("/api/inventory/items/").status_code, 200)
+            self.client.force_authenticate(self.other)
+            self.assertEqual(self.client.get("/api/inventory/items/audit/").status_code, 200)
+
+
+class AsyncReadViewTests(APITestCase):
+    """
+    /api/inventory/async/ mirrors the sync read endpoints, JWT auth included.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user("owner")
+        self.other = User.objects.create_user("other")
+        category = Category.objects.create(name="Tools")
+        self.item = InventoryItem.objects.create(
+            user=self.owner, name="Hammer", quantity=1, price=10, category=category
+        )
+        InventoryItem.objects.create(user=self.owner, name="Saw", quantity=9, price=4, reorder_point=5)
+        self.foreign = InventoryItem.objects.create(user=self.other, name="Drill", quantity=2, price=50)
+        InventoryChangeLog.objects.create(
+            item=self.item, user=self.owner, field_changed="quantity", change_type="restock",
+            old_value=0, new_value=1, quantity_changed=1,
+        )
+        self.client.force_authenticate(self.owner)
+        self.auth = {"Authorization": f"Bearer {AccessToken.for_user(self.owner)}"}
+
+    async def test_responses_match_sync_views(self):
+        for path in [
+            "items/", "items/?fields=id,name&ordering=-price", "items/low_stock/", "items/low_stock/?threshold=5",
+            f"items/{self.item.pk}/", f"items/{self.item.pk}/history/", "categories/",
+        ]:
+            with self.subTest(path=path):
+                expected = await sync_to_async(self.client.get)(f"/api/inventory/{path}")
+                await sync_to_async(cache.clear)()
+                response = await self.async_client.get(f"/api/inventory/async/{path}", headers=self.auth)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.json(), expected.json())
+
+    async def test_auth_and_ownership(self):
+        response = await self.async_client.get("/api/inventory/async/items/")
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response["WWW-Authenticate"], 'Bearer realm="api"')
+        response = await self.async_client.get(f"/api/inventory/async/items/{self.foreign.pk}/", headers=self.auth)
+        self.assertEqual(response.status_code, 404)
+        response = await self.async_client.get("/api/inventory/async/items/", headers=self.auth)
+        self.assertEqual([row["name"] for row in response.json()["results"]], ["Hammer", "Saw"])
+
+
+class OptimisticConcurrencyTests(TransactionTestCase):
+    """
+    Item updates compare-and-swap on `version`: stale If-Match is a 412 and
+    concurrent writers never overwrite each other's changes.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user("owner")
+        self.item = InventoryItem.objects.create(user=self.owner, name="Widget", quantity=0, price=1)
+        self.url = f"/api/inventory/items/{self.item.pk}/"
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def test_stale_if_match_is_rejected(self):
+        etag = self.client.get(self.url)["ETag"]
+        response = self.client.patch(self.url, {"quantity": 3}, format="json", HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+        response = self.client.patch(self.url, {"quantity": 7}, format="json", HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 412)
+        self.item.refresh_from_db()
+        self.assertEqual((self.item.quantity, self.item.version), (3, 2))
+
+        response = self.client.delete(self.url, HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 412)
+        self.assertTrue(InventoryItem.objects.filter(pk=self.item.pk).exists())
+
+    def test_concurrent_read_modify_write_loses_no_updates(self):
+        workers, increments = 4, 5
+        failures = []
+
+        def increment():
+            client = APIClient()
+            client.force_authenticate(self.owner)
+            try:
+                for _ in range(increments):
+                    while True:
+                        try:
+                            current = client.get(self.url)
+                            response = client.patch(
+                                self.url, {"quantity": current.data["quantity"] + 1},
+                                format="json", HTTP_IF_MATCH=current["ETag"],
+                            )
+                        except OperationalError as e:
+                            # SQLite's shared-cache test database fails lock waits
+                            # instead of blocking. Like a client timeout, the write
+                            # may or may not have landed, so just read and try again.
+                            if "locked" not in str(e):
+                                raise
+                            continue
+                        if response.status_code == 200:
+                            break
+                        if response.status_code != 412:
+                            failures.append(response.status_code)
+                            return
+            except Exception as e:  # surfaced in the main thread below
+                failures.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=increment) for _ in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(failures, [])
+        self.item.refresh_from_db()
+        writes = self.item.version - 1
+        # Every acknowledged increment is in the total, and every applied write
+        # counted: none was overwritten by a concurrent one.
+        self.assertGreaterEqual(writes, workers * increments)
+        self.assertEqual(self.item.quantity, writes)
+        # Each write was logged once, against the value it actually replaced.
+        logged = sorted(
+            (int(new), int(old))
+            for old, new in self.item.changes.filter(field_changed="quantity").values_list("old_value", "new_value")
+        )
+        self.assertEqual(logged, [(n, n - 1) for n in range(1, writes + 1)])
+
+    def test_concurrent_sales_never_go_negative(self):
+        InventoryItem.objects.filter(pk=self.item.pk).update(quantity=10)
+        workers, attempts = 4, 5
+        outcomes = []
+
+        def sell():
+            client = APIClient()
+            client.force_authenticate(self.owner)
+            try:
+                for _ in range(attempts):
+                    while True:
+                        try:
+                            response = client.post(f"{self.url}adjust/", {"delta": -1}, format="json")
+                            break
+                        except OperationalError as e:
+                            # See above: SQLite fails lock waits instead of blocking.
+                            if "locked" not in str(e):
+                                raise
+                    outcomes.append(response.status_code)
+            except Exception as e:
+                outcomes.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=sell) for _ in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(set(outcomes) - {200, 409}, set())
+        # A retried sale may have landed already, so fewer than 10 can be acknowledged.
+        self.assertLessEqual(outcomes.count(200), 10)
+        self.item.refresh_from_db()
+        self.assertEqual((self.item.quantity, self.item.version), (0, 11))
+        sales = self.item.changes.filter(change_type="sale").values_list("old_value", "new_value")
+        self.assertEqual(sorted((int(old), int(new)) for old, new in sales), [(n, n - 1) for n in range(1, 11)])
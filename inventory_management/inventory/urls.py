@@ -1,13 +1,25 @@
 # inventory/urls.py
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import InventoryItemViewSet, CategoryViewSet, InventoryChangeLogViewSet
+from .views import InventoryItemViewSet, CategoryViewSet, InventoryChangeLogViewSet, LocationViewSet
+from . import async_views
 
 router = DefaultRouter()
 router.register(r"categories", CategoryViewSet, basename="category")
 router.register(r"items", InventoryItemViewSet, basename="item")
 router.register(r"changes", InventoryChangeLogViewSet, basename="change")
+router.register(r"locations", LocationViewSet, basename="location")
+
+# Async versions of the hot read endpoints, for ASGI deployments.
+async_urlpatterns = [
+    path("categories/", async_views.CategoryListView.as_view(), name="async-category-list"),
+    path("items/", async_views.ItemListView.as_view(), name="async-item-list"),
+    path("items/low_stock/", async_views.ItemLowStockView.as_view(), name="async-item-low-stock"),
+    path("items/<int:pk>/", async_views.ItemDetailView.as_view(), name="async-item-detail"),
+    path("items/<int:pk>/history/", async_views.ItemHistoryView.as_view(), name="async-item-history"),
+]
 
 urlpatterns = [
     path("", include(router.urls)),
+    path("async/", include(async_urlpatterns)),
 ]
@@ -1,9 +1,70 @@
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, ProtectedError, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.http import quote_etag
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import viewsets, permissions, filters
+from rest_framework import viewsets, permissions, filters, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import APIException, NotFound, ValidationError
 from rest_framework.response import Response
-from .models import InventoryItem, Category, InventoryChangeLog
-from .serializers import InventoryItemSerializer, CategorySerializer, InventoryChangeLogSerializer
+from .models import (
+    InventoryItem, Category, InventoryChangeLog, InventoryChangeRollup, InventoryItemTombstone, Location, StockLevel,
+    StockSummary,
+)
+from .serializers import (
+    InventoryItemSerializer,
+    CategorySerializer,
+    InventoryChangeLogSerializer,
+    InventoryChangeRollupSerializer,
+    ItemStateSerializer,
+    StockAdjustmentSerializer,
+    StockTotalsSerializer,
+    CategoryStockTotalsSerializer,
+    UserStockTotalsSerializer,
+    LocationSerializer,
+    StockLevelSerializer,
+    TransferSerializer,
+    ALLOCATED_STOCK_ERROR,
+    duplicate_sku_errors,
+    MAX_QUANTITY,
+)
+from . import cache
+from .cache import CachedListMixin
+from .pagination import (
+    AsyncPageNumberPagination, ChangeLogCursorPagination, ItemPagination, StitchedChangeLogPagination,
+)
+from .fastpath import FastListMixin, ValuesRepresentation
+from .search import ItemSearchFilter, ChangeLogSearchFilter
+from .renderers import CSVRenderer, NDJSONRenderer
+from .exports import export_response, ITEM_EXPORT_COLUMNS, CHANGE_EXPORT_COLUMNS
+from .changelog import creation_entries, update_entries, deletion_entries, record_changes, get_buffer
+from .summary import item_state, record_stock_changes
+from .snapshots import history_start, with_state_at
+from .sync import changes_since
+from .replicas import ReplicaReadsMixin
+from .locations import LocationFilter, TransferConflict, transfer_stock
+
+
+class PreconditionFailed(APIException):
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = "The item was modified since the given version; fetch it again."
+    default_code = "precondition_failed"
+
+
+class UpdateConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "The item is being modified concurrently; retry the request."
+    default_code = "conflict"
+
+
+class LocationNotEmpty(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "The location still holds stock; transfer it out first."
+    default_code = "location_not_empty"
 
 
 class IsAdminOrReadOnly(permissions.BasePermission):
@@ -12,14 +73,13 @@ class IsAdminOrReadOnly(permissions.BasePermission):
     Regular users can only read (GET, HEAD, OPTIONS).
     """
     def has_permission(self, request, view):
-        print(request.user)
         if request.method in permissions.SAFE_METHODS:  # GET, HEAD, OPTIONS
             return True
         return request.user and request.user.is_staff
     
 
 
-class CategoryViewSet(viewsets.ModelViewSet):
+class CategoryViewSet(ReplicaReadsMixin, CachedListMixin, viewsets.ModelViewSet):
     """
     Categories are global:
     - Admins: full CRUD
@@ -28,9 +88,13 @@ class CategoryViewSet(viewsets.ModelViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = [IsAdminOrReadOnly]
+    pagination_class = AsyncPageNumberPagination
 
+    def cache_scopes(self):
+        return [cache.CATEGORIES]
 
-class InventoryItemViewSet(viewsets.ModelViewSet):
+
+class InventoryItemViewSet(ReplicaReadsMixin, CachedListMixin, FastListMixin, viewsets.ModelViewSet):
     """
     Inventory items are owned by a user.
     - Regular users can only see/manage their own items.
@@ -38,8 +102,9 @@ class InventoryItemViewSet(viewsets.ModelViewSet):
     """
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = InventoryItemSerializer
+    pagination_class = ItemPagination
 
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, LocationFilter, ItemSearchFilter, filters.OrderingFilter]
     search_fields = ["name", "category__name"]
     ordering_fields = ["name", "quantity", "price", "date_added"]
     filterset_fields = {
@@ -48,85 +113,465 @@ class InventoryItemViewSet(viewsets.ModelViewSet):
         "quantity": ["gte", "lte"],
         "date_added": ["gte", "lte"],
     }
+    bulk_max_items = 1000
+    bulk_batch_size = 500
+    # Compare-and-swap attempts for writes without If-Match before giving up with 409.
+    cas_attempts = 5
 
     def get_queryset(self):
         user = self.request.user
+        qs = InventoryItem.objects.select_related("user", "category")
         if user.is_staff:  # admins see all
-            return InventoryItem.objects.all()
-        return InventoryItem.objects.filter(user=user)
+            return qs
+        return qs.filter(user=user)
+
+    def cache_scopes(self):
+        user = self.request.user
+        scope = cache.ALL_ITEMS if user.is_staff else cache.user_items_scope(user.pk)
+        return [cache.ITEMS, scope]
 
     # 🔹 Reusable logging helper
-    def _log_change(self, item, field, change_type, old_value, new_value, quantity_diff=None):
-        InventoryChangeLog.objects.create(
-            item=item,
-            user=self.request.user,
-            field_changed=field,
-            change_type=change_type,
-            old_value=old_value,
-            new_value=new_value,
-            quantity_changed=quantity_diff,
-        )
+    def _log_changes(self, entries):
+        record_changes(entries)
 
     # CREATE: Log restock/price initialization
+    @transaction.atomic
     def perform_create(self, serializer):
         item = serializer.save(user=self.request.user)
-        if item.quantity > 0:
-            self._log_change(item, "quantity", "restock", 0, item.quantity, quantity_diff=item.quantity)
-        if item.price > 0:
-            self._log_change(item, "price", "increase", 0, item.price)
+        self._log_changes(creation_entries(item, self.request.user))
+        record_stock_changes([(None, item_state(item))])
 
-    # UPDATE: Log quantity and price changes
-    def perform_update(self, serializer):
+    def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
-        old_quantity = instance.quantity
-        old_price = instance.price
-        updated_item = serializer.save()
+        response = Response(self.get_serializer(instance).data)
+        response["ETag"] = quote_etag(str(instance.version))
+        return response
 
-        if updated_item.quantity != old_quantity:
-            diff = updated_item.quantity - old_quantity
-            change_type = "restock" if diff > 0 else "sale"
-            self._log_change(updated_item, "quantity", change_type, old_quantity, updated_item.quantity, diff)
+    def update(self, request, *args, **kwargs):
+        response = super().update(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            response["ETag"] = quote_etag(str(response.data["version"]))
+        return response
 
-        if updated_item.price != old_price:
-            diff = updated_item.price - old_price
-            change_type = "increase" if diff > 0 else "decrease"
-            self._log_change(updated_item, "price", change_type, old_price, updated_item.price)
+    def _expected_version(self):
+        """
+        The version the client last saw, from If-Match ("3", W/"3") or a
+        `version` field in the body; None when the client sent neither.
+        """
+        header = self.request.headers.get("If-Match", "").strip()
+        if header == "*":
+            return None
+        raw = header.removeprefix("W/").strip('"') if header else self.request.data.get("version")
+        if raw in (None, ""):
+            return None
+        try:
+            return int(raw)
+        except (TypeError, ValueError):
+            raise ValidationError({"version": ["A valid integer is required."]})
+
+    # UPDATE: compare-and-swap on `version`, so the logged old values are the
+    # ones actually replaced. With If-Match a stale version is a 412;
+    # without it the write is retried against the fresh row (last writer wins).
+    @transaction.atomic
+    def perform_update(self, serializer):
+        instance = serializer.instance
+        expected = self._expected_version()
+        changes = serializer.validated_data
+        for _ in range(self.cas_attempts):
+            if expected is not None and instance.version != expected:
+                raise PreconditionFailed()
+            # Re-checked against the row being swapped: a transfer may have moved stock since validation.
+            if changes.get("quantity", instance.quantity) < instance.allocated:
+                raise ValidationError({"quantity": [ALLOCATED_STOCK_ERROR.format(allocated=instance.allocated)]})
+            old_quantity, old_price, old_state = instance.quantity, instance.price, item_state(instance)
+            now = timezone.now()
+            swapped = InventoryItem.objects.filter(pk=instance.pk, version=instance.version).update(
+                **changes, version=F("version") + 1, last_updated=now
+            )
+            if swapped:
+                break
+            if expected is not None:
+                raise PreconditionFailed()
+            instance.refresh_from_db()
+        else:
+            raise UpdateConflict()
 
-    # DELETE: Log removal of item before deleting
+        for attr, value in changes.items():
+            setattr(instance, attr, value)
+        instance.version += 1
+        instance.last_updated = now
+        self._log_changes(update_entries(instance, self.request.user, old_quantity, old_price))
+        record_stock_changes([(old_state, item_state(instance))])
+        cache.bump_items(instance.user_id)
+
+    # DELETE: Log removal of the exact version being deleted
+    @transaction.atomic
     def perform_destroy(self, instance):
-        if instance.quantity > 0:
-            self._log_change(instance, "quantity", "delete", instance.quantity, 0, quantity_diff=-instance.quantity)
-        if instance.price > 0:
-            self._log_change(instance, "price", "delete", instance.price, 0)
-        instance.delete()
+        expected = self._expected_version()
+        for _ in range(self.cas_attempts):
+            if expected is not None and instance.version != expected:
+                raise PreconditionFailed()
+            # Logged first, as before: the item's logs are CASCADE-deleted with it.
+            self._log_changes(deletion_entries(instance, self.request.user))
+            deleted, _rows = InventoryItem.objects.filter(pk=instance.pk, version=instance.version).delete()
+            if deleted:
+                break
+            if expected is not None:
+                raise PreconditionFailed()
+            try:
+                instance.refresh_from_db()
+            except InventoryItem.DoesNotExist:
+                raise NotFound()
+        else:
+            raise UpdateConflict()
+        # The tombstone for delta sync is left by signals.item_deleted.
+        record_stock_changes([(item_state(instance), None)])
+
+    # ADJUST: atomic restock (+delta) or sale (-delta) using DB-side arithmetic
+    @action(detail=True, methods=["post"])
+    def adjust(self, request, pk=None):
+        serializer = StockAdjustmentSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        delta = serializer.validated_data["delta"]
+
+        try:
+            items = self.get_queryset().filter(pk=pk)
+        except (TypeError, ValueError):
+            raise NotFound()
+        # Both bounds are checked by the UPDATE itself, so concurrent adjustments can't cross them.
+        if delta > 0:
+            target = items.filter(quantity__lte=MAX_QUANTITY - delta)
+        else:
+            # Sales come out of unassigned stock; stock at locations has to be transferred back first.
+            target = items.filter(quantity__gte=F("allocated") - delta)
+
+        with transaction.atomic():
+            updated = target.update(
+                quantity=F("quantity") + delta, version=F("version") + 1, last_updated=timezone.now()
+            )
+            if not updated:
+                if not items.exists():
+                    raise NotFound()
+                message = "Insufficient stock." if delta < 0 else f"Quantity can't exceed {MAX_QUANTITY}."
+                return Response({"delta": [message]}, status=status.HTTP_409_CONFLICT)
+            item = items.get()
+            self._log_changes(update_entries(item, request.user, item.quantity - delta, item.price))
+            record_stock_changes([(item_state(item, quantity=item.quantity - delta), item_state(item))])
+            cache.bump_items(item.user_id)
+
+        return Response(self.get_serializer(item).data)
+
+    # BULK: create (POST) or partially update (PATCH) many items in one transaction
+    @action(detail=False, methods=["post", "patch"])
+    def bulk(self, request):
+        rows = request.data
+        if not isinstance(rows, list):
+            return Response({"detail": "Expected a list of items."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(rows) > self.bulk_max_items:
+            return Response(
+                {"detail": f"At most {self.bulk_max_items} items per request."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            if request.method == "POST":
+                return self._bulk_create(rows)
+            return self._bulk_update(rows)
+        except IntegrityError:
+            # A SKU taken by a concurrent request after validation.
+            raise UpdateConflict()
+
+    def _bulk_create(self, rows):
+        user = self.request.user
+        items, errors = [], []
+        duplicates = duplicate_sku_errors(rows)
+        for index, row in enumerate(rows):
+            if index in duplicates:
+                errors.append({"index": index, "errors": duplicates[index]})
+                continue
+            serializer = self.get_serializer(data=row)
+            if not serializer.is_valid():
+                errors.append({"index": index, "errors": serializer.errors})
+                continue
+            items.append(InventoryItem(user=user, **serializer.validated_data))
+
+        with transaction.atomic():
+            created = InventoryItem.objects.bulk_create(items)
+            self._log_changes([entry for item in created for entry in creation_entries(item, user)])
+            record_stock_changes([(None, item_state(item)) for item in created])
+            cache.bump_items(user.pk)
+
+        data = {"results": self.get_serializer(created, many=True).data, "errors": errors}
+        if not created and errors:
+            return Response(data, status=status.HTTP_400_BAD_REQUEST)
+        return Response(data, status=status.HTTP_201_CREATED)
+
+    # Bulk updates lock their rows instead of compare-and-swapping each one;
+    # a row's optional `version` is still checked.
+    @transaction.atomic
+    def _bulk_update(self, rows):
+        user = self.request.user
+        ids = {}
+        for index, row in enumerate(rows):
+            try:
+                ids[index] = int(row["id"])
+            except (TypeError, KeyError, ValueError):
+                pass
+        instances = self.get_queryset().select_for_update(of=("self",)).in_bulk(set(ids.values()))
+
+        updated, fields, entries, stock_changes, errors = [], {"last_updated", "version"}, [], [], []
+        seen = set()
+        duplicates = duplicate_sku_errors(rows)
+        now = timezone.now()
+        for index, row in enumerate(rows):
+            pk = ids.get(index)
+            if pk is None:
+                errors.append({"index": index, "errors": {"id": ["This field is required."]}})
+                continue
+            if index in duplicates:
+                errors.append({"index": index, "errors": duplicates[index]})
+                continue
+            if pk in seen:
+                errors.append({"index": index, "errors": {"id": ["Duplicate id in request."]}})
+                continue
+            instance = instances.get(pk)
+            if instance is None:
+                errors.append({"index": index, "errors": {"id": ["Not found."]}})
+                continue
+            if row.get("version") not in (None, "") and str(row["version"]) != str(instance.version):
+                errors.append({"index": index, "errors": {"version": [PreconditionFailed.default_detail]}})
+                continue
+            serializer = self.get_serializer(instance, data=row, partial=True)
+            if not serializer.is_valid():
+                errors.append({"index": index, "errors": serializer.errors})
+                continue
+
+            seen.add(pk)
+            old_quantity, old_price = instance.quantity, instance.price
+            old_state = item_state(instance)
+            for attr, value in serializer.validated_data.items():
+                setattr(instance, attr, value)
+            instance.last_updated = now
+            instance.version += 1
+            fields.update(serializer.validated_data)
+            updated.append(instance)
+            entries.extend(update_entries(instance, user, old_quantity, old_price))
+            stock_changes.append((old_state, item_state(instance)))
+
+        if updated:
+            InventoryItem.objects.bulk_update(updated, sorted(fields), batch_size=self.bulk_batch_size)
+        self._log_changes(entries)
+        record_stock_changes(stock_changes)
+        cache.bump_items(*(item.user_id for item in updated))
+
+        data = {"results": self.get_serializer(updated, many=True).data, "errors": errors}
+        if not updated and errors:
+            return Response(data, status=status.HTTP_400_BAD_REQUEST)
+        return Response(data)
+
+    # TRANSFER: move stock between locations (null: unassigned) for many items at once
+    @action(detail=False, methods=["post"])
+    def transfer(self, request):
+        rows = request.data
+        if not isinstance(rows, list):
+            return Response({"detail": "Expected a list of transfers."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(rows) > self.bulk_max_items:
+            return Response(
+                {"detail": f"At most {self.bulk_max_items} transfers per request."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        serializer = TransferSerializer(data=rows, many=True)
+        if not serializer.is_valid():
+            errors = [{"index": index, "errors": row} for index, row in enumerate(serializer.errors) if row]
+            return Response({"errors": errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            levels, items, errors = transfer_stock(self.get_queryset(), serializer.validated_data, request.user)
+        except TransferConflict:
+            raise UpdateConflict()
+        if errors:
+            return Response({"errors": errors}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            "stock": StockLevelSerializer(levels, many=True).data,
+            "items": self.get_serializer(items, many=True).data,
+        })
+
+    @action(detail=True, methods=["get"])
+    def stock(self, request, pk=None):
+        item = self.get_object()
+        levels = StockLevel.objects.filter(item=item, quantity__gt=0).select_related("item", "location")
+        page = self.paginate_queryset(levels.order_by("location_id"))
+        return self.get_paginated_response(StockLevelSerializer(page, many=True).data)
 
     # CUSTOM ACTIONS
     @action(detail=False, methods=["get"])
     def low_stock(self, request):
-        threshold = int(request.query_params.get("threshold", 5))
-        qs = InventoryItem.objects.filter(quantity__lt=threshold)
+        page = self.paginate_queryset(self.low_stock_queryset())
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    def low_stock_queryset(self):
+        """
+        Items below their own reorder point, largest shortfall first.
+        ?threshold=N overrides the per-item reorder points.
+        """
+        qs = self.get_queryset()
+        threshold = self.request.query_params.get("threshold")
+        if threshold is None:
+            qs = qs.filter(quantity__lt=F("reorder_point"))
+            return qs.annotate(shortfall=F("reorder_point") - F("quantity")).order_by("-shortfall", "id")
+        try:
+            threshold = int(threshold)
+        except ValueError:
+            raise ValidationError({"threshold": ["A valid integer is required."]})
+        if threshold < 0:
+            raise ValidationError({"threshold": ["Ensure this value is greater than or equal to 0."]})
+        return qs.filter(quantity__lt=threshold).order_by("quantity", "id")
+
+    @action(detail=False, methods=["get"])
+    def sync(self, request):
+        """
+        Delta sync for offline clients: items created or changed and items
+        deleted since ?since=<cursor> (everything when omitted), oldest change
+        first. Apply `deleted`, upsert `items`, keep `cursor` for next time
+        and request again right away while `more` is true.
+        """
+        rows = ValuesRepresentation(self.get_serializer(), extra_columns=["id", "last_updated"])
+        tombstones = InventoryItemTombstone.objects.all()
         if not request.user.is_staff:
-            qs = qs.filter(user=request.user)
-        serializer = self.get_serializer(qs, many=True)
-        return Response(serializer.data)
+            tombstones = tombstones.filter(user=request.user)
+        items, deleted, cursor, more = changes_since(request, rows.restrict(self.get_queryset()), tombstones)
+        return Response({
+            "items": rows.serialize(items),
+            "deleted": [{"id": row["item_id"], "deleted_at": row["deleted_at"]} for row in deleted],
+            "cursor": cursor,
+            "more": more,
+        })
 
     @action(detail=True, methods=["get"])
     def history(self, request, pk=None):
         item = self.get_object()
-        logs = item.changes.all().order_by("-timestamp")
-        serializer = InventoryChangeLogSerializer(logs, many=True)
-        return Response(serializer.data)
+        # Each log's/rollup's `item` is filled in from `item` by the related manager.
+        return self._paginated_changes(item.changes.select_related("user"), item.rollups.all())
+
+    @action(detail=False, methods=["get"])
+    def summary(self, request):
+        rows = StockSummary.objects.all()
+        if not request.user.is_staff:
+            rows = rows.filter(user=request.user)
+        totals = {
+            "item_count": Coalesce(Sum("item_count"), 0),
+            "total_quantity": Coalesce(Sum("total_quantity"), 0),
+            "total_value": Coalesce(Sum("total_value"), Decimal("0")),
+        }
+        by_category = (
+            rows.values("category").annotate(category_name=F("category__name"), **totals)
+            .filter(item_count__gt=0).order_by("category_name")
+        )
+        by_user = (
+            rows.values("user").annotate(user_name=F("user__username"), **totals)
+            .filter(item_count__gt=0).order_by("user_name")
+        )
+        return Response({
+            "totals": StockTotalsSerializer(rows.aggregate(**totals)).data,
+            "by_category": CategoryStockTotalsSerializer(by_category, many=True).data,
+            "by_user": UserStockTotalsSerializer(by_user, many=True).data,
+        })
+
+    @action(detail=False, methods=["get"])
+    def as_of(self, request):
+        """
+        Every item's quantity and price at ?at=<ISO 8601 timestamp>.
+        """
+        at = self._as_of_param(request)
+        items = with_state_at(self.get_queryset(), at).order_by("id")
+        page = self.paginate_queryset(items)
+        response = self.get_paginated_response(ItemStateSerializer(page, many=True).data)
+        response.data["as_of"] = at
+        return response
+
+    @action(detail=True, methods=["get"], url_path="as_of", url_name="item-as-of")
+    def item_as_of(self, request, pk=None):
+        at = self._as_of_param(request)
+        item = self.get_object()
+        state = with_state_at(InventoryItem.objects.select_related("category").filter(pk=item.pk), at).first()
+        if state is None:
+            raise NotFound("Item did not exist yet.")
+        return Response({**ItemStateSerializer(state).data, "as_of": at})
+
+    def _as_of_param(self, request):
+        raw = request.query_params.get("at")
+        at = parse_datetime(raw) if raw else None
+        if at is None:
+            raise ValidationError({"at": ["A valid ISO 8601 datetime is required."]})
+        at = timezone.make_aware(at) if timezone.is_naive(at) else at
+        start = history_start()
+        if start is not None and at < start:
+            # Earlier states would be rebuilt from logs that no longer exist.
+            raise ValidationError({"at": [
+                f"Change history before {start.isoformat()} has been compacted into daily rollups "
+                "(see /items/audit/)."
+            ]})
+        return at
 
     @action(detail=False, methods=["get"])
     def audit(self, request):
-        logs = InventoryChangeLog.objects.all().order_by("-timestamp")
+        logs = InventoryChangeLog.objects.select_related("item", "user")
+        rollups = InventoryChangeRollup.objects.select_related("item")
         if not request.user.is_staff:
             logs = logs.filter(item__user=request.user)
-        serializer = InventoryChangeLogSerializer(logs, many=True)
-        return Response(serializer.data)
+            rollups = rollups.filter(item__user=request.user)
+        return self._paginated_changes(logs, rollups)
+
+    @action(detail=False, methods=["get"], renderer_classes=[CSVRenderer, NDJSONRenderer])
+    def export(self, request):
+        items = self.filter_queryset(self.get_queryset().order_by("id"))
+        return export_response(items, ITEM_EXPORT_COLUMNS, request.accepted_renderer.format, "items")
+
+    def _paginated_changes(self, logs, rollups):
+        # Item filters/ordering don't apply to logs, so paginate without the view.
+        return StitchedChangeLogPagination().paginate(
+            self.request, logs, rollups,
+            lambda page: InventoryChangeLogSerializer(page, many=True).data,
+            lambda page: InventoryChangeRollupSerializer(page, many=True).data,
+        )
+
 
+class LocationViewSet(ReplicaReadsMixin, viewsets.ModelViewSet):
+    """
+    Locations are owned by a user, like items; admins see them all.
+    Stock is moved in and out with /items/transfer/.
+    """
+    serializer_class = LocationSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = AsyncPageNumberPagination
+
+    def get_queryset(self):
+        qs = Location.objects.order_by("name", "id")
+        if self.request.user.is_staff:
+            return qs
+        return qs.filter(user=self.request.user)
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        # Levels emptied by transfers are left behind; only stocked ones protect the location.
+        instance.stock_levels.filter(quantity=0).delete()
+        try:
+            instance.delete()
+        except ProtectedError:
+            raise LocationNotEmpty()
 
-class InventoryChangeLogViewSet(viewsets.ReadOnlyModelViewSet):
+    @action(detail=True, methods=["get"])
+    def stock(self, request, pk=None):
+        location = self.get_object()
+        levels = StockLevel.objects.filter(location=location, quantity__gt=0).select_related("item", "location")
+        page = self.paginate_queryset(levels.order_by("item_id"))
+        return self.get_paginated_response(StockLevelSerializer(page, many=True).data)
+
+
+class InventoryChangeLogViewSet(ReplicaReadsMixin, FastListMixin, viewsets.ReadOnlyModelViewSet):
     """
     Change logs for inventory items.
     - Regular users only see logs for their own items.
@@ -134,14 +579,43 @@ class InventoryChangeLogViewSet(viewsets.ReadOnlyModelViewSet):
     """
     serializer_class = InventoryChangeLogSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = ChangeLogCursorPagination
 
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, ChangeLogSearchFilter, filters.OrderingFilter]
     search_fields = ["item__name", "user__username", "field_changed", "change_type"]
-    ordering_fields = ["timestamp", "item__name", "user__username"]
-    filterset_fields = ["field_changed", "change_type"]
+    # Cursor pagination needs a stable key, so only timestamp ordering is exposed.
+    ordering_fields = ["timestamp"]
+    filterset_fields = ["field_changed", "change_type", "location"]
+
+    @action(detail=False, methods=["get"], permission_classes=[permissions.IsAdminUser])
+    def buffer_stats(self, request):
+        buffer = get_buffer()
+        if buffer is None:
+            return Response({"enabled": False})
+        return Response({"enabled": True, **buffer.stats()})
 
     def get_queryset(self):
-        qs = InventoryChangeLog.objects.all().order_by("-timestamp")
+        qs = InventoryChangeLog.objects.select_related("item", "user")
         if not self.request.user.is_staff:
             qs = qs.filter(item__user=self.request.user)
         return qs
+
+    def list(self, request, *args, **kwargs):
+        # Rollups only carry per-day totals, so they are stitched in for the
+        # plain newest-first feed, not for filtered/searched/reordered lists.
+        params = set(request.query_params) - {"cursor", "rollup_cursor", "page_size", "format", "fields"}
+        if params:
+            return super().list(request, *args, **kwargs)
+        rollups = InventoryChangeRollup.objects.select_related("item")
+        if not request.user.is_staff:
+            rollups = rollups.filter(item__user=request.user)
+        rows = self.values_representation()
+        return StitchedChangeLogPagination().paginate(
+            request, rows.restrict(self.get_queryset()), rollups,
+            rows.serialize, lambda page: InventoryChangeRollupSerializer(page, many=True).data, view=self,
+        )
+
+    @action(detail=False, methods=["get"], renderer_classes=[CSVRenderer, NDJSONRenderer])
+    def export(self, request):
+        logs = self.filter_queryset(self.get_queryset().order_by("-timestamp", "-id"))
+        return export_response(logs, CHANGE_EXPORT_COLUMNS, request.accepted_renderer.format, "changes")
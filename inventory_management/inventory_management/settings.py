@@ -1,5 +1,6 @@
 from dotenv import load_dotenv
 import os
+import sys
 import dj_database_url
 from pathlib import Path
 from datetime import timedelta
@@ -42,7 +43,7 @@ INSTALLED_APPS = [
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "accounts.authentication.CachedJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.IsAuthenticatedOrReadOnly",
@@ -54,19 +55,45 @@ REST_FRAMEWORK = {
         "rest_framework.filters.SearchFilter",
         "rest_framework.filters.OrderingFilter",
     ),
+    # Token buckets per client and scope (see accounts.throttling). Viewset
+    # actions are scoped "<basename>.<action>"; scopes not listed are unlimited.
+    "DEFAULT_THROTTLE_CLASSES": (
+        "accounts.throttling.TokenBucketThrottle",
+    ),
+    "DEFAULT_THROTTLE_RATES": {
+        "register": os.getenv("THROTTLE_REGISTER", "20/hour"),
+        "token": os.getenv("THROTTLE_TOKEN", "30/min"),
+        "token_refresh": os.getenv("THROTTLE_TOKEN_REFRESH", "60/min"),
+        "item.list": os.getenv("THROTTLE_ITEM_LIST", "300/min"),
+        "item.audit": os.getenv("THROTTLE_AUDIT", "60/min"),
+        "item.export": os.getenv("THROTTLE_EXPORT", "10/min"),
+        "change.list": os.getenv("THROTTLE_CHANGE_LIST", "120/min"),
+        "change.export": os.getenv("THROTTLE_EXPORT", "10/min"),
+    },
+    # Anonymous clients are throttled by IP; behind a proxy (Heroku's router)
+    # set NUM_PROXIES so the address comes from X-Forwarded-For.
+    "NUM_PROXIES": int(os.environ["NUM_PROXIES"]) if os.getenv("NUM_PROXIES") else None,
+}
+
+# Where throttle buckets live: "memory" (per process, no I/O) or "cache"
+# (the default cache, shared by every process; needs a shared CACHE_BACKEND).
+THROTTLE_BUCKETS = {
+    "BACKEND": os.getenv("THROTTLE_BACKEND", "memory"),
+    "MAX_KEYS": int(os.getenv("THROTTLE_MAX_KEYS", 100_000)),
 }
 
 
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    "inventory.middleware.RequestMetricsMiddleware",  # Timing/SQL metrics for /metrics
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    "whitenoise.middleware.WhiteNoiseMiddleware",  # Serve static files
+    "inventory.middleware.StaticFilesMiddleware",  # WhiteNoise static files, async-capable for ASGI
 ]
 
 ROOT_URLCONF = 'inventory_management.urls'
@@ -95,11 +122,83 @@ WSGI_APPLICATION = 'inventory_management.wsgi.application'
 DATABASES = {
     'default': dj_database_url.config(
         default=os.getenv("DATABASE_URL"),
-        conn_max_age=600,
+        # Set DB_CONN_MAX_AGE=0 under ASGI: each request runs its queries on a fresh thread.
+        conn_max_age=int(os.getenv("DB_CONN_MAX_AGE", 600)),
         ssl_require=not DEBUG,
     )
 }
 
+# Optional read replicas, comma-separated (e.g. a second SQLite file locally).
+# Safe-method item, category and change-log reads go to a random replica;
+# a user who writes reads the primary for REPLICA_STICKY_SECONDS afterwards.
+for n, url in enumerate(filter(None, os.getenv("DATABASE_REPLICA_URLS", "").split(","))):
+    DATABASES[f"replica_{n}"] = {
+        **dj_database_url.parse(
+            url.strip(), conn_max_age=int(os.getenv("DB_CONN_MAX_AGE", 600)), ssl_require=not DEBUG
+        ),
+        "TEST": {"MIRROR": "default"},
+    }
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != "default"]
+# `manage.py test` also gets a "replica" alias: a second connection to the
+# test database, for routing tests to opt into with DATABASE_REPLICAS.
+if sys.argv[1:2] == ["test"]:
+    DATABASES["replica"] = {**DATABASES["default"], "TEST": {"MIRROR": "default"}}
+DATABASE_ROUTERS = ["inventory.replicas.ReplicaRouter"]
+REPLICA_STICKY_SECONDS = float(os.getenv("REPLICA_STICKY_SECONDS", 10))
+
+# Cache (list responses and their version counters, replica pins, shared
+# throttle buckets). Every process must see the same cache, or writes in one
+# worker leave the others serving stale lists; `check --deploy` warns
+# (inventory.W001) about a process-local backend outside DEBUG. Set REDIS_URL
+# (Heroku Redis does) or CACHE_BACKEND/CACHE_LOCATION; local memory is for
+# development, or for a single-process deployment (CACHE_ALLOW_LOCAL=True
+# silences the warning).
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND",
+            "django.core.cache.backends.redis.RedisCache" if os.getenv("REDIS_URL")
+            else "django.core.cache.backends.locmem.LocMemCache",
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION", os.getenv("REDIS_URL", "inventory")),
+    }
+}
+CACHE_ALLOW_LOCAL = os.getenv("CACHE_ALLOW_LOCAL", "False") == "True"
+
+# Change-log writes: when enabled, rows are queued in-process after commit and
+# written in batches off the request path.
+INVENTORY_CHANGELOG_BUFFER = {
+    "ENABLED": os.getenv("CHANGELOG_BUFFER", "False") == "True",
+    "MAX_ENTRIES": int(os.getenv("CHANGELOG_BUFFER_MAX_ENTRIES", 500)),
+    "FLUSH_INTERVAL_MS": int(os.getenv("CHANGELOG_BUFFER_FLUSH_MS", 200)),
+    # Beyond this many queued rows, writes go straight to the database.
+    "MAX_QUEUE": int(os.getenv("CHANGELOG_BUFFER_MAX_QUEUE", 50_000)),
+}
+
+# Change-log retention: rows older than this are rolled up per item/day and
+# archived by `manage.py compact_change_logs`.
+INVENTORY_CHANGELOG_RETENTION_DAYS = int(os.getenv("CHANGELOG_RETENTION_DAYS", 90))
+INVENTORY_CHANGELOG_ARCHIVE_DIR = os.getenv("CHANGELOG_ARCHIVE_DIR", BASE_DIR / "archive")
+
+# Delta sync (/items/sync/): writes newer than SETTLE_SECONDS are held back so
+# a cursor never passes a transaction still committing. Tombstones of deleted
+# items are kept TOMBSTONE_DAYS; clients with older cursors get a 410 and resync.
+INVENTORY_SYNC = {
+    "SETTLE_SECONDS": float(os.getenv("SYNC_SETTLE_SECONDS", 5)),
+    "TOMBSTONE_DAYS": int(os.getenv("SYNC_TOMBSTONE_DAYS", 30)),
+}
+
+# Request metrics (served at /metrics, Prometheus text format). Scrapers send
+# `Authorization: Bearer $METRICS_TOKEN`; admins can read it with their JWT.
+# SLOW_REQUEST_MS turns on the slow-request log (with SQL) at /metrics/slow/.
+INVENTORY_METRICS = {
+    "ENABLED": os.getenv("METRICS_ENABLED", "True") == "True",
+    "PATH_PREFIXES": ["/api/inventory/", "/api/accounts/"],
+    "TOKEN": os.getenv("METRICS_TOKEN"),
+    "SLOW_REQUEST_MS": float(os.environ["SLOW_REQUEST_MS"]) if os.getenv("SLOW_REQUEST_MS") else None,
+    "SLOW_REQUEST_LOG_SIZE": int(os.getenv("SLOW_REQUEST_LOG_SIZE", 20)),
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -145,6 +244,12 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 
 
+# Users resolved from JWTs are cached per process (see CachedJWTAuthentication).
+AUTH_USER_CACHE = {
+    "TTL": int(os.getenv("AUTH_USER_CACHE_TTL", 60)),
+    "MAX_SIZE": int(os.getenv("AUTH_USER_CACHE_MAX_SIZE", 10000)),
+}
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=15),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=7),
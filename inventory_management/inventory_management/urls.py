@@ -1,10 +1,13 @@
 from django.contrib import admin
 from django.urls import path, include
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from inventory.metrics import MetricsView, SlowRequestsView
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/accounts/", include("accounts.urls")),  
     path("api/inventory/", include("inventory.urls")),  
+    path("metrics", MetricsView.as_view(), name="metrics"),
+    path("metrics/slow/", SlowRequestsView.as_view(), name="metrics-slow"),
     
 ]